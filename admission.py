@@ -0,0 +1,257 @@
+"""
+Admission control: bound the bytes and extractions in flight per instance
+
+Every extraction reserves an estimate of the bytes it will hold before it
+starts and may grow the reservation once the real size is known. When
+the budget is exhausted new work waits up to a bounded time and is then
+rejected, so overload turns into fast 503s instead of OOM kills.
+"""
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from scheduler import percentile
+from shared_state import SharedLedger
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a reservation cannot be granted within the wait limit"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """A granted reservation"""
+
+    def __init__(self, ticket_id, nbytes, tenant=None):
+        self.id = ticket_id
+        self.bytes = nbytes
+        self.tenant = tenant
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+
+class AdmissionController:
+    """
+    Instance-wide budget of in-flight bytes and active extractions.
+
+    Reservations live in a SharedLedger so that all worker processes on
+    the instance draw from one budget. A reservation larger than the whole
+    byte budget is admitted only when nothing else is running, so that
+    oversized (but allowed) files still make progress.
+
+    Without a scheduler any waiter that fits may be admitted. With one
+    (see scheduler.FairScheduler) the scheduler picks which waiter goes
+    next and may hold back keys that are at their concurrency limit.
+
+    Args:
+        state_path: Ledger file shared by the workers
+        max_bytes: Byte budget across active reservations
+        max_active: Maximum number of concurrent extractions
+        max_wait: Seconds a request may wait for capacity
+        poll_interval: Seconds between capacity checks while waiting
+        scheduler: Optional admission ordering policy
+    """
+
+    def __init__(self, state_path, max_bytes, max_active, max_wait=5.0, poll_interval=0.05,
+                 scheduler=None):
+        self.ledger = SharedLedger(state_path, sections=('entries', 'waiting'))
+        self.max_bytes = max_bytes
+        self.max_active = max_active
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+        self._ids = itertools.count(1)
+        self._released = threading.Condition()
+        self._hold_seconds = None
+
+    def _fits(self, entries, nbytes, exclude=None):
+        active = [entry for key, entry in entries.items() if key != exclude]
+        if not active:
+            return True
+        if len(active) >= self.max_active and exclude is None:
+            return False
+        return sum(entry['bytes'] for entry in active) + nbytes <= self.max_bytes
+
+    def _wait(self, deadline):
+        """Wait for capacity; returns False when the deadline has passed"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        # Releases in this process wake waiters immediately; other workers
+        # are noticed on the next poll
+        with self._released:
+            self._released.wait(min(remaining, self.poll_interval * random.uniform(0.5, 1.5)))
+        return True
+
+    def retry_after(self):
+        """Suggested Retry-After in seconds, from the typical hold time"""
+        if self._hold_seconds is None:
+            return max(1, math.ceil(self.max_wait))
+        return min(60, max(1, math.ceil(self._hold_seconds)))
+
+    def _enqueue(self, state, tenant, nbytes):
+        if self.scheduler is None:
+            return {'bytes': nbytes, 'since': time.time()}
+        return self.scheduler.enqueue(state, tenant, nbytes)
+
+    def _is_next(self, state, key):
+        return self.scheduler is None or self.scheduler.is_next(state, key, self.max_active)
+
+    def acquire(self, nbytes, tenant=None):
+        """
+        Reserve nbytes and an extraction slot, waiting up to max_wait.
+
+        Args:
+            nbytes: Bytes to reserve
+            tenant: Scheduling identity of the caller (used with a scheduler)
+
+        Returns:
+            AdmissionTicket
+
+        Raises:
+            AdmissionRejected: If no capacity frees up in time
+        """
+        ticket = AdmissionTicket(next(self._ids), nbytes, tenant)
+        key = SharedLedger.entry_key(ticket.id)
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self.ledger.transaction() as state:
+                entries = state['entries']
+                waiting = state['waiting']
+                if key not in waiting:
+                    waiting[key] = self._enqueue(state, tenant, nbytes)
+                if self._fits(entries, nbytes) and self._is_next(state, key):
+                    entry = waiting.pop(key)
+                    entries[key] = {**entry, 'since': time.time()}
+                    if self.scheduler is not None:
+                        self.scheduler.on_admit(state, entry)
+                    ticket.admitted_at = time.monotonic()
+                    return ticket
+            if not self._wait(deadline):
+                with self.ledger.transaction() as state:
+                    entry = state['waiting'].pop(key, None)
+                    state['rejected'] = state.get('rejected', 0) + 1
+                    if self.scheduler is not None and entry is not None:
+                        self.scheduler.on_reject(state, entry['tenant'])
+                # A waiter may have been next in line; let the others re-check
+                self._notify()
+                raise AdmissionRejected(
+                    'Server is at capacity, please retry later',
+                    self.retry_after()
+                )
+
+    def resize(self, ticket, nbytes):
+        """
+        Change a reservation once the real size is known.
+
+        Shrinking always succeeds. Growing waits, like acquire, until the
+        extra bytes fit into the budget.
+
+        Raises:
+            AdmissionRejected: If the larger reservation does not fit in time
+        """
+        key = SharedLedger.entry_key(ticket.id)
+        previous = ticket.bytes
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            with self.ledger.transaction() as state:
+                entries = state['entries']
+                if nbytes <= previous or self._fits(entries, nbytes, exclude=key):
+                    entries.setdefault(key, {'since': time.time()})['bytes'] = nbytes
+                    ticket.bytes = nbytes
+                    break
+            if not self._wait(deadline):
+                with self.ledger.transaction() as state:
+                    state['rejected'] = state.get('rejected', 0) + 1
+                raise AdmissionRejected(
+                    'Server is at capacity, please retry later',
+                    self.retry_after()
+                )
+        if nbytes < previous:
+            self._notify()
+
+    def release(self, ticket):
+        """Return a reservation to the budget (idempotent)"""
+        if ticket.released:
+            return
+        ticket.released = True
+        held = time.monotonic() - ticket.admitted_at
+        with self.ledger.transaction() as state:
+            entry = state['entries'].pop(SharedLedger.entry_key(ticket.id), None)
+            if self.scheduler is not None and entry is not None:
+                self.scheduler.on_release(state, entry['tenant'], held)
+
+        if self._hold_seconds is None:
+            self._hold_seconds = held
+        else:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._notify()
+
+    def _notify(self):
+        with self._released:
+            self._released.notify_all()
+
+    @contextmanager
+    def admit(self, nbytes, tenant=None):
+        """Context manager around acquire/release"""
+        ticket = self.acquire(nbytes, tenant)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def occupancy(self):
+        """Current instance-wide usage, for /health"""
+        state = self.ledger.read()
+        active, used_bytes = self._usage(state)
+        return {
+            'active': active,
+            'max_active': self.max_active,
+            'bytes_in_flight': used_bytes,
+            'max_bytes': self.max_bytes,
+            'queued': len(state.get('waiting', {})),
+            'utilization': round(max(active / self.max_active, used_bytes / self.max_bytes), 3),
+            'saturated': active >= self.max_active or used_bytes >= self.max_bytes,
+            'rejected': state.get('rejected', 0),
+        }
+
+    def capacity(self):
+        """
+        Instance-wide free capacity, for readiness probes
+
+        Read without the ledger lock, so probes never wait behind
+        admissions. The p95 is over the recent service times of every key.
+        """
+        state = self.ledger.peek()
+        active, used_bytes = self._usage(state)
+        service_ms = [sample for stats in state.get('tenant_stats', {}).values()
+                      for sample in stats.get('service_ms', [])]
+        return {
+            'busy': active,
+            'idle': max(0, self.max_active - active),
+            'queued': len(state.get('waiting', {})),
+            'bytes_in_flight': used_bytes,
+            'max_bytes': self.max_bytes,
+            'service_ms_p95': percentile(service_ms, 0.95),
+            'saturated': active >= self.max_active or used_bytes >= self.max_bytes,
+        }
+
+    @staticmethod
+    def _usage(state):
+        entries = state.get('entries', {})
+        return len(entries), sum(entry['bytes'] for entry in entries.values())
+
+    def tenant_metrics(self):
+        """Per-key queue depth and latency, when a scheduler is configured"""
+        if self.scheduler is None:
+            return {}
+        return self.scheduler.metrics(self.ledger.read())
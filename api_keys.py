@@ -0,0 +1,114 @@
+"""
+API keys loaded from a local keys file
+
+The keys file is JSON:
+
+    {"keys": [
+        {"key": "...", "name": "web-app", "priority": "interactive",
+         "weight": 2, "max_concurrency": 4},
+        {"key": "...", "name": "nightly-import", "priority": "batch",
+         "max_concurrency": 2},
+        {"key": "...", "name": "ops", "admin": true}
+    ]}
+
+The file is re-read when it changes, so keys can be rotated without a
+restart. If a changed file cannot be parsed the previous keys stay in use.
+"""
+import hmac
+import json
+import logging
+import os
+import threading
+
+from scheduler import Tenant
+
+logger = logging.getLogger(__name__)
+
+
+def parse_keys(document):
+    """
+    Build the key table from a parsed keys file.
+
+    Returns:
+        dict: API key -> Tenant
+
+    Raises:
+        ValueError: If an entry is malformed or a key or name is repeated
+    """
+    if not isinstance(document, dict) or not isinstance(document.get('keys'), list):
+        raise ValueError('Keys file must be an object with a "keys" list')
+
+    keys = {}
+    names = set()
+    for index, entry in enumerate(document['keys']):
+        if not isinstance(entry, dict) or not entry.get('key') or not entry.get('name'):
+            raise ValueError(f'Key entry {index} needs "key" and "name"')
+        if entry['key'] in keys or entry['name'] in names:
+            raise ValueError(f'Duplicate key or name in entry {index} ({entry["name"]})')
+        max_concurrency = entry.get('max_concurrency')
+        if max_concurrency is not None and (not isinstance(max_concurrency, int) or max_concurrency < 1):
+            raise ValueError(f'max_concurrency of {entry["name"]} must be a positive integer')
+        keys[entry['key']] = Tenant(
+            entry['name'],
+            priority=entry.get('priority', 'interactive'),
+            weight=entry.get('weight', 1),
+            max_concurrency=max_concurrency,
+            admin=bool(entry.get('admin', False)),
+        )
+        names.add(entry['name'])
+    return keys
+
+
+class KeyRegistry:
+    """
+    API keys from a keys file, reloaded when the file's mtime changes.
+
+    Args:
+        path: Keys file, or empty to use no file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._keys = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            if self._mtime is not None:
+                with self._lock:
+                    if self._mtime is not None:
+                        # A deleted file must not leave its keys valid
+                        logger.warning(f"Keys file {self.path} is gone; revoking its {len(self._keys)} keys")
+                        self._keys = {}
+                        self._mtime = None
+            return
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    self._keys = parse_keys(json.load(file))
+                logger.info(f"Loaded {len(self._keys)} API keys from {self.path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load keys file {self.path}: {str(e)}")
+            self._mtime = mtime
+
+    def keys(self):
+        """Current key table"""
+        if self.path:
+            self._refresh()
+        return self._keys
+
+    def lookup(self, provided_key):
+        """Tenant for the given API key, or None if it is not known"""
+        tenant = None
+        for key, candidate in self.keys().items():
+            # Compare every key in constant time so lookups do not leak prefixes
+            if hmac.compare_digest(key.encode('utf-8'), provided_key.encode('utf-8')):
+                tenant = candidate
+        return tenant
@@ -1,30 +1,58 @@
 """
 File Extractor API with security enhancements
 """
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, make_response
 from functools import wraps
 import requests
 import os
 import tempfile
 import base64
+import csv
 import binascii
+import hashlib
+import hmac
+import json
 from pathlib import Path
-import csv
+import itertools
 import logging
+import socket
 from urllib.parse import urlparse
 from functools import lru_cache
 from dotenv import load_dotenv
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from http_range import open_range_file, RangeNotSupported, RangeBudgetExceeded, ResumableDownload
+from admission import AdmissionController, AdmissionRejected
+from api_keys import KeyRegistry
+from scheduler import FairScheduler, Tenant, ANONYMOUS
+from host_limits import HostBusy, HostLimiter, host_key
+from compression import compress_response, available_encodings
+from cache import NegativeCache
+from profiling import ProfileStore, RequestProfiler, PROFILE_FORMATS
+from memory_governor import MemoryGovernor
+import structured_logging
+import tracing
+import extraction
+from extraction import (  # noqa: F401 - re-exported for callers of the API module
+    PDF_AVAILABLE, DOCX_AVAILABLE, DOC_AVAILABLE,
+    SUPPORTED_EXTENSIONS, HTML_EXTENSIONS, ARCHIVE_EXTENSIONS, STREAMABLE_EXTENSIONS, SPREADSHEET_EXTRACTORS,
+    EXTRACTION_FUNCTIONS, ExtractionResult, CharBudget, FallbackTextDecoder,
+    parse_bool, parse_page_selection, parse_sheet_selection, parse_extraction_options,
+    extract_pdf, extract_docx, extract_doc, extract_csv, extract_txt, extract_html,
+    extract_xlsx, extract_xlsx_sheets, extract_ods, extract_ods_sheets, extract_pptx, extract_odp, extract_odt,
+    extract_archive, extract_archive_members, combine_archive_results, combine_sheet_results,
+    looks_like_text, iter_decoded_text, iter_stream_extraction,
+    resolve_file_extension, try_extract_with_fallback, extract_path
+)
+from result_store import ResultStore, encode_cursor, decode_cursor
+from serialization import (
+    FastJSONProvider, negotiate_format, make_negotiated_response, make_streamed_response, available_formats
+)
+from resolver import CachingResolver, install_connection_guard, pinned_connections, current_pins
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -37,13 +65,148 @@ def get_config():
         'ALLOWED_SCHEMES': ['http', 'https'],
         'BLOCKED_HOSTS': ['localhost', '127.0.0.1', '0.0.0.0', '::1', '169.254.169.254'],  # AWS metadata
         'FILE_EXTRACTOR_KEY': os.environ.get('FILE_EXTRACTOR_KEY', ''),
+        'API_KEYS_FILE': os.environ.get('API_KEYS_FILE', ''),  # JSON file of per-client keys
+        'RANGE_BLOCK_SIZE': int(os.environ.get('RANGE_BLOCK_SIZE', 256 * 1024)),  # 256KB blocks
+        'RANGE_CACHE_BLOCKS': int(os.environ.get('RANGE_CACHE_BLOCKS', 64)),
+        'DOWNLOAD_RETRIES': int(os.environ.get('DOWNLOAD_RETRIES', 3)),  # resumes after a dropped connection
+        'DOWNLOAD_BACKOFF': float(os.environ.get('DOWNLOAD_BACKOFF', 0.5)),  # seconds, doubled per retry
+        'DOWNLOAD_MAX_BACKOFF': float(os.environ.get('DOWNLOAD_MAX_BACKOFF', 8)),
+        'DOWNLOAD_CHUNK_SIZE': int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 64 * 1024)),
+        'DOWNLOAD_SEGMENTS': int(os.environ.get('DOWNLOAD_SEGMENTS', 4)),  # 1 disables segmented downloads
+        'SEGMENTED_DOWNLOAD_MIN_SIZE': int(os.environ.get('SEGMENTED_DOWNLOAD_MIN_SIZE', 8 * 1024 * 1024)),
+        'DNS_CACHE_TTL': int(os.environ.get('DNS_CACHE_TTL', 60)),  # used when the record TTL is unknown
+        'DNS_CACHE_MIN_TTL': int(os.environ.get('DNS_CACHE_MIN_TTL', 5)),
+        'DNS_CACHE_MAX_TTL': int(os.environ.get('DNS_CACHE_MAX_TTL', 300)),
+        'DNS_NEGATIVE_TTL': int(os.environ.get('DNS_NEGATIVE_TTL', 5)),
+        'DNS_CACHE_SIZE': int(os.environ.get('DNS_CACHE_SIZE', 1024)),
+        'JSON_SERIALIZER': os.environ.get('JSON_SERIALIZER', 'auto'),  # auto, orjson, ujson, stdlib
+        'COMPRESSION_ENABLED': os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true',
+        'COMPRESSION_MIN_SIZE': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),  # bytes
+        'RESULT_STORE_DIR': os.environ.get(
+            'RESULT_STORE_DIR', os.path.join(tempfile.gettempdir(), 'file-extractor-results')
+        ),
+        'RESULT_TTL': int(os.environ.get('RESULT_TTL', 600)),  # seconds
+        'ADMISSION_ENABLED': os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true',
+        'ADMISSION_MAX_BYTES': int(os.environ.get('ADMISSION_MAX_BYTES', 200 * 1024 * 1024)),  # 200MB in flight
+        'ADMISSION_MAX_ACTIVE': int(os.environ.get('ADMISSION_MAX_ACTIVE', 8)),
+        'ADMISSION_MAX_WAIT': float(os.environ.get('ADMISSION_MAX_WAIT', 5)),  # seconds queued before 503
+        'ADMISSION_DEFAULT_BYTES': int(os.environ.get('ADMISSION_DEFAULT_BYTES', 1024 * 1024)),  # size unknown
+        'ADMISSION_STATE_FILE': os.environ.get(
+            'ADMISSION_STATE_FILE', os.path.join(tempfile.gettempdir(), 'file-extractor-admission.json')
+        ),
+        'SCHEDULER_BATCH_SHARE': float(os.environ.get('SCHEDULER_BATCH_SHARE', 0.75)),  # of ADMISSION_MAX_ACTIVE
+        'HOST_MAX_CONCURRENCY': int(os.environ.get('HOST_MAX_CONCURRENCY', 4)),  # downloads per origin, 0 = no limit
+        'HOST_RATE_LIMIT': float(os.environ.get('HOST_RATE_LIMIT', 0)),  # downloads/second per origin, 0 = no limit
+        'HOST_RATE_BURST': int(os.environ.get('HOST_RATE_BURST', 10)),
+        'NEGATIVE_CACHE_TTL': int(os.environ.get('NEGATIVE_CACHE_TTL', 300)),  # seconds, permanent failures
+        'NEGATIVE_CACHE_TRANSIENT_TTL': int(os.environ.get('NEGATIVE_CACHE_TRANSIENT_TTL', 15)),  # timeouts, 5xx
+        'NEGATIVE_CACHE_SIZE': int(os.environ.get('NEGATIVE_CACHE_SIZE', 4096)),
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'INFO').upper(),
+        'LOG_FORMAT': os.environ.get('LOG_FORMAT', 'json'),  # json or text
+        'LOG_ASYNC': os.environ.get('LOG_ASYNC', 'true').lower() == 'true',  # write logs on a background thread
+        'LOG_QUEUE_SIZE': int(os.environ.get('LOG_QUEUE_SIZE', 10000)),  # records; more are dropped
+        'LOG_SAMPLE_RATE': float(os.environ.get('LOG_SAMPLE_RATE', 1.0)),  # requests whose info events are kept
+        'TRACING_ENABLED': os.environ.get('TRACING_ENABLED', 'false').lower() == 'true',
+        'TRACE_FILE': os.environ.get('TRACE_FILE', os.path.join(tempfile.gettempdir(), 'file-extractor-traces.jsonl')),
+        'TRACE_SAMPLE_RATE': float(os.environ.get('TRACE_SAMPLE_RATE', 1.0)),  # requests without a traceparent
+        'TRACE_SERVICE_NAME': os.environ.get('TRACE_SERVICE_NAME', 'file-extractor'),
+        'READY_MAX_QUEUED': int(os.environ.get('READY_MAX_QUEUED', 0)),  # waiting requests before /ready fails
+        'MEMORY_SOFT_LIMIT_MB': int(os.environ.get('MEMORY_SOFT_LIMIT_MB', 0)),  # worker RSS that retires it, 0 = off
+        'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),  # extractions run under cProfile
+        'PROFILE_SLOW_THRESHOLD': float(os.environ.get('PROFILE_SLOW_THRESHOLD', 0)),  # seconds, 0 = off
+        'PROFILE_SAMPLE_INTERVAL': float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.01)),  # seconds between stacks
+        'PROFILE_MAX_ENTRIES': int(os.environ.get('PROFILE_MAX_ENTRIES', 50)),
+        'PROFILE_DIR': os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'file-extractor-profiles')),
+        'HOST_STATE_FILE': os.environ.get(
+            'HOST_STATE_FILE', os.path.join(tempfile.gettempdir(), 'file-extractor-hosts.json')
+        ),
+        'COMPRESSION_LEVELS': {
+            'gzip': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+            'deflate': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+            'br': int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4)),
+            'zstd': int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3)),
+        },
+        # Page selection and archive limits, read now that .env is loaded
+        **extraction.get_settings(),
     }
 
 CONFIG = get_config()
+extraction.configure(CONFIG)
+
+# JSON logs written by a background thread, tagged with request ids
+structured_logging.configure_logging(CONFIG)
+
+# Request spans appended to a file in OTLP/JSON, when enabled
+tracing.configure(
+    tracing.FileExporter(CONFIG['TRACE_FILE'], CONFIG['TRACE_SERVICE_NAME']) if CONFIG['TRACING_ENABLED'] else None
+)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = CONFIG['MAX_FILE_SIZE'] * 2  # Allow larger responses
+app.json = FastJSONProvider(app, CONFIG['JSON_SERIALIZER'])
+
+# Server-side storage of full results for cursor pagination
+result_store = ResultStore(CONFIG['RESULT_STORE_DIR'], ttl=CONFIG['RESULT_TTL'])
+
+# Cached DNS resolution; outbound connections are pinned to vetted addresses
+dns_resolver = CachingResolver(
+    default_ttl=CONFIG['DNS_CACHE_TTL'],
+    min_ttl=CONFIG['DNS_CACHE_MIN_TTL'],
+    max_ttl=CONFIG['DNS_CACHE_MAX_TTL'],
+    negative_ttl=CONFIG['DNS_NEGATIVE_TTL'],
+    max_entries=CONFIG['DNS_CACHE_SIZE']
+)
+install_connection_guard(dns_resolver)
+
+# Per-client API keys, in addition to FILE_EXTRACTOR_KEY
+key_registry = KeyRegistry(CONFIG['API_KEYS_FILE'])
+
+# The primary key: interactive, unlimited, may read all scheduler metrics
+PRIMARY_TENANT = Tenant('default', admin=True)
+
+# Instance-wide budget of in-flight bytes and extractions, shared by workers;
+# waiting requests are admitted in weighted fair order across API keys
+admission = AdmissionController(
+    CONFIG['ADMISSION_STATE_FILE'],
+    max_bytes=CONFIG['ADMISSION_MAX_BYTES'],
+    max_active=CONFIG['ADMISSION_MAX_ACTIVE'],
+    max_wait=CONFIG['ADMISSION_MAX_WAIT'],
+    scheduler=FairScheduler(batch_share=CONFIG['SCHEDULER_BATCH_SHARE'])
+)
+
+# Per-origin download slots and start rate, shared by workers, so batch
+# ingests are turned back instead of overloading a customer's file server
+host_limiter = HostLimiter(
+    CONFIG['HOST_STATE_FILE'],
+    max_concurrency=CONFIG['HOST_MAX_CONCURRENCY'],
+    rate=CONFIG['HOST_RATE_LIMIT'],
+    burst=CONFIG['HOST_RATE_BURST']
+)
+
+# Recently failed URLs and payloads are answered from memory, so clients
+# retrying them do not cause repeated downloads and extractor cascades
+negative_cache = NegativeCache(
+    max_entries=CONFIG['NEGATIVE_CACHE_SIZE'],
+    ttl=CONFIG['NEGATIVE_CACHE_TTL'],
+    transient_ttl=CONFIG['NEGATIVE_CACHE_TRANSIENT_TTL']
+)
+
+# Sampled and slow extractions are profiled into a ring buffer on disk
+request_profiler = RequestProfiler(
+    ProfileStore(CONFIG['PROFILE_DIR'], max_profiles=CONFIG['PROFILE_MAX_ENTRIES']),
+    sample_rate=CONFIG['PROFILE_SAMPLE_RATE'],
+    slow_threshold=CONFIG['PROFILE_SLOW_THRESHOLD'],
+    interval=CONFIG['PROFILE_SAMPLE_INTERVAL']
+)
+
+# Extraction requests profiled and accounted for in the memory report
+EXTRACTION_ENDPOINTS = ('extract', 'extract_base64')
+
+# Per-format RSS growth of this worker; retires it past the soft limit
+# (see post_request in gunicorn.conf.py)
+memory_governor = MemoryGovernor(CONFIG['MEMORY_SOFT_LIMIT_MB'] * 1024 * 1024)
+app.extensions['memory_governor'] = memory_governor
 
 # Initialize rate limiter
 limiter = Limiter(
@@ -53,37 +216,159 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
-# PDF extraction
-try:
-    import pypdf
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    logger.warning("pypdf not available. PDF extraction disabled.")
-
-# DOCX extraction
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    logger.warning("python-docx not available. DOCX extraction disabled.")
-
-# DOC extraction (old format)
-try:
-    import docx2python
-    DOC_AVAILABLE = True
-except ImportError:
-    DOC_AVAILABLE = False
-    logger.warning("docx2python not available. DOC extraction disabled.")
-
-# Supported file types mapping
-SUPPORTED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.csv', '.txt']
+@app.before_request
+def assign_request_id():
+    """Give the request a correlation id for its log records"""
+    g.request_id = structured_logging.begin_request(
+        request.headers.get('X-Request-ID'), CONFIG['LOG_SAMPLE_RATE']
+    )
+
+@app.after_request
+def add_request_id(response):
+    """Return the correlation id so clients can quote it"""
+    request_id = g.get('request_id')
+    if request_id:
+        response.headers['X-Request-ID'] = request_id
+    return response
+
+@app.teardown_request
+def clear_request_id(error=None):
+    structured_logging.end_request()
+
+@app.before_request
+def start_trace():
+    """Open the request's root span, joining the caller's trace if it sent a traceparent"""
+    if tracing.enabled():
+        g.trace_root = tracing.start_trace(
+            f'{request.method} {request.url_rule.rule if request.url_rule else request.path}',
+            request.headers.get('traceparent'),
+            CONFIG['TRACE_SAMPLE_RATE'],
+            {'http.request.method': request.method, 'url.path': request.path, 'request.id': g.get('request_id')}
+        )
+
+@app.after_request
+def finish_trace(response):
+    """Export the request's spans once the response, streamed or not, is finished"""
+    root = g.pop('trace_root', None)
+    if root is None:
+        return response
+    root.set_attribute('http.response.status_code', response.status_code)
+    if response.status_code >= 500:
+        root.set_error(response.status)
+    if response.is_streamed:
+        response.call_on_close(lambda: tracing.finish_trace(root))
+    else:
+        tracing.finish_trace(root)
+    return response
+
+@app.teardown_request
+def detach_trace(error=None):
+    # Requests that raised skip after_request; their spans are still exported
+    root = g.pop('trace_root', None)
+    if root is not None:
+        root.set_error(str(error) if error else 'unfinished')
+        tracing.finish_trace(root)
+    tracing.detach()
+
+@app.teardown_request
+def abandon_profile(error=None):
+    # Requests that raised skip after_request; the profiler must still stop
+    capture = g.pop('profile_capture', None)
+    if capture is not None:
+        request_profiler.end(capture, {'path': request.path, 'error': str(error) if error else None})
+
+@app.before_request
+def measure_memory():
+    if request.endpoint in EXTRACTION_ENDPOINTS:
+        g.rss_before = memory_governor.begin()
+
+@app.after_request
+def account_memory(response):
+    """Record the request's RSS delta under its file type once the response is finished"""
+    rss_before = g.pop('rss_before', None)
+    if rss_before is None:
+        return response
+    label = g.get('input', {}).get('file_type') or 'unknown'
+    if response.is_streamed:
+        response.call_on_close(lambda: memory_governor.end(rss_before, label))
+    else:
+        memory_governor.end(rss_before, label)
+    return response
+
+@app.before_request
+def start_profile():
+    """Profile extraction requests selected by sampling or the slow threshold"""
+    if request_profiler.enabled and request.endpoint in EXTRACTION_ENDPOINTS:
+        g.profile_capture = request_profiler.begin()
+
+def describe_input(**fields):
+    """Record what is being extracted (file type, input hash) for profiles and the memory report"""
+    g.setdefault('input', {}).update(fields)
+
+def finish_profile(capture, metadata):
+    profile_id = request_profiler.end(capture, metadata)
+    if profile_id:
+        logger.info("Stored %s profile %s", metadata['path'], profile_id, extra={'event': 'profiled'})
+
+@app.after_request
+def store_profile(response):
+    """Store the profile once the response, streamed or not, is finished"""
+    capture = g.pop('profile_capture', None)
+    if capture is None:
+        return response
+    metadata = dict(
+        g.get('input', {}),
+        path=request.path,
+        status=response.status_code,
+        request_id=g.get('request_id')
+    )
+    if response.is_streamed:
+        response.call_on_close(lambda: finish_profile(capture, metadata))
+    else:
+        finish_profile(capture, metadata)
+    return response
+
+@app.after_request
+def compress(response):
+    """Compress responses according to the client's Accept-Encoding"""
+    if not CONFIG['COMPRESSION_ENABLED']:
+        return response
+    return compress_response(
+        response,
+        request.headers.get('Accept-Encoding', ''),
+        min_size=CONFIG['COMPRESSION_MIN_SIZE'],
+        levels=CONFIG['COMPRESSION_LEVELS']
+    )
+
+def auth_required():
+    """Whether any API key is configured; a keys file counts even while it is missing or empty"""
+    return bool(CONFIG.get('FILE_EXTRACTOR_KEY', '') or key_registry.path)
+
+def authenticate(provided_key):
+    """
+    Resolve an API key to its tenant
+    
+    Args:
+        provided_key: Key from the Authorization header
+        
+    Returns:
+        Tenant | None: None if the key is not valid
+    """
+    tenant = key_registry.lookup(provided_key)
+    if tenant is not None:
+        return tenant
+    api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    if api_key and hmac.compare_digest(provided_key.encode('utf-8'), api_key.encode('utf-8')):
+        return PRIMARY_TENANT
+    return None
 
 def require_api_key(f):
     """
     Decorator to require API key authentication
     
+    Accepts FILE_EXTRACTOR_KEY and the keys in API_KEYS_FILE. The caller's
+    tenant is stored in g.tenant for scheduling.
+    
     Args:
         f: Function to protect
         
@@ -92,12 +377,10 @@ def require_api_key(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        # Get API key from environment
-        api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
-        
         # If no API key is configured, skip authentication
-        if not api_key:
+        if not auth_required():
             logger.warning("No API key configured. Authentication disabled.")
+            g.tenant = ANONYMOUS
             return f(*args, **kwargs)
         
         # Get Authorization header
@@ -117,15 +400,84 @@ def require_api_key(f):
             provided_key = auth_header
         
         # Validate API key
-        if provided_key != api_key:
+        tenant = authenticate(provided_key)
+        if tenant is None:
             logger.warning(f"Invalid API key attempt from {request.remote_addr}")
             return jsonify({
                 'error': 'Invalid API key'
             }), 401
         
+        g.tenant = tenant
         return f(*args, **kwargs)
     return decorated_function
 
+def capacity_exceeded_response(error, status=503):
+    """503 response (or status) for requests shed by admission control"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def admission_controlled(f):
+    """
+    Decorator that admits a request against the in-flight budget
+    
+    The request reserves its body size (or ADMISSION_DEFAULT_BYTES for
+    bodiless requests) and may grow the reservation with
+    reserve_request_bytes once the real size is known. The reservation is
+    released when the response is finished, including streamed responses.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not CONFIG['ADMISSION_ENABLED']:
+            return f(*args, **kwargs)
+        
+        try:
+            ticket = admission.acquire(
+                request.content_length or CONFIG['ADMISSION_DEFAULT_BYTES'],
+                tenant=g.get('tenant')
+            )
+        except AdmissionRejected as e:
+            tenant = g.get('tenant')
+            logger.warning(
+                f"Request shed by admission control: {request.path} "
+                f"(key {tenant.name if tenant else 'anonymous'})"
+            )
+            return capacity_exceeded_response(e)
+        
+        g.admission_ticket = ticket
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            admission.release(ticket)
+            raise
+        
+        if response.is_streamed:
+            response.call_on_close(lambda: admission.release(ticket))
+        else:
+            admission.release(ticket)
+        return response
+    
+    return decorated_function
+
+def reserve_request_bytes(nbytes):
+    """
+    Grow the current request's admission reservation to nbytes
+    
+    Returns:
+        Response | None: A 503 response if the budget cannot take it
+    """
+    ticket = g.get('admission_ticket')
+    if ticket is None or nbytes <= ticket.bytes:
+        return None
+    try:
+        admission.resize(ticket, nbytes)
+    except AdmissionRejected as e:
+        logger.warning(f"Download of {nbytes} bytes shed by admission control")
+        return capacity_exceeded_response(e)
+    return None
+
+@tracing.traced()
 def validate_url(url):
     """
     Validate URL to prevent SSRF attacks
@@ -158,127 +510,112 @@ def validate_url(url):
         if host.lower() in CONFIG['BLOCKED_HOSTS']:
             return False, "Internal URLs are not allowed"
         
-        # Block private IP ranges (basic check)
-        host_lower = host.lower()
-        if (host_lower.startswith('10.') or 
-            host_lower.startswith('192.168.') or 
-            host_lower.startswith('172.16.') or
-            host_lower.startswith('172.17.') or
-            host_lower.startswith('172.18.') or
-            host_lower.startswith('172.19.') or
-            host_lower.startswith('172.20.') or
-            host_lower.startswith('172.21.') or
-            host_lower.startswith('172.22.') or
-            host_lower.startswith('172.23.') or
-            host_lower.startswith('172.24.') or
-            host_lower.startswith('172.25.') or
-            host_lower.startswith('172.26.') or
-            host_lower.startswith('172.27.') or
-            host_lower.startswith('172.28.') or
-            host_lower.startswith('172.29.') or
-            host_lower.startswith('172.30.') or
-            host_lower.startswith('172.31.')):
-            return False, "Private IP addresses are not allowed"
+        # Resolve once (cached) and check every address, including IP literals.
+        # Hostnames that cannot be resolved yet are vetted again when the
+        # download connects, so they are not rejected here.
+        try:
+            _, address_error = dns_resolver.vet(host)
+        except socket.gaierror as e:
+            logger.debug(f"Could not resolve {host} during validation: {str(e)}")
+            address_error = None
+        if address_error:
+            return False, address_error
         
         return True, None
     except Exception as e:
         logger.error(f"URL validation error: {str(e)}")
         return False, f"Invalid URL format: {str(e)}"
 
-def extract_pdf(file_path):
-    """Extract text from PDF file"""
-    if not PDF_AVAILABLE:
-        return None, "PDF extraction library not available"
-    
-    try:
-        text_content = []
-        with open(file_path, 'rb') as file:
-            pdf_reader = pypdf.PdfReader(file)
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
-        return '\n'.join(text_content), None
-    except Exception as e:
-        logger.error(f"PDF extraction error: {str(e)}")
-        return None, str(e)
+class DownloadTooLarge(Exception):
+    """Raised when a download exceeds MAX_FILE_SIZE"""
 
-def extract_docx(file_path):
-    """Extract text from DOCX file"""
-    if not DOCX_AVAILABLE:
-        return None, "DOCX extraction library not available"
-    
-    try:
-        doc = Document(file_path)
-        text_content = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text:
-                text_content.append(paragraph.text)
-        return '\n'.join(text_content), None
-    except Exception as e:
-        logger.error(f"DOCX extraction error: {str(e)}")
-        return None, str(e)
+def file_too_large_message():
+    """Error message for files above MAX_FILE_SIZE"""
+    return f"File too large. Maximum size: {CONFIG['MAX_FILE_SIZE'] / (1024*1024):.1f}MB"
 
-def extract_doc(file_path):
-    """Extract text from DOC file (old format)"""
-    if not DOC_AVAILABLE:
-        return None, "DOC extraction library not available"
+def download_error_message(error):
+    """
+    Map an exception raised while downloading to a client-facing message
     
-    try:
-        doc_content = docx2python.docx2python(file_path)
-        return doc_content.text, None
-    except Exception as e:
-        logger.error(f"DOC extraction error: {str(e)}")
-        return None, str(e)
+    Args:
+        error: Exception raised by requests or the size check
+        
+    Returns:
+        str: Error message
+    """
+    if isinstance(error, DownloadTooLarge):
+        return file_too_large_message()
+    if isinstance(error, requests.Timeout):
+        return f"Request timeout (>{CONFIG['REQUEST_TIMEOUT']}s)"
+    if isinstance(error, requests.RequestException):
+        logger.error(f"Download error: {str(error)}")
+        return f"Failed to download file: {str(error)}"
+    logger.error(f"Unexpected download error: {str(error)}")
+    return f"Unexpected error: {str(error)}"
 
-def extract_csv(file_path):
-    """Extract content from CSV file with better error handling"""
-    encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
-    
-    for encoding in encodings:
-        try:
-            content = []
-            with open(file_path, 'r', encoding=encoding) as file:
-                csv_reader = csv.reader(file)
-                for row in csv_reader:
-                    if row:  # Skip empty rows
-                        content.append(','.join(str(cell) for cell in row))
-            return '\n'.join(content), None
-        except (UnicodeDecodeError, csv.Error) as e:
-            logger.debug(f"CSV extraction with {encoding} failed: {str(e)}")
-            continue
-        except Exception as e:
-            logger.error(f"CSV extraction error: {str(e)}")
-            return None, str(e)
-    
-    return None, "Could not parse CSV file with any supported encoding"
+def download_error_is_transient(error):
+    """Whether a download error may go away on retry (timeouts, connection errors, 5xx, 429)"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is None or status >= 500 or status in (408, 425, 429)
+    return not isinstance(error, DownloadTooLarge)
 
-def extract_txt(file_path):
-    """Extract content from TXT file"""
-    encodings = ['utf-8', 'latin-1', 'cp1252']
-    
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as file:
-                return file.read(), None
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            logger.error(f"TXT extraction error: {str(e)}")
-            return None, str(e)
+def remember_download_error(url, error, message):
+    """
+    Negative-cache a failed download of url
     
-    return None, "Could not read text file with any supported encoding"
+    Only errors that describe the URL are kept: HTTP and connection errors
+    and files over MAX_FILE_SIZE, not unexpected internal errors.
+    """
+    if isinstance(error, (DownloadTooLarge, requests.RequestException)):
+        negative_cache.add(('url', url), message, transient=download_error_is_transient(error))
 
-def download_file(url):
+def options_fingerprint(options):
+    """The extraction options that decide a result, as a cache key part"""
+    relevant = {key: value for key, value in (options or {}).items() if key not in ('budget', 'source_name')}
+    return json.dumps(relevant, sort_keys=True, default=str)
+
+def file_digest(file_path):
+    """SHA-256 of a file, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def remember_extraction_failure(keys, result):
+    """Negative-cache an extraction no extractor could complete, under every key"""
+    for key in keys:
+        negative_cache.add(key, f'Failed to extract content: {result.error}', file_type=result.file_type)
+
+def cached_failure_response(failure):
+    """400 response repeating a negative-cached failure"""
+    body = {'error': failure['error'], 'cached': True, 'transient': failure['transient']}
+    if failure.get('file_type'):
+        body['file_type'] = failure['file_type']
+    return jsonify(body), 400
+
+@tracing.traced()
+@pinned_connections()
+def open_download(url):
     """
-    Download file from URL to temporary location with size limits
+    Start downloading a file without consuming the body
     
     Args:
         url: URL to download from
         
     Returns:
-        tuple: (file_path, file_extension, error_message)
+        tuple: (download, file_extension, error_message). download is a
+        ResumableDownload, which resumes the body with Range requests if the
+        connection drops part way. It holds a slot of the URL's host until
+        it is closed.
+        
+    Raises:
+        HostBusy: If the host's download budget is full. The request holds
+        an admission slot, so it does not queue for the host.
     """
+    host_ticket = host_limiter.try_acquire(host_key(url))
+    response = None
     try:
         response = requests.get(
             url, 
@@ -294,147 +631,408 @@ def download_file(url):
             try:
                 size = int(content_length)
                 if size > CONFIG['MAX_FILE_SIZE']:
-                    return None, None, f"File too large. Maximum size: {CONFIG['MAX_FILE_SIZE'] / (1024*1024):.1f}MB"
+                    response.close()
+                    host_limiter.release(host_ticket)
+                    remember_download_error(url, DownloadTooLarge(), file_too_large_message())
+                    return None, None, file_too_large_message()
             except ValueError:
                 pass  # Invalid content-length, continue
         
-        # Get file extension from URL or Content-Type
+        # Get file extension from URL (without query parameters) or Content-Type
         content_type = response.headers.get('Content-Type', '')
-        file_extension = None
-        
-        # Try to get extension from URL
-        url_path = Path(url.split('?')[0])  # Remove query parameters
-        if url_path.suffix:
-            file_extension = url_path.suffix.lower()
-        
-        # If no extension from URL, try Content-Type
-        if not file_extension:
-            if 'pdf' in content_type.lower():
-                file_extension = '.pdf'
-            elif 'word' in content_type.lower() or 'document' in content_type.lower():
-                file_extension = '.docx' if 'openxml' in content_type.lower() else '.doc'
-            elif 'csv' in content_type.lower() or 'text/csv' in content_type.lower():
-                file_extension = '.csv'
-            elif 'text/plain' in content_type.lower():
-                file_extension = '.txt'
-        
-        # Create temporary file
-        suffix = file_extension or '.tmp'
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-        
-        # Stream download with size check
-        downloaded = 0
-        try:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    downloaded += len(chunk)
-                    if downloaded > CONFIG['MAX_FILE_SIZE']:
-                        temp_file.close()
-                        os.unlink(temp_file.name)
-                        return None, None, f"File too large. Maximum size: {CONFIG['MAX_FILE_SIZE'] / (1024*1024):.1f}MB"
-                    temp_file.write(chunk)
-        finally:
-            temp_file.close()
+        file_extension = resolve_file_extension(url.split('?')[0], content_type)
         
-        logger.info(f"Downloaded file: {downloaded} bytes, extension: {file_extension}")
-        return temp_file.name, file_extension, None
+        download = ResumableDownload(
+            response,
+            url,
+            timeout=CONFIG['REQUEST_TIMEOUT'],
+            max_retries=CONFIG['DOWNLOAD_RETRIES'],
+            backoff=CONFIG['DOWNLOAD_BACKOFF'],
+            max_backoff=CONFIG['DOWNLOAD_MAX_BACKOFF'],
+            pins=current_pins()
+        )
+        download.on_close = lambda: host_limiter.release(host_ticket)
+        return download, file_extension, None
         
-    except requests.Timeout:
-        return None, None, f"Request timeout (>{CONFIG['REQUEST_TIMEOUT']}s)"
-    except requests.RequestException as e:
-        logger.error(f"Download error: {str(e)}")
-        return None, None, f"Failed to download file: {str(e)}"
     except Exception as e:
-        logger.error(f"Unexpected download error: {str(e)}")
-        return None, None, f"Unexpected error: {str(e)}"
+        if response is not None:
+            response.close()
+        host_limiter.release(host_ticket)
+        error = download_error_message(e)
+        remember_download_error(url, e, error)
+        return None, None, error
+
+def iter_download_chunks(response, chunk_size=None):
+    """
+    Iterate over the response body, enforcing MAX_FILE_SIZE
+    
+    Raises:
+        DownloadTooLarge: Once more than MAX_FILE_SIZE bytes have arrived
+    """
+    downloaded = 0
+    for chunk in response.iter_content(chunk_size=chunk_size or CONFIG['DOWNLOAD_CHUNK_SIZE']):
+        if chunk:
+            downloaded += len(chunk)
+            if downloaded > CONFIG['MAX_FILE_SIZE']:
+                raise DownloadTooLarge()
+            yield chunk
 
-def resolve_file_extension(filename=None, content_type=None):
+@tracing.traced()
+def save_download(response, file_extension, chunks=None):
     """
-    Resolve file extension from filename or Content-Type.
+    Write a download to a temporary file
+    
+    Files of at least SEGMENTED_DOWNLOAD_MIN_SIZE from origins that
+    advertise byte ranges are fetched in up to DOWNLOAD_SEGMENTS concurrent
+    Range requests, one per host slot that is free without waiting;
+    open_download has already checked their Content-Length against
+    MAX_FILE_SIZE and no segment writes past it.
     
     Args:
-        filename: Original file name (optional)
-        content_type: MIME type string (optional)
+        response: Download returned by open_download
+        file_extension: Extension used as the temp file suffix
+        chunks: Optional chunk iterator to use instead of the response body
+            (e.g. when the first chunk was already read)
         
     Returns:
-        str | None: Lowercase extension including dot, or None
-    """
-    if filename:
-        suffix = Path(filename).suffix.lower()
-        if suffix:
-            return suffix
-    
-    if content_type:
-        content_type_lower = content_type.lower()
-        if 'pdf' in content_type_lower:
-            return '.pdf'
-        if 'word' in content_type_lower or 'document' in content_type_lower:
-            return '.docx' if 'openxml' in content_type_lower else '.doc'
-        if 'csv' in content_type_lower or 'text/csv' in content_type_lower:
-            return '.csv'
-        if 'text/plain' in content_type_lower:
-            return '.txt'
+        tuple: (file_path, error_message)
+    """
+    # Create temporary file
+    suffix = file_extension or '.tmp'
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    segment_tickets = []
+    if (chunks is None and CONFIG['DOWNLOAD_SEGMENTS'] > 1
+            and response.can_segment(CONFIG['SEGMENTED_DOWNLOAD_MIN_SIZE'])):
+        # The download already holds one slot of its host
+        host = host_key(response.url)
+        for _ in range(CONFIG['DOWNLOAD_SEGMENTS'] - 1):
+            ticket = host_limiter.acquire(host, wait=False)
+            if ticket is None:
+                break
+            segment_tickets.append(ticket)
+    segmented = bool(segment_tickets)
     
-    return None
+    # Stream download with size check
+    downloaded = 0
+    try:
+        if segmented:
+            downloaded = response.write_segments(
+                temp_file.fileno(), len(segment_tickets) + 1, CONFIG['DOWNLOAD_CHUNK_SIZE']
+            )
+        else:
+            for chunk in chunks if chunks is not None else iter_download_chunks(response):
+                downloaded += len(chunk)
+                temp_file.write(chunk)
+    except Exception as e:
+        temp_file.close()
+        os.unlink(temp_file.name)
+        error = download_error_message(e)
+        remember_download_error(response.url, e, error)
+        return None, error
+    finally:
+        temp_file.close()
+        response.close()
+        for ticket in segment_tickets:
+            host_limiter.release(ticket)
+    
+    logger.info(
+        "Downloaded file: %d bytes, extension: %s", downloaded, file_extension,
+        extra={'event': 'downloaded', 'bytes': downloaded, 'file_type': file_extension}
+    )
+    return temp_file.name, None
+
+@tracing.traced()
+def download_file(url):
+    """
+    Download file from URL to temporary location with size limits
+    
+    Args:
+        url: URL to download from
+        
+    Returns:
+        tuple: (file_path, file_extension, error_message)
+    """
+    response, file_extension, error = open_download(url)
+    if error:
+        return None, None, error
+    
+    file_path, error = save_download(response, file_extension)
+    if error:
+        return None, None, error
+    return file_path, file_extension, None
 
-# Extraction function mapping
-EXTRACTION_FUNCTIONS = {
-    '.pdf': extract_pdf,
-    '.docx': extract_docx,
-    '.doc': extract_doc,
-    '.csv': extract_csv,
-    '.txt': extract_txt
-}
+@tracing.traced()
+@pinned_connections()
+def extract_remote_pdf_pages(url, pages, budget=None):
+    """
+    Extract selected PDF pages through HTTP Range requests
+    
+    Only the trailer, xref and the objects of the requested pages are
+    fetched, in cached blocks, instead of the whole file.
+    
+    Args:
+        url: URL of the remote PDF
+        pages: Zero-based page indices to extract
+        budget: Optional CharBudget for max_chars
+        
+    Returns:
+        tuple: (content, transfer_info). content is None when the origin does
+        not support ranges or the PDF cannot be read lazily; the caller should
+        then fall back to download_file. The reads hold one slot of the
+        URL's host.
+    """
+    buffered = None
+    try:
+        with host_limiter.slot(host_key(url), wait=False):
+            buffered, range_file = open_range_file(
+                url,
+                timeout=CONFIG['REQUEST_TIMEOUT'],
+                block_size=CONFIG['RANGE_BLOCK_SIZE'],
+                max_cached_blocks=CONFIG['RANGE_CACHE_BLOCKS'],
+                max_bytes=CONFIG['MAX_FILE_SIZE']
+            )
+            if range_file is None:
+                return None, None
+            
+            if buffered.read(5) != b'%PDF-':
+                logger.info("Range probe did not return a PDF header, falling back to full download")
+                return None, None
+            buffered.seek(0)
+            
+            # Strict mode skips pypdf's repair pass, which would touch every object
+            content, error = extract_pdf(buffered, {'pages': pages, 'strict': True, 'budget': budget})
+            if error or not content:
+                logger.info(f"Range-based PDF extraction failed ({error}), falling back to full download")
+                return None, None
+            
+            transfer_info = {
+                'mode': 'range',
+                'bytes_fetched': range_file.bytes_fetched,
+                'file_size': range_file.size,
+                'requests': range_file.requests_made
+            }
+            logger.info(
+                "Range-based PDF extraction fetched %d of %d bytes in %d requests",
+                range_file.bytes_fetched, range_file.size, range_file.requests_made,
+                extra={'event': 'range_extracted', **transfer_info}
+            )
+            return content, transfer_info
+    except (requests.RequestException, RangeNotSupported, RangeBudgetExceeded) as e:
+        logger.info(f"Range-based PDF extraction unavailable ({str(e)}), falling back to full download")
+        return None, None
+    finally:
+        if buffered is not None:
+            buffered.close()
 
-def try_extract_with_fallback(file_path, file_extension=None):
+def parse_pagination(params):
     """
-    Try extraction with multiple methods if file extension is unknown
+    Parse offset/limit/cursor pagination parameters
     
     Args:
-        file_path: Path to the file
-        file_extension: Known extension or None
+        params: Mapping of request parameters
         
     Returns:
-        tuple: (content, detected_extension, error_message)
+        tuple: (pagination dict or None, error_message). The dict has
+        result_id (set for cursor requests), offset and limit.
     """
-    # If we have a known extension, try it first
-    if file_extension and file_extension in EXTRACTION_FUNCTIONS:
-        extract_func = EXTRACTION_FUNCTIONS[file_extension]
-        try:
-            content, error = extract_func(file_path)
-            if content and not error:
-                return content, file_extension, None
-        except Exception as e:
-            logger.debug(f"Extraction with {file_extension} failed: {str(e)}")
+    cursor = params.get('cursor')
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if not decoded:
+            return None, 'Invalid cursor'
+        result_id, offset, limit = decoded
+        return {'result_id': result_id, 'offset': offset, 'limit': limit}, None
+    
+    offset = params.get('offset')
+    limit = params.get('limit')
+    if offset in (None, '') and limit in (None, ''):
+        return None, None
+    
+    try:
+        offset = int(offset) if offset not in (None, '') else 0
+        limit = int(limit) if limit not in (None, '') else None
+    except (TypeError, ValueError):
+        return None, 'offset and limit must be integers'
+    if offset < 0:
+        return None, 'offset must be >= 0'
+    if limit is not None and limit < 1:
+        return None, 'limit must be >= 1'
+    return {'result_id': None, 'offset': offset, 'limit': limit}, None
+
+def build_page_body(page, file_type, offset, limit, total_length, result_id=None):
+    """Build the JSON body for one page of content"""
+    end = offset + len(page)
+    has_more = end < total_length
+    return {
+        'success': True,
+        'content': page,
+        'file_type': file_type,
+        'content_length': len(page),
+        'total_length': total_length,
+        'offset': offset,
+        'limit': limit,
+        'has_more': has_more,
+        'next_cursor': encode_cursor(result_id, end, limit) if has_more and result_id else None
+    }
+
+def build_content_response(content, file_type, pagination=None, extra=None):
+    """
+    Build the success response, paginating the content when requested
+    
+    When more content remains after the requested page, the full result is
+    kept in the result store and a cursor for the next page is returned.
+    """
+    if pagination is None:
+        body = {
+            'success': True,
+            'content': content,
+            'file_type': file_type,
+            'content_length': len(content)
+        }
+    else:
+        offset, limit = pagination['offset'], pagination['limit']
+        page = content[offset:offset + limit] if limit else content[offset:]
+        result_id = None
+        if limit and offset + len(page) < len(content):
+            result_id = result_store.put(content, {'file_type': file_type})
+        body = build_page_body(page, file_type, offset, limit, len(content), result_id)
+    
+    if extra:
+        body.update(extra)
+    return render_content(body)
+
+def render_content(body, status=200):
+    """Render a success body as JSON, raw text or msgpack per the Accept header"""
+    mimetype = negotiate_format(request.accept_mimetypes)
+    with tracing.span('serialize', {'mimetype': mimetype}):
+        return make_negotiated_response(body, mimetype, status=status, json_provider=app.json)
+
+def stored_page_response(pagination):
+    """Serve a page of a previously stored result from a cursor"""
+    stored = result_store.get_slice(pagination['result_id'], pagination['offset'], pagination['limit'])
+    if stored is None:
+        return jsonify({'error': 'Cursor expired or not found'}), 410
+    
+    page, total_length, metadata = stored
+    return render_content(build_page_body(
+        page,
+        metadata.get('file_type'),
+        pagination['offset'],
+        pagination['limit'],
+        total_length,
+        pagination['result_id']
+    ))
+
+def pipelined_extraction_response(download, text_chunks, file_type, pagination=None, budget=None):
+    """
+    Collect text decoded during the download and build the response
+    
+    With a max_chars budget the download is closed as soon as it is spent.
+    A download that had to be resumed reports its attempts under "transfer".
+    Returns None when the CSV parser rejects the file (e.g. a field over
+    the csv module's size limit).
+    """
+    try:
+        with tracing.span('extract_while_downloading', {'file.type': file_type}):
+            content = ''.join(text_chunks)
+    except csv.Error:
+        # Left to the file-based fallback cascade, see extract()
+        return None
+    except Exception as e:
+        error = download_error_message(e)
+        remember_download_error(download.url, e, error)
+        logger.error(f"Pipelined extraction failed: {error}")
+        return jsonify({'error': error, 'file_type': file_type}), 400
+    finally:
+        download.close()
+    
+    if not content:
+        return jsonify({
+            'error': 'Failed to extract content: file is empty',
+            'file_type': file_type
+        }), 400
+    
+    logger.info(
+        "Successfully extracted %s file while downloading, length: %d", file_type, len(content),
+        extra={'event': 'extracted', 'file_type': file_type, 'chars': len(content), 'mode': 'pipelined'}
+    )
+    extra = budget.details() if budget else {}
+    if download.mode != 'download':
+        extra['transfer'] = download.transfer_info()
+    return build_content_response(content, file_type, pagination, extra or None)
+
+def stream_extraction_response(download, text_chunks, file_type):
+    """
+    Stream text to the client as it is decoded from the download
     
-    # Try all supported formats
-    for ext, extract_func in EXTRACTION_FUNCTIONS.items():
-        if file_extension and ext == file_extension:
-            continue  # Already tried
+    Time to first byte is roughly the latency of the first downloaded chunk;
+    errors part way through (e.g. exceeding MAX_FILE_SIZE) end the stream.
+    The download (and its host slot) is also closed when the response is,
+    for bodies that are never iterated such as HEAD requests or clients
+    that disconnect first.
+    """
+    def generate():
         try:
-            content, error = extract_func(file_path)
-            if content and not error:
-                logger.info(f"Detected file type as {ext} via content analysis")
-                return content, ext, None
+            yield from text_chunks
         except Exception as e:
-            logger.debug(f"Extraction with {ext} failed: {str(e)}")
-            continue
+            raise RuntimeError(download_error_message(e)) from e
+        finally:
+            download.close()
+    
+    response = make_streamed_response(
+        generate(),
+        {'file_type': file_type},
+        negotiate_format(request.accept_mimetypes),
+        json_provider=app.json
+    )
+    response.call_on_close(download.close)
+    return response
+
+def extraction_response(result, pagination=None):
+    """
+    Render an ExtractionResult
+    
+    The content is paginated like any other result; result.details (the
+    "sheets" of a workbook or the "members" of an archive) are added to
+    the body of both success and error responses.
+    """
+    if not result.success:
+        logger.error(f"Extraction failed: {result.error}")
+        body = {
+            'error': f'Failed to extract content: {result.error}',
+            'file_type': result.file_type
+        }
+        if result.content is None and result.file_type not in SUPPORTED_EXTENSIONS:
+            body['supported_types'] = SUPPORTED_EXTENSIONS
+        body.update(result.details)
+        return jsonify(body), 400
     
-    return None, file_extension, "Could not extract content with any supported method"
+    return build_content_response(result.content, result.file_type, pagination, result.details or None)
 
 @app.route('/extract', methods=['POST', 'GET'])
 @limiter.limit("30 per minute")
 @require_api_key
+@admission_controlled
 def extract():
     """Extract content from file URL"""
     file_path = None
     try:
-        # Get file URL from request
+        # Get file URL and options from request
         if request.method == 'POST':
             data = request.get_json() or {}
-            file_url = data.get('url') or request.form.get('url')
+            params = {**request.form.to_dict(), **data}
         else:
-            file_url = request.args.get('url')
+            params = request.args.to_dict()
+        file_url = params.get('url')
+        stream_mode = parse_bool(params.get('stream'))
+        
+        pagination, pagination_error = parse_pagination(params)
+        if pagination_error:
+            return jsonify({'error': pagination_error}), 400
+        if stream_mode and pagination:
+            return jsonify({'error': 'stream cannot be combined with offset, limit or cursor'}), 400
+        if pagination and pagination['result_id']:
+            return stored_page_response(pagination)
         
         if not file_url:
             logger.warning("Extraction request without URL")
@@ -448,40 +1046,119 @@ def extract():
             logger.warning(f"Invalid URL rejected: {file_url[:100]}")
             return jsonify({'error': f'Invalid URL: {error_msg}'}), 400
         
-        logger.info(f"Extraction request for URL: {file_url[:100]}...")
+        options, options_error = parse_extraction_options(params)
+        if options_error:
+            return jsonify({'error': options_error}), 400
+        pages = options.get('pages') if options else None
+        budget = CharBudget(options.get('max_chars') if options else None)
+        
+        fingerprint = options_fingerprint(options)
+        failure = negative_cache.get(('url', file_url), ('url', file_url, fingerprint))
+        if failure:
+            logger.info("Answering from the negative cache: %s", file_url[:100], extra={'event': 'negative_cache_hit'})
+            return cached_failure_response(failure)
+        
+        logger.info("Extraction request for URL: %s...", file_url[:100], extra={'event': 'extract_request'})
+        
+        # Page-limited PDFs can be read lazily with range requests
+        url_suffix = Path(urlparse(file_url).path).suffix.lower()
+        if pages and url_suffix in ('', '.pdf'):
+            content, transfer_info = extract_remote_pdf_pages(file_url, pages, budget)
+            if content is not None:
+                describe_input(file_type='.pdf')
+                return build_content_response(
+                    content, '.pdf', pagination, {'transfer': transfer_info, **budget.details()}
+                )
         
         # Download file
-        file_path, file_extension, error = download_file(file_url)
+        download, file_extension, error = open_download(file_url)
         if error:
             logger.error(f"Download failed: {error}")
             return jsonify({'error': error}), 400
+        # Text decoded while downloading is never hashed; its URL identifies it
+        describe_input(
+            file_type=file_extension,
+            url_sha256=hashlib.sha256(file_url.encode('utf-8')).hexdigest()
+        )
         
-        # Extract content
-        content, detected_ext, extract_error = try_extract_with_fallback(file_path, file_extension)
+        content_length = download.headers.get('Content-Length', '')
+        if content_length.isdigit():
+            rejection = reserve_request_bytes(int(content_length))
+            if rejection is not None:
+                download.close()
+                return rejection
         
-        if extract_error:
-            logger.error(f"Extraction failed: {extract_error}")
-            return jsonify({
-                'error': f'Failed to extract content: {extract_error}',
-                'file_type': detected_ext or file_extension
-            }), 400
+        chunks = None
+        if file_extension in STREAMABLE_EXTENSIONS:
+            # Text and CSV are decoded while the download is still arriving,
+            # unless the first bytes show a binary file behind the extension
+            chunks = iter_download_chunks(download)
+            try:
+                first_chunk = next(chunks, b'')
+            except Exception as e:
+                download.close()
+                error = download_error_message(e)
+                remember_download_error(file_url, e, error)
+                logger.error(f"Download failed: {error}")
+                return jsonify({'error': error}), 400
+            chunks = itertools.chain([first_chunk], chunks)
+            
+            if looks_like_text(first_chunk):
+                text_chunks = iter_stream_extraction(chunks, file_extension, budget)
+                if stream_mode:
+                    # Nothing is sent before the first text chunk, so a CSV
+                    # the parser rejects can still take the fallback path
+                    try:
+                        first_text = next(text_chunks, '')
+                    except csv.Error:
+                        download.close()
+                    except Exception as e:
+                        download.close()
+                        error = download_error_message(e)
+                        remember_download_error(file_url, e, error)
+                        logger.error(f"Download failed: {error}")
+                        return jsonify({'error': error}), 400
+                    else:
+                        text_chunks = itertools.chain([first_text], text_chunks)
+                        return stream_extraction_response(download, text_chunks, file_extension)
+                else:
+                    response = pipelined_extraction_response(download, text_chunks, file_extension, pagination, budget)
+                    if response is not None:
+                        return response
+                
+                # The bytes already read are gone: fetch the file again and
+                # extract it from disk, where the CSV falls back to plain text
+                logger.warning("Streaming CSV parse failed, extracting from a file: %s", file_url[:100])
+                download, file_extension, error = open_download(file_url)
+                if error:
+                    logger.error(f"Download failed: {error}")
+                    return jsonify({'error': error}), 400
+                chunks = None
         
-        if content is None:
-            logger.warning(f"Could not extract content from file: {file_extension}")
-            return jsonify({
-                'error': 'Unsupported file type or failed to extract content',
-                'file_type': detected_ext or file_extension,
-                'supported_types': SUPPORTED_EXTENSIONS
-            }), 400
+        file_path, error = save_download(download, file_extension, chunks)
+        if error:
+            logger.error(f"Download failed: {error}")
+            return jsonify({'error': error}), 400
         
-        logger.info(f"Successfully extracted {detected_ext or file_extension} file, length: {len(content)}")
-        return jsonify({
-            'success': True,
-            'content': content,
-            'file_type': detected_ext or file_extension,
-            'content_length': len(content)
-        }), 200
+        # The same unreadable file may come back under another (e.g. signed) URL
+        content_key = ('content', file_digest(file_path), file_extension, fingerprint)
+        describe_input(input_sha256=content_key[1])
+        failure = negative_cache.get(content_key)
+        if failure:
+            return cached_failure_response(failure)
+        
+        if file_extension in ARCHIVE_EXTENSIONS:
+            options = dict(options or {}, source_name=Path(urlparse(file_url).path).name)
+        result = extract_path(file_path, file_extension, options)
+        if not result.success:
+            remember_extraction_failure([('url', file_url, fingerprint), content_key], result)
+        if download.mode != 'download':
+            result.details['transfer'] = download.transfer_info()
+        return extraction_response(result, pagination)
             
+    except HostBusy as e:
+        # The origin is busy, not this instance
+        return capacity_exceeded_response(e, 429)
     except Exception as e:
         logger.error(f"Unexpected error in extract endpoint: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
@@ -496,15 +1173,25 @@ def extract():
 @app.route('/extract-base64', methods=['POST'])
 @limiter.limit("30 per minute")
 @require_api_key
+@admission_controlled
 def extract_base64():
     """Extract content from base64-encoded file data"""
-    file_path = None
     try:
         data = request.get_json() or {}
         base64_input = data.get('base64')
         filename = data.get('filename')
         content_type = data.get('contentType')
         
+        pagination, pagination_error = parse_pagination(data)
+        if pagination_error:
+            return jsonify({'error': pagination_error}), 400
+        if pagination and pagination['result_id']:
+            return stored_page_response(pagination)
+        
+        options, options_error = parse_extraction_options(data)
+        if options_error:
+            return jsonify({'error': options_error}), 400
+        
         if not base64_input or not isinstance(base64_input, str):
             logger.warning("Extraction request without valid base64 payload")
             return jsonify({
@@ -542,50 +1229,29 @@ def extract_base64():
             }), 400
         
         file_extension = resolve_file_extension(filename, content_type)
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension or '.tmp')
-        try:
-            temp_file.write(file_bytes)
-        finally:
-            temp_file.close()
-        
-        file_path = temp_file.name
         logger.info(
-            f"Base64 extraction request. filename={filename}, content_type={content_type}, "
-            f"bytes={len(file_bytes)}, extension={file_extension}"
+            "Base64 extraction request. filename=%s, content_type=%s, bytes=%d, extension=%s",
+            filename, content_type, len(file_bytes), file_extension,
+            extra={'event': 'extract_request', 'bytes': len(file_bytes), 'file_type': file_extension}
         )
         
-        content, detected_ext, extract_error = try_extract_with_fallback(file_path, file_extension)
-        
-        if extract_error:
-            logger.error(f"Base64 extraction failed: {extract_error}")
-            return jsonify({
-                'error': f'Failed to extract content: {extract_error}',
-                'file_type': detected_ext or file_extension
-            }), 400
-        
-        if content is None:
-            return jsonify({
-                'error': 'Unsupported file type or failed to extract content',
-                'file_type': detected_ext or file_extension,
-                'supported_types': SUPPORTED_EXTENSIONS
-            }), 400
+        content_key = ('content', hashlib.sha256(file_bytes).hexdigest(), file_extension, options_fingerprint(options))
+        describe_input(file_type=file_extension, input_sha256=content_key[1], bytes=len(file_bytes))
+        failure = negative_cache.get(content_key)
+        if failure:
+            return cached_failure_response(failure)
         
-        return jsonify({
-            'success': True,
-            'content': content,
-            'file_type': detected_ext or file_extension,
-            'content_length': len(content)
-        }), 200
+        if file_extension in ARCHIVE_EXTENSIONS:
+            options = dict(options or {}, source_name=filename)
+        # Text formats are decoded straight from the decoded payload
+        result = extraction.extract(memoryview(file_bytes), hint=file_extension, options=options)
+        if not result.success:
+            remember_extraction_failure([content_key], result)
+        return extraction_response(result, pagination)
     
     except Exception as e:
         logger.error(f"Unexpected error in extract-base64 endpoint: {str(e)}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
-    finally:
-        if file_path and os.path.exists(file_path):
-            try:
-                os.unlink(file_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file {file_path}: {str(e)}")
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -595,10 +1261,108 @@ def health():
         'pdf_support': PDF_AVAILABLE,
         'docx_support': DOCX_AVAILABLE,
         'doc_support': DOC_AVAILABLE,
+        'compression': available_encodings() if CONFIG['COMPRESSION_ENABLED'] else [],
+        'json_serializer': app.json.backend_name,
+        'dns_cache': dns_resolver.cache.stats(),
+        'negative_cache': negative_cache.stats(),
+        'logging': structured_logging.logging_stats(),
+        'tracing': tracing.tracing_stats(),
+        'memory': memory_governor.stats(),
+        'admission': admission.occupancy() if CONFIG['ADMISSION_ENABLED'] else None,
+        'response_formats': available_formats(),
         'max_file_size_mb': CONFIG['MAX_FILE_SIZE'] / (1024 * 1024),
-        'auth_required': bool(CONFIG.get('FILE_EXTRACTOR_KEY', ''))
+        'auth_required': auth_required()
+    }), 200
+
+@app.route('/ready', methods=['GET'])
+@limiter.exempt
+def ready():
+    """
+    Readiness probe for load balancers
+    
+    Returns 503 while every extraction slot or the whole byte budget of
+    the instance is taken, or more than READY_MAX_QUEUED requests wait for
+    admission. The shared state is read without locking, so probes stay
+    cheap and never queue behind extractions.
+    """
+    body = {
+        'status': 'ready',
+        'cache_hit_rate': {
+            'dns': dns_resolver.cache.stats()['hit_rate'],
+            'negative': negative_cache.stats()['hit_rate']
+        }
+    }
+    if not CONFIG['ADMISSION_ENABLED']:
+        # Without admission control there is no shared capacity to report
+        return jsonify(body), 200
+    
+    capacity = admission.capacity()
+    saturated = capacity['saturated'] or capacity['queued'] > CONFIG['READY_MAX_QUEUED']
+    body.update(
+        status='saturated' if saturated else 'ready',
+        workers={'busy': capacity['busy'], 'idle': capacity['idle']},
+        queued=capacity['queued'],
+        bytes_in_flight=capacity['bytes_in_flight'],
+        max_bytes=capacity['max_bytes'],
+        latency_ms_p95=capacity['service_ms_p95']
+    )
+    response = jsonify(body)
+    if saturated:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(admission.retry_after())
+    return response
+
+@app.route('/queues', methods=['GET'])
+@require_api_key
+def queues():
+    """
+    Per-key scheduler metrics
+    
+    Admin keys (and everyone, when authentication is disabled) see all
+    keys and the per-origin download budgets; other keys see only their
+    own queue.
+    """
+    metrics = admission.tenant_metrics()
+    tenant = g.tenant
+    if auth_required() and not tenant.admin:
+        metrics = {name: value for name, value in metrics.items() if name == tenant.name}
+    body = {
+        'keys': metrics,
+        'max_active': admission.max_active,
+        'batch_share': admission.scheduler.batch_share
+    }
+    if not auth_required() or tenant.admin:
+        body['hosts'] = host_limiter.metrics()
+    return jsonify(body), 200
+
+@app.route('/profiles', methods=['GET'])
+@require_api_key
+def profiles():
+    """List stored request profiles, newest first - admin keys only"""
+    if auth_required() and not g.tenant.admin:
+        return jsonify({'error': 'Profiles are available to admin keys only'}), 403
+    return jsonify({
+        'profiles': request_profiler.store.list(),
+        'sample_rate': request_profiler.sample_rate,
+        'slow_threshold': request_profiler.slow_threshold
     }), 200
 
+@app.route('/profiles/<profile_id>', methods=['GET'])
+@require_api_key
+def profile_download(profile_id):
+    """Download a stored profile: pstats data or collapsed stacks - admin keys only"""
+    if auth_required() and not g.tenant.admin:
+        return jsonify({'error': 'Profiles are available to admin keys only'}), 403
+    stored = request_profiler.store.get(profile_id)
+    if stored is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    metadata, data = stored
+    suffix, mimetype = PROFILE_FORMATS[metadata['format']]
+    response = make_response(data)
+    response.mimetype = mimetype
+    response.headers['Content-Disposition'] = f'attachment; filename="{profile_id}{suffix}"'
+    return response
+
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint with API information"""
@@ -607,7 +1371,10 @@ def index():
         'endpoints': {
             '/extract': 'Extract content from file URL (GET or POST with url parameter) - Requires API key',
             '/extract-base64': 'Extract content from base64 file payload (POST with base64, optional filename/contentType) - Requires API key',
-            '/health': 'Health check endpoint'
+            '/health': 'Health check endpoint',
+            '/ready': 'Readiness probe: 503 while the instance has no free extraction capacity',
+            '/queues': 'Per-key queue depth and latency metrics - Requires API key',
+            '/profiles': 'Profiles of sampled and slow extractions - Requires an admin API key'
         },
         'supported_formats': SUPPORTED_EXTENSIONS,
         'max_file_size_mb': CONFIG['MAX_FILE_SIZE'] / (1024 * 1024),
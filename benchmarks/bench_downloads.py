@@ -0,0 +1,111 @@
+"""
+Download benchmark: single stream vs segmented Range requests
+
+Serves a random file from a local origin that throttles every connection
+and delays its first byte, like a high-latency object store, then times
+the single-stream loop (8KB and 64KB chunks) against segmented downloads
+into a preallocated file.
+
+Usage:
+    python benchmarks/bench_downloads.py [--size-mb 32] [--rate-mb 4] [--latency-ms 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_range import ResumableDownload  # noqa: E402
+
+
+def make_handler(data, rate, latency):
+    class ThrottledOrigin(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            start, end = 0, len(data) - 1
+            range_header = self.headers.get('Range')
+            if range_header:
+                first, last = range_header.split('=', 1)[1].split('-')
+                start, end = int(first), int(last) if last else end
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+            else:
+                self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', '"bench"')
+            self.send_header('Content-Length', str(end + 1 - start))
+            self.end_headers()
+
+            time.sleep(latency)
+            block = 64 * 1024
+            began = time.perf_counter()
+            try:
+                for offset in range(start, end + 1, block):
+                    self.wfile.write(data[offset:min(offset + block, end + 1)])
+                    # Hold each connection to `rate` bytes per second
+                    ahead = (offset + block - start) / rate - (time.perf_counter() - began)
+                    if ahead > 0:
+                        time.sleep(ahead)
+            except (BrokenPipeError, ConnectionResetError):
+                # Segmented downloads close the first response at the end of its segment
+                self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    return ThrottledOrigin
+
+
+def single_stream(url, chunk_size):
+    response = requests.get(url, stream=True, timeout=60)
+    with tempfile.TemporaryFile() as file:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            file.write(chunk)
+        return file.tell()
+
+
+def segmented(url, segments, chunk_size):
+    download = ResumableDownload(requests.get(url, stream=True, timeout=60), url, timeout=60)
+    with tempfile.TemporaryFile() as file:
+        return download.write_segments(file.fileno(), segments, chunk_size)
+
+
+def measure(name, run, size):
+    start = time.perf_counter()
+    written = run()
+    elapsed = time.perf_counter() - start
+    assert written == size, f'{name} wrote {written} of {size} bytes'
+    print(f'{name:<16} time={elapsed:6.2f}s throughput={size / 1e6 / elapsed:7.1f}MB/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=32)
+    parser.add_argument('--rate-mb', type=float, default=4, help='Per-connection throughput of the origin')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Delay before the first byte')
+    parser.add_argument('--segments', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(data, args.rate_mb * 1e6, args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/file.bin'
+
+    try:
+        measure('single 8KB', lambda: single_stream(url, 8192), len(data))
+        measure('single 64KB', lambda: single_stream(url, 64 * 1024), len(data))
+        for segments in args.segments:
+            measure(f'segmented x{segments}', lambda: segmented(url, segments, 64 * 1024), len(data))
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Memory benchmark: buffered reads vs memory-mapped PDF and text extraction
+
+Builds large text files and PDFs, then starts --workers processes at
+once, each extracting one file the way a sync gunicorn worker handles one
+request, first with MMAP_IO disabled and then enabled. Reports the peak
+RSS (VmHWM) growth of the workers and, from a second traced run, their
+peak Python heap. Mapped pages count towards RSS but are clean page
+cache that the kernel can drop under memory pressure; heap copies are
+not. Linux only (reads /proc/self/status).
+
+Usage:
+    python benchmarks/bench_mmap.py [--size-mb 50] [--workers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LINE = 'Shipment 0042 left the warehouse on time and arrived in good condition\n'
+
+
+def peak_rss():
+    """VmHWM of this process in bytes"""
+    with open('/proc/self/status') as status:
+        fields = dict(line.split(':', 1) for line in status)
+    return int(fields['VmHWM'].split()[0]) * 1024
+
+
+def build_files(directory, kind, size, count):
+    from test_http_range import build_pdf
+
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f'{kind}-{index}.{kind}')
+        with open(path, 'wb') as file:
+            if kind == 'txt':
+                file.write(LINE.encode() * (size // len(LINE)))
+            else:
+                # Large content streams with a line of text each, like scanned reports
+                pages = max(1, size // (256 * 1024))
+                file.write(build_pdf([f'page {page}' for page in range(pages)], padding=256 * 1024))
+        paths.append(path)
+    return paths
+
+
+def child(mmap_io, path):
+    """Extract one file and print timing, peak RSS growth and peak heap as JSON"""
+    import extraction
+
+    extraction.SETTINGS['MMAP_IO'] = mmap_io
+    baseline = peak_rss()
+    start = time.perf_counter()
+    result = extraction.extract_path(path, os.path.splitext(path)[1])
+    elapsed = time.perf_counter() - start
+    assert result.success, result.error
+    rss = peak_rss() - baseline
+    text = len(result.content)
+    del result
+
+    # Heap is measured in a second run; tracing slows parsing down
+    tracemalloc.start()
+    extraction.extract_path(path, os.path.splitext(path)[1])
+    _, heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({'seconds': elapsed, 'text': text, 'peak_rss': rss, 'peak_heap': heap}))
+
+
+def run(mmap_io, paths):
+    """Extract every path in its own process, all at once"""
+    workers = [
+        subprocess.Popen([sys.executable, __file__, '--child', 'mmap' if mmap_io else 'read', path],
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=ROOT)
+        for path in paths
+    ]
+    results = []
+    for worker in workers:
+        output, _ = worker.communicate()
+        assert worker.returncode == 0, f'worker exited with {worker.returncode}'
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=50, help='Size of each file')
+    parser.add_argument('--workers', type=int, default=4, help='Files extracted at once')
+    parser.add_argument('--kinds', nargs='+', default=['txt', 'pdf'], choices=['txt', 'pdf'])
+    parser.add_argument('--child', choices=['read', 'mmap'], help=argparse.SUPPRESS)
+    parser.add_argument('path', nargs='?', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child == 'mmap', args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        for kind in args.kinds:
+            paths = build_files(directory, kind, int(args.size_mb * 1024 * 1024), args.workers)
+            for name, mmap_io in (('read', False), ('mmap', True)):
+                results = run(mmap_io, paths)
+                print(
+                    f'{kind} {name:<5} workers={args.workers} file={args.size_mb:5.0f}MB '
+                    f'time={max(result["seconds"] for result in results):6.2f}s '
+                    f'text={results[0]["text"] / 1e6:6.1f}MB '
+                    f'peak_rss=+{sum(result["peak_rss"] for result in results) / 1e6:7.1f}MB '
+                    f'peak_heap={sum(result["peak_heap"] for result in results) / 1e6:7.1f}MB'
+                )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput benchmark for the zip/XML streaming extractors
+
+Builds large synthetic PPTX, ODP, ODT, XLSX and ODS files and reports
+extraction time, throughput over the uncompressed XML and peak Python
+heap usage. Decks include a large media part to show it is never read.
+
+Usage:
+    python benchmarks/bench_office.py [--slides 2000] [--rows 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import extract_odp, extract_ods, extract_odt, extract_pptx, extract_xlsx  # noqa: E402
+from test_office import build_odf, build_pptx, odp_page, ods_table  # noqa: E402
+from test_xlsx import build_xlsx, sheet_xml  # noqa: E402
+
+PARAGRAPH = 'Quarterly revenue grew across every region while costs stayed flat'
+
+
+def xml_size(path):
+    """Uncompressed size of the XML parts of a package"""
+    with zipfile.ZipFile(path) as archive:
+        return sum(info.file_size for info in archive.infolist() if info.filename.endswith('.xml'))
+
+
+def measure(name, extract, data, suffix):
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(data)
+        path = f.name
+    try:
+        size = xml_size(path)
+        start = time.perf_counter()
+        content, error = extract(path)
+        elapsed = time.perf_counter() - start
+
+        # Memory is measured in a second run; tracing slows parsing down
+        tracemalloc.start()
+        extract(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        os.unlink(path)
+
+    if error:
+        print(f'{name:<6} failed: {error}')
+        return
+    print(
+        f'{name:<6} file={len(data) / 1e6:7.1f}MB xml={size / 1e6:7.1f}MB '
+        f'time={elapsed:6.2f}s throughput={size / 1e6 / elapsed:6.1f}MB/s '
+        f'text={len(content) / 1e6:6.1f}MB peak_heap={peak / 1e6:6.1f}MB'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--slides', type=int, default=2000)
+    parser.add_argument('--paragraphs', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--media-mb', type=int, default=50)
+    args = parser.parse_args()
+
+    paragraphs = [f'{PARAGRAPH} ({i})' for i in range(args.paragraphs)]
+    deck = [(paragraphs, ['Speaker notes for this slide']) for _ in range(args.slides)]
+    measure('pptx', extract_pptx, build_pptx(deck, media_size=args.media_mb * 1024 * 1024), '.pptx')
+
+    pages = ''.join(odp_page(paragraphs, 'Speaker notes for this slide') for _ in range(args.slides))
+    measure('odp', extract_odp, build_odf(f'<office:presentation>{pages}</office:presentation>',
+                                          'application/vnd.oasis.opendocument.presentation'), '.odp')
+
+    text = ''.join(f'<text:p>{PARAGRAPH} {i}</text:p>' for i in range(args.slides * args.paragraphs))
+    measure('odt', extract_odt, build_odf(f'<office:text>{text}</office:text>',
+                                          'application/vnd.oasis.opendocument.text'), '.odt')
+
+    rows = [[('A1', None, i), ('B1', 'inlineStr', PARAGRAPH), ('C1', None, i * 2)] for i in range(args.rows)]
+    measure('xlsx', extract_xlsx, build_xlsx({'Data': sheet_xml(rows)}), '.xlsx')
+
+    table = ods_table('Data', [[str(i), PARAGRAPH, str(i * 2)] for i in range(args.rows)])
+    measure('ods', extract_ods, build_odf(f'<office:spreadsheet>{table}</office:spreadsheet>',
+                                          'application/vnd.oasis.opendocument.spreadsheet'), '.ods')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,451 @@
+"""
+Bulk extraction of local files from the command line
+
+Extracts directories of files (or the files listed in a manifest) across
+a process pool with the extraction library behind the API, without HTTP,
+base64 or the web stack in between.
+
+Usage:
+    python -m bulk_extract docs/ reports/ --output results.jsonl
+    python -m bulk_extract --manifest files.txt --output-dir texts/ --workers 8
+
+Results are written as one JSON object per line, or as one .txt file per
+input under --output-dir. Every successful extraction is recorded in a
+checkpoint file; rerunning the same command skips files that are already
+done and have not changed since (by size and mtime, or by content hash
+with --compare hash), so an interrupted backfill resumes where it stopped.
+Failed files are retried on the next run.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+from extraction import ARCHIVE_EXTENSIONS, SUPPORTED_EXTENSIONS, ExtractionResult, extract_path, parse_extraction_options
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = '.checkpoint.jsonl'
+
+
+class BulkTask:
+    """A file to extract, with what the checkpoint knows about it"""
+
+    def __init__(self, path, name, size, mtime_ns, previous=None):
+        self.path = path
+        self.name = name
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.previous = previous
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _safe_name(path):
+    """Relative output name for a path, without anchors or '..' parts"""
+    parts = [part for part in Path(path).parts if part not in ('..', '.') and part != Path(path).anchor]
+    return str(Path(*parts)) if parts else Path(path).name
+
+
+def iter_directory(root, all_files=False):
+    """
+    Walk a directory in sorted order
+
+    Yields:
+        tuple: (path, output name); only supported extensions unless all_files
+    """
+    base = Path(root)
+    prefix = base.resolve().name
+    for directory, subdirectories, files in os.walk(base):
+        subdirectories.sort()
+        for filename in sorted(files):
+            if not all_files and Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            path = os.path.join(directory, filename)
+            yield path, os.path.join(prefix, os.path.relpath(path, base))
+
+
+def iter_manifest(manifest_path):
+    """
+    Read a manifest of one path per line
+
+    Blank lines and lines starting with '#' are ignored. Relative paths are
+    taken relative to the manifest's directory.
+
+    Yields:
+        tuple: (path, output name)
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, 'r', encoding='utf-8') as manifest:
+        for line in manifest:
+            entry = line.strip()
+            if not entry or entry.startswith('#'):
+                continue
+            yield os.path.join(base, entry), _safe_name(entry)
+
+
+def _unique_name(name, used):
+    """name, or name with a -2, -3, ... suffix before its extension if already used"""
+    candidate = name
+    number = 1
+    while candidate in used:
+        number += 1
+        path = Path(name)
+        candidate = str(path.with_name(f'{path.stem}-{number}{path.suffix}'))
+    used.add(candidate)
+    return candidate
+
+
+def _iter_named_inputs(inputs, manifest, all_files):
+    for item in inputs:
+        if os.path.isdir(item):
+            yield from iter_directory(item, all_files)
+        else:
+            yield item, Path(item).name
+    if manifest:
+        yield from iter_manifest(manifest)
+
+
+def iter_inputs(inputs, manifest=None, all_files=False):
+    """
+    All (path, output name) pairs from directory/file arguments and a manifest
+
+    A path given twice is yielded once. Output names are unique, so
+    a/report.pdf and b/report.pdf do not overwrite each other's outputs;
+    the later one is named report-2.pdf. Names follow the input order, so
+    they are stable across resumed runs.
+    """
+    seen = set()
+    used = set()
+    for path, name in _iter_named_inputs(inputs, manifest, all_files):
+        real = os.path.realpath(path)
+        if real in seen:
+            continue
+        seen.add(real)
+        yield path, _unique_name(name, used)
+
+
+def load_checkpoint(path):
+    """
+    Read a checkpoint file
+
+    Returns:
+        dict: absolute path -> last recorded fingerprint
+    """
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as checkpoint:
+        for line in checkpoint:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from an interrupted run
+                continue
+            done[record['path']] = record
+    return done
+
+
+def is_unchanged(previous, size, mtime_ns, sha256=None):
+    """Whether a file still matches its checkpoint record"""
+    if previous is None or previous.get('size') != size:
+        return False
+    if sha256 is not None:
+        return previous.get('sha256') == sha256
+    return previous.get('mtime_ns') == mtime_ns
+
+
+def extract_file(task, options=None, compare='mtime'):
+    """
+    Extract one file (runs in a pool worker)
+
+    Returns:
+        dict: Result record; 'skipped' is True if the content hash matched
+    """
+    start = time.perf_counter()
+    record = {
+        'path': task.path,
+        'name': task.name,
+        'size': task.size,
+        'mtime_ns': task.mtime_ns,
+    }
+    try:
+        if compare == 'hash':
+            record['sha256'] = file_sha256(task.path)
+            if is_unchanged(task.previous, task.size, task.mtime_ns, record['sha256']):
+                record['skipped'] = True
+                return record
+
+        extension = Path(task.path).suffix.lower() or None
+        file_options = options
+        if extension in ARCHIVE_EXTENSIONS:
+            file_options = {**(options or {}), 'source_name': os.path.basename(task.path)}
+        result = extract_path(task.path, extension, file_options)
+    except Exception as e:
+        result = ExtractionResult(error=str(e))
+
+    record.update(
+        skipped=False,
+        success=result.success,
+        file_type=result.file_type,
+        content=result.content,
+        error=result.error,
+        seconds=round(time.perf_counter() - start, 4),
+        **result.details,
+    )
+    return record
+
+
+def _extract_file_job(job):
+    task, options, compare = job
+    return extract_file(task, options, compare)
+
+
+class Progress:
+    """Periodic progress and throughput lines on stderr"""
+
+    def __init__(self, total, interval=2.0, stream=None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.started = time.monotonic()
+        self.last_report = self.started
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def update(self, record):
+        self.done += 1
+        if record.get('skipped'):
+            self.skipped += 1
+        else:
+            self.bytes += record['size']
+            if not record['success']:
+                self.failed += 1
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        extracted = self.done - self.skipped
+        line = (
+            f"{self.done}/{self.total} files ({self.skipped} unchanged, {self.failed} failed) "
+            f"in {elapsed:.1f}s: {extracted / elapsed:.1f} files/s, "
+            f"{self.bytes / elapsed / (1024 * 1024):.1f} MB/s"
+        )
+        if 0 < self.done < self.total and extracted:
+            line += f", ETA {(self.total - self.done) * elapsed / extracted:.0f}s"
+        return line
+
+    def report(self):
+        print(self.summary(), file=self.stream, flush=True)
+
+
+class OutputWriter:
+    """Writes result records as JSONL (file or stdout) or per-file .txt outputs"""
+
+    def __init__(self, output=None, output_dir=None, append=False):
+        self.output_dir = output_dir
+        self.stream = None
+        self._owns_stream = False
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        elif output and output != '-':
+            self.stream = open(output, 'a' if append else 'w', encoding='utf-8')
+            self._owns_stream = True
+        else:
+            self.stream = sys.stdout
+
+    def write(self, record):
+        if self.output_dir:
+            if record['success']:
+                target = os.path.join(self.output_dir, _safe_name(record['name']) + '.txt')
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'w', encoding='utf-8') as file:
+                    file.write(record['content'])
+            return
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self._owns_stream:
+            self.stream.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m bulk_extract',
+        description='Extract text from local files in bulk across a process pool.'
+    )
+    parser.add_argument('inputs', nargs='*', help='Files or directories to extract')
+    parser.add_argument('--manifest', help='File listing one input path per line')
+    parser.add_argument('--all-files', action='store_true',
+                        help='Include files without a supported extension when walking directories')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--output', '-o', help='JSONL output file (default: stdout)')
+    target.add_argument('--output-dir', help='Write one <name>.txt per extracted file into this directory')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint file (default: <output>.checkpoint.jsonl or <output-dir>/.checkpoint.jsonl)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore and overwrite an existing checkpoint')
+    parser.add_argument('--compare', choices=('mtime', 'hash'), default='mtime',
+                        help='How to detect unchanged files: size and mtime, or SHA-256 of the content')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--pages', help='Page/slide selection such as "1-3,7"')
+    parser.add_argument('--sheets', help='Comma-separated sheet names or numbers')
+    parser.add_argument('--max-rows', help='Rows to extract per sheet')
+    parser.add_argument('--max-chars', help='Stop extracting each file after this many characters')
+    parser.add_argument('--progress-interval', type=float, default=2.0, help='Seconds between progress lines')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log every extraction')
+    return parser
+
+
+def default_checkpoint(args):
+    if args.checkpoint:
+        return args.checkpoint
+    if args.output_dir:
+        return os.path.join(args.output_dir, CHECKPOINT_NAME)
+    if args.output and args.output != '-':
+        return args.output + '.checkpoint.jsonl'
+    return None
+
+
+def plan_tasks(pairs, done, compare):
+    """
+    Stat the inputs and drop those the checkpoint shows are unchanged
+
+    Returns:
+        tuple: (tasks, number skipped, list of (path, error) for unreadable inputs)
+    """
+    tasks = []
+    skipped = 0
+    missing = []
+    seen = set()
+    for path, name in pairs:
+        key = os.path.abspath(path)
+        if key in seen:
+            continue
+        seen.add(key)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            missing.append((path, str(e)))
+            continue
+        previous = done.get(key)
+        # With --compare hash the worker decides after hashing the content
+        if compare == 'mtime' and is_unchanged(previous, stat.st_size, stat.st_mtime_ns):
+            skipped += 1
+            continue
+        tasks.append(BulkTask(path, name, stat.st_size, stat.st_mtime_ns, previous))
+    return tasks, skipped, missing
+
+
+def setup_logging(verbose):
+    """Log to stderr for command-line runs; per-file INFO lines only with --verbose"""
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(logging.INFO if verbose else logging.WARNING)
+
+
+def run(args):
+    options, error = parse_extraction_options(
+        {'pages': args.pages, 'sheets': args.sheets, 'max_rows': args.max_rows, 'max_chars': args.max_chars}
+    )
+    if error:
+        raise SystemExit(f'bulk_extract: {error}')
+
+    checkpoint_path = default_checkpoint(args)
+    done = {} if args.fresh else load_checkpoint(checkpoint_path)
+    pairs = iter_inputs(args.inputs, args.manifest, args.all_files)
+    tasks, skipped, missing = plan_tasks(pairs, done, args.compare)
+    for path, reason in missing:
+        print(f'bulk_extract: cannot read {path}: {reason}', file=sys.stderr)
+
+    progress = Progress(len(tasks) + skipped, args.progress_interval)
+    progress.done = progress.skipped = skipped
+    writer = OutputWriter(args.output, args.output_dir, append=bool(done))
+    checkpoint = None
+    if checkpoint_path:
+        os.makedirs(os.path.dirname(os.path.abspath(checkpoint_path)), exist_ok=True)
+        checkpoint = open(checkpoint_path, 'w' if args.fresh else 'a', encoding='utf-8')
+
+    jobs = ((task, options, args.compare) for task in tasks)
+    workers = max(1, min(args.workers, len(tasks) or 1))
+    pool = None
+    try:
+        if workers == 1:
+            results = map(_extract_file_job, jobs)
+        else:
+            pool = multiprocessing.Pool(workers)
+            chunksize = max(1, min(16, len(tasks) // (workers * 8)))
+            results = pool.imap_unordered(_extract_file_job, jobs, chunksize)
+
+        for record in results:
+            progress.update(record)
+            if record.pop('skipped'):
+                continue
+            # Output before checkpoint: a crash in between repeats a record
+            # on resume instead of losing it
+            writer.write(record)
+            if checkpoint and record['success']:
+                checkpoint.write(json.dumps({
+                    'path': os.path.abspath(record['path']),
+                    'size': record['size'],
+                    'mtime_ns': record['mtime_ns'],
+                    'sha256': record.get('sha256'),
+                    'file_type': record['file_type'],
+                }) + '\n')
+                checkpoint.flush()
+            if not record['success']:
+                logger.warning(f"Failed to extract {record['path']}: {record['error']}")
+    except KeyboardInterrupt:
+        if pool:
+            pool.terminate()
+        progress.report()
+        print('bulk_extract: interrupted; rerun the same command to resume', file=sys.stderr)
+        return 130
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        writer.close()
+        if checkpoint:
+            checkpoint.close()
+
+    progress.report()
+    return 1 if progress.failed or missing else 0
+
+
+def main(argv=None, configure_logging=False):
+    """
+    Command-line entry point
+
+    Global logging is only set up with configure_logging, so that callers
+    embedding the tool keep their own configuration.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.inputs and not args.manifest:
+        parser.error('give at least one file or directory, or --manifest')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if configure_logging:
+        setup_logging(args.verbose)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(configure_logging=True))
@@ -0,0 +1,119 @@
+"""
+Small in-process caches shared by the server components
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry TTL.
+
+    Expired entries are dropped lazily on access; the least recently used
+    entry is evicted when the cache is full. Hit and miss counters are kept
+    so the hit rate can be reported.
+    """
+
+    def __init__(self, max_entries=1024, default_ttl=60, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        return self.get_first((key,), default)
+
+    def get_first(self, keys, default=None):
+        """
+        Return the value of the first of keys that is cached
+
+        One lookup for the hit/miss counters, however many keys are tried.
+        """
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                expires_at, value = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds (default_ttl when None)"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        """Remove key and return its value (expired or not)"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return entry count and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class NegativeCache:
+    """
+    Short-lived memory of requests that failed, to answer repeats at once.
+
+    Permanent failures (404, files over the size limit, content no
+    extractor can read) are kept for ttl seconds; transient ones
+    (timeouts, connection errors, 5xx, 429) only for transient_ttl, so a
+    recovering origin is retried soon. A ttl of 0 disables that kind.
+    """
+
+    def __init__(self, max_entries=4096, ttl=300, transient_ttl=15, clock=time.monotonic):
+        self.ttl = ttl
+        self.transient_ttl = transient_ttl
+        self._cache = TTLCache(max_entries=max_entries, default_ttl=ttl, clock=clock)
+
+    def add(self, key, error, transient=False, **details):
+        """Remember that key failed with error; details are returned with it"""
+        ttl = self.transient_ttl if transient else self.ttl
+        if ttl > 0:
+            self._cache.set(key, {'error': error, 'transient': transient, **details}, ttl)
+
+    def get(self, *keys):
+        """The remembered failure of the first of keys that has one, as a dict, or None"""
+        return self._cache.get_first(keys)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        """Entry count, hit/miss counters and the configured TTLs"""
+        return {**self._cache.stats(), 'ttl': self.ttl, 'transient_ttl': self.transient_ttl}
@@ -0,0 +1,252 @@
+"""
+HTTP response compression with Accept-Encoding negotiation
+"""
+import logging
+import zlib
+
+logger = logging.getLogger(__name__)
+
+# Brotli compression (optional)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Zstandard compression (optional)
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Server preference when the client accepts several encodings equally
+ENCODING_PREFERENCE = ['zstd', 'br', 'gzip', 'deflate']
+
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'deflate': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+COMPRESSIBLE_MIMETYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/msgpack',
+    'application/javascript',
+    'application/xml',
+)
+
+
+def available_encodings():
+    """Return the encodings supported by the installed libraries, in preference order"""
+    encodings = []
+    for encoding in ENCODING_PREFERENCE:
+        if encoding == 'br' and not BROTLI_AVAILABLE:
+            continue
+        if encoding == 'zstd' and not ZSTD_AVAILABLE:
+            continue
+        encodings.append(encoding)
+    return encodings
+
+
+def parse_accept_encoding(header):
+    """
+    Parse an Accept-Encoding header into a {coding: qvalue} mapping.
+
+    Args:
+        header: Raw Accept-Encoding header value
+
+    Returns:
+        dict: Lowercase codings mapped to their q-values
+    """
+    accepted = {}
+    if not header:
+        return accepted
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header, encodings=None):
+    """
+    Choose the best response encoding for an Accept-Encoding header.
+
+    Args:
+        header: Raw Accept-Encoding header value
+        encodings: Candidate encodings in server preference order
+            (defaults to available_encodings())
+
+    Returns:
+        str | None: Selected encoding, or None for identity
+    """
+    accepted = parse_accept_encoding(header)
+    if not accepted:
+        return None
+    if encodings is None:
+        encodings = available_encodings()
+
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class _ZlibCompressor:
+    def __init__(self, level, wbits):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def sync(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+    def sync(self):
+        return self._compressor.flush()
+
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def sync(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+def make_compressor(encoding, level=None):
+    """
+    Create a streaming compressor exposing compress(data), sync() and flush().
+
+    Args:
+        encoding: One of "gzip", "deflate", "br", "zstd"
+        level: Compression level (defaults to DEFAULT_LEVELS)
+
+    Returns:
+        Compressor object
+    """
+    if level is None:
+        level = DEFAULT_LEVELS[encoding]
+    if encoding == 'gzip':
+        return _ZlibCompressor(level, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _ZlibCompressor(level, zlib.MAX_WBITS)
+    if encoding == 'br' and BROTLI_AVAILABLE:
+        return _BrotliCompressor(level)
+    if encoding == 'zstd' and ZSTD_AVAILABLE:
+        return _ZstdCompressor(level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def compress_bytes(data, encoding, level=None):
+    """Compress a complete payload with the given encoding"""
+    compressor = make_compressor(encoding, level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_iter(chunks, encoding, level=None):
+    """
+    Compress an iterable of chunks, yielding compressed output as it is produced.
+
+    Each input chunk is flushed through so streamed responses keep
+    delivering data to the client incrementally.
+    """
+    compressor = make_compressor(encoding, level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if not chunk:
+            continue
+        compressed = compressor.compress(chunk) + compressor.sync()
+        if compressed:
+            yield compressed
+    tail = compressor.flush()
+    if tail:
+        yield tail
+
+
+def is_compressible(mimetype):
+    """Return True for text-like payloads worth compressing"""
+    if not mimetype:
+        return False
+    return mimetype.lower().startswith(COMPRESSIBLE_MIMETYPES)
+
+
+def compress_response(response, accept_encoding, min_size=1024, levels=None):
+    """
+    Compress a Flask/Werkzeug response in place when the client accepts it.
+
+    Buffered responses below min_size are left alone; streamed responses
+    are wrapped with a streaming compressor since their size is unknown.
+
+    Args:
+        response: Response object to modify
+        accept_encoding: Raw Accept-Encoding header of the request
+        min_size: Minimum body size in bytes for buffered responses
+        levels: Optional {encoding: level} overrides
+
+    Returns:
+        Response object
+    """
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if 'Content-Encoding' in response.headers:
+        return response
+    if not is_compressible(response.mimetype):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(accept_encoding)
+    if not encoding:
+        return response
+    level = (levels or {}).get(encoding)
+
+    if response.is_streamed or response.direct_passthrough:
+        response.direct_passthrough = False
+        response.response = compress_iter(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+        response.set_data(compress_bytes(body, encoding, level))
+
+    response.headers['Content-Encoding'] = encoding
+    return response
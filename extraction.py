@@ -0,0 +1,1471 @@
+"""
+Core extraction library
+
+Text extraction for every supported format, without the web stack: no
+Flask, limiter or .env loading happens on import, so workers and scripts
+can extract in-process. The API in app.py is an adapter over this module.
+
+    from extraction import extract
+
+    result = extract('report.pdf')
+    result = extract(memoryview(data), hint='application/pdf', options={'pages': [0]})
+    if result.success:
+        print(result.file_type, len(result.content))
+"""
+import bisect
+import codecs
+import csv
+import gzip
+import io
+import itertools
+import logging
+import mmap
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import tracing
+from html_text import HTMLTextExtractor, iter_html_text
+from office_xml import XLSXReader, ODSReader, PPTXReader, iter_odt_paragraphs, iter_odp_slides
+
+logger = logging.getLogger(__name__)
+
+def get_settings():
+    """Extraction limits from environment variables"""
+    return {
+        'MAX_PAGE_SELECTION': int(os.environ.get('MAX_PAGE_SELECTION', 1000)),
+        'ARCHIVE_MAX_MEMBERS': int(os.environ.get('ARCHIVE_MAX_MEMBERS', 100)),
+        'ARCHIVE_MAX_TOTAL_SIZE': int(os.environ.get('ARCHIVE_MAX_TOTAL_SIZE', 200 * 1024 * 1024)),  # 200MB uncompressed
+        'ARCHIVE_MAX_RATIO': int(os.environ.get('ARCHIVE_MAX_RATIO', 100)),  # uncompressed / compressed
+        'ARCHIVE_WORKERS': int(os.environ.get('ARCHIVE_WORKERS', 4)),
+        'MMAP_IO': os.environ.get('MMAP_IO', 'true').lower() == 'true',  # PDF and text read via mmap
+    }
+
+SETTINGS = get_settings()
+
+def configure(settings):
+    """
+    Use another settings mapping for the extraction limits
+    
+    The API passes its CONFIG so that the limits follow changes made to it.
+    
+    Args:
+        settings: Mapping with at least the keys of get_settings()
+    """
+    global SETTINGS
+    SETTINGS = settings
+
+# PDF extraction
+try:
+    import pypdf
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    logger.warning("pypdf not available. PDF extraction disabled.")
+
+# DOCX extraction
+try:
+    from docx import Document
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+    logger.warning("python-docx not available. DOCX extraction disabled.")
+
+# DOC extraction (old format)
+try:
+    import docx2python
+    DOC_AVAILABLE = True
+except ImportError:
+    DOC_AVAILABLE = False
+    logger.warning("docx2python not available. DOC extraction disabled.")
+
+# Supported file types mapping
+SUPPORTED_EXTENSIONS = [
+    '.pdf', '.doc', '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp',
+    '.csv', '.txt', '.html', '.htm', '.md',
+    '.zip', '.gz', '.tgz', '.tar'
+]
+
+# Web pages, converted to readable text
+HTML_EXTENSIONS = ('.html', '.htm')
+
+# Container formats whose members are extracted individually
+ARCHIVE_EXTENSIONS = ('.zip', '.gz', '.tgz', '.tar')
+
+def parse_bool(value):
+    """Interpret a request flag such as "true", "1" or a JSON boolean"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+def parse_page_selection(spec):
+    """
+    Parse a page selection such as "1-3,7" into zero-based page indices
+    
+    Args:
+        spec: String ("1-3,7"), int or list of ints/strings, 1-based
+        
+    Returns:
+        tuple: (sorted list of zero-based indices or None, error_message)
+    """
+    if spec is None or spec == '':
+        return None, None
+    
+    if isinstance(spec, int) and not isinstance(spec, bool):
+        parts = [str(spec)]
+    elif isinstance(spec, str):
+        parts = spec.split(',')
+    elif isinstance(spec, list):
+        parts = [str(item) for item in spec]
+    else:
+        return None, "pages must be a string like \"1-3,7\" or a list of page numbers"
+    
+    pages = set()
+    for part in parts:
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                first, last = (int(bound) for bound in part.split('-', 1))
+            else:
+                first = last = int(part)
+        except ValueError:
+            return None, f"Invalid page selection: {part}"
+        if first < 1 or last < first:
+            return None, f"Invalid page range: {part}"
+        if last - first + 1 + len(pages) > SETTINGS['MAX_PAGE_SELECTION']:
+            return None, f"Too many pages selected (max {SETTINGS['MAX_PAGE_SELECTION']})"
+        pages.update(range(first - 1, last))
+    
+    if not pages:
+        return None, None
+    return sorted(pages), None
+
+def parse_sheet_selection(spec):
+    """
+    Parse a spreadsheet sheet selection
+    
+    Args:
+        spec: Comma-separated string ("Summary,3"), int or list of sheet
+            names and 1-based sheet numbers
+        
+    Returns:
+        tuple: (list of names/numbers or None, error_message)
+    """
+    if spec is None or spec == '':
+        return None, None
+    if isinstance(spec, int) and not isinstance(spec, bool):
+        return [spec], None
+    if isinstance(spec, str):
+        items = [item.strip() for item in spec.split(',')]
+    elif isinstance(spec, list):
+        items = [item.strip() if isinstance(item, str) else item for item in spec]
+    else:
+        return None, "sheets must be a comma-separated string or a list of sheet names/numbers"
+    
+    selection = []
+    for item in items:
+        if isinstance(item, bool) or not isinstance(item, (int, str)):
+            return None, f"Invalid sheet selection: {item}"
+        if item != '':
+            selection.append(item)
+    return selection or None, None
+
+def parse_extraction_options(params):
+    """
+    Parse extractor options shared by both extraction endpoints
+    
+    Args:
+        params: Mapping of request parameters
+        
+    Returns:
+        tuple: (options dict or None, error_message)
+    """
+    options = {}
+    
+    pages, error = parse_page_selection(params.get('pages'))
+    if error:
+        return None, error
+    if pages:
+        options['pages'] = pages
+    
+    sheets, error = parse_sheet_selection(params.get('sheets'))
+    if error:
+        return None, error
+    if sheets:
+        options['sheets'] = sheets
+    
+    max_rows = params.get('max_rows')
+    if max_rows is not None and max_rows != '':
+        try:
+            max_rows = int(max_rows)
+        except (TypeError, ValueError):
+            return None, "max_rows must be an integer"
+        if max_rows < 1:
+            return None, "max_rows must be at least 1"
+        options['max_rows'] = max_rows
+    
+    if parse_bool(params.get('rows')):
+        options['include_rows'] = True
+    
+    max_chars = params.get('max_chars')
+    if max_chars is not None and max_chars != '':
+        try:
+            max_chars = int(max_chars)
+        except (TypeError, ValueError):
+            return None, "max_chars must be an integer"
+        if max_chars < 1:
+            return None, "max_chars must be at least 1"
+        options['max_chars'] = max_chars
+    
+    return options or None, None
+
+class CharBudget:
+    """
+    The max_chars limit of one extraction
+    
+    Extractors add their text piece by piece through the budget and stop
+    reading the source as soon as it is spent; stopped_at then holds the
+    source position of the first piece that was cut, e.g. {"page": 12}.
+    Without max_chars the budget is unlimited.
+    """
+    
+    def __init__(self, max_chars=None):
+        self.max_chars = max_chars
+        self.reset()
+    
+    @classmethod
+    def from_options(cls, options):
+        """The budget passed in options, reset for a new attempt, or a new one"""
+        options = options or {}
+        budget = options.get('budget')
+        if budget is None:
+            return cls(options.get('max_chars'))
+        budget.reset()
+        return budget
+    
+    def reset(self):
+        self.used = 0
+        self.truncated = False
+        self.stopped_at = None
+    
+    def append(self, parts, text, position=None, separator='\n'):
+        """
+        Append text to parts (to be joined with separator) within the budget
+        
+        Returns:
+            bool: False once the budget is spent and reading should stop
+        """
+        if self.max_chars is None:
+            parts.append(text)
+            return True
+        if self.truncated:
+            return False
+        gap = len(separator) if parts else 0
+        remaining = self.max_chars - self.used - gap
+        if len(text) <= remaining:
+            parts.append(text)
+            self.used += gap + len(text)
+            return True
+        if remaining > 0:
+            parts.append(text[:remaining])
+            self.used += gap + remaining
+        self.truncated = True
+        self.stopped_at = position
+        return False
+    
+    def iter_limited(self, text_chunks, position=None):
+        """
+        Yield text chunks up to the budget, then stop consuming text_chunks
+        
+        Args:
+            text_chunks: Iterable of text
+            position: Callable returning the source position when cut
+        """
+        for chunk in text_chunks:
+            parts = []
+            if not self.append(parts, chunk, separator=''):
+                if parts:
+                    yield parts[0]
+                self.stopped_at = position() if position else None
+                return
+            yield chunk
+    
+    def details(self):
+        """Response fields reporting the truncation, if max_chars was given"""
+        if self.max_chars is None:
+            return {}
+        return {'truncated': self.truncated, 'stopped_at': self.stopped_at}
+
+@contextmanager
+def open_mapped(file_path):
+    """
+    Open a file for reading through a read-only memory map
+    
+    Reads are served from the OS page cache instead of buffered copies on
+    the Python heap. Where the file cannot be mapped (empty files, special
+    files) or MMAP_IO is disabled, the open binary file is yielded instead;
+    both support read, seek and tell.
+    """
+    with open(file_path, 'rb') as file:
+        mapped = None
+        if SETTINGS['MMAP_IO']:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                logger.debug(f"Reading {file_path} without mmap")
+        if mapped is None:
+            yield file
+        else:
+            with mapped:
+                yield mapped
+
+def release_mapped_pages(file):
+    """
+    Drop the resident pages of a memory map from this process
+    
+    The data stays in the page cache, so later reads fault it back in
+    without disk I/O. A no-op for other file objects.
+    """
+    if isinstance(file, mmap.mmap) and hasattr(mmap, 'MADV_DONTNEED'):
+        file.madvise(mmap.MADV_DONTNEED)
+
+def extract_pdf(file_path, options=None):
+    """
+    Extract text from PDF file
+    
+    Args:
+        file_path: Path to the PDF, or a seekable binary file object
+        options: Optional dict; "pages" limits extraction to the given
+            zero-based page indices, "max_chars" stops reading pages once
+            that much text is extracted
+    """
+    if not PDF_AVAILABLE:
+        return None, "PDF extraction library not available"
+    
+    options = options or {}
+    pages = options.get('pages')
+    strict = options.get('strict', False)
+    budget = CharBudget.from_options(options)
+    
+    try:
+        text_content = []
+        if hasattr(file_path, 'read'):
+            pdf_reader = pypdf.PdfReader(file_path, strict=strict)
+            text_content = _extract_pdf_pages(pdf_reader, pages, budget)
+        else:
+            with open_mapped(file_path) as file:
+                pdf_reader = pypdf.PdfReader(file, strict=strict)
+                text_content = _extract_pdf_pages(pdf_reader, pages, budget)
+        return '\n'.join(text_content), None
+    except Exception as e:
+        logger.error(f"PDF extraction error: {str(e)}")
+        return None, str(e)
+
+def _extract_pdf_pages(pdf_reader, pages=None, budget=None):
+    """
+    Extract text of all pages, or only the selected zero-based pages
+    
+    pypdf keeps the objects it parsed, so pages of a memory-mapped file are
+    released after each page instead of staying resident as well.
+    """
+    stream = pdf_reader.stream
+    budget = budget or CharBudget()
+    text_content = []
+    if pages is None:
+        selected = enumerate(pdf_reader.pages)
+    else:
+        selected = zip(sorted(set(pages)), _iter_selected_pdf_pages(pdf_reader, pages))
+    for index, page in selected:
+        text = page.extract_text()
+        release_mapped_pages(stream)
+        if text and not budget.append(text_content, text, {'page': index + 1}):
+            break
+    return text_content
+
+PDF_INHERITABLE_ATTRIBUTES = ('/Resources', '/MediaBox', '/CropBox', '/Rotate')
+
+def _iter_selected_pdf_pages(pdf_reader, pages):
+    """
+    Yield the selected pages by walking the page tree
+    
+    Unlike pdf_reader.pages, this does not load every page dictionary:
+    subtrees are skipped using their /Count, so only the nodes on the path
+    to each selected page are read. This matters for range-backed streams.
+    """
+    wanted = sorted(set(pages))
+    root = pdf_reader.trailer['/Root'].get_object()['/Pages']
+    yield from _walk_pdf_page_tree(pdf_reader, root, wanted, 0, {})
+
+def _walk_pdf_page_tree(pdf_reader, node_ref, wanted, first_index, inherited):
+    """Recursive helper for _iter_selected_pdf_pages"""
+    node = node_ref.get_object()
+    node_type = node.get('/Type') or ('/Pages' if '/Kids' in node else '/Page')
+    
+    if node_type != '/Pages':
+        page = pypdf.PageObject(pdf_reader, node_ref if isinstance(node_ref, pypdf.generic.IndirectObject) else None)
+        page.update(node)
+        for attr, value in inherited.items():
+            if attr not in page:
+                page[pypdf.generic.NameObject(attr)] = value
+        yield page
+        return
+    
+    inherited = dict(inherited)
+    for attr in PDF_INHERITABLE_ATTRIBUTES:
+        if attr in node:
+            inherited[attr] = node[attr]
+    
+    kids = node.get('/Kids', [])
+    # When /Count equals the number of kids, every kid is a leaf page and
+    # can be addressed by position without resolving it.
+    all_leaves = node.get('/Count') == len(kids)
+    offset = first_index
+    for kid_ref in kids:
+        if offset > wanted[-1]:
+            break
+        if all_leaves:
+            count = 1
+        else:
+            kid = kid_ref.get_object()
+            count = int(kid.get('/Count', 1)) if '/Kids' in kid else 1
+        start = bisect.bisect_left(wanted, offset)
+        if start < len(wanted) and wanted[start] < offset + count:
+            yield from _walk_pdf_page_tree(pdf_reader, kid_ref, wanted, offset, inherited)
+        offset += count
+
+def extract_docx(file_path, options=None):
+    """Extract text from DOCX file"""
+    if not DOCX_AVAILABLE:
+        return None, "DOCX extraction library not available"
+    
+    budget = CharBudget.from_options(options)
+    try:
+        doc = Document(file_path)
+        text_content = []
+        for number, paragraph in enumerate(doc.paragraphs, start=1):
+            text = paragraph.text
+            if text and not budget.append(text_content, text, {'paragraph': number}):
+                break
+        return '\n'.join(text_content), None
+    except Exception as e:
+        logger.error(f"DOCX extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_doc(file_path, options=None):
+    """Extract text from DOC file (old format)"""
+    if not DOC_AVAILABLE:
+        return None, "DOC extraction library not available"
+    
+    budget = CharBudget.from_options(options)
+    try:
+        doc_content = docx2python.docx2python(file_path)
+        text_content = []
+        # docx2python parses the whole document; the budget only bounds the result
+        budget.append(text_content, doc_content.text, {'offset': budget.max_chars})
+        return ''.join(text_content), None
+    except Exception as e:
+        logger.error(f"DOC extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_csv(file_path, options=None):
+    """Extract content from CSV file with better error handling"""
+    encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252']
+    budget = CharBudget.from_options(options)
+    
+    for encoding in encodings:
+        try:
+            budget.reset()
+            content = []
+            with open(file_path, 'r', encoding=encoding) as file:
+                csv_reader = csv.reader(file)
+                for row in csv_reader:
+                    if not row:  # Skip empty rows
+                        continue
+                    line = ','.join(str(cell) for cell in row)
+                    if not budget.append(content, line, {'line': csv_reader.line_num}):
+                        break
+            return '\n'.join(content), None
+        except (UnicodeDecodeError, csv.Error) as e:
+            logger.debug(f"CSV extraction with {encoding} failed: {str(e)}")
+            continue
+        except Exception as e:
+            logger.error(f"CSV extraction error: {str(e)}")
+            return None, str(e)
+    
+    return None, "Could not parse CSV file with any supported encoding"
+
+def extract_txt(file_path, options=None):
+    """
+    Extract content from TXT file
+    
+    The file is decoded from a memory map: without max_chars in a single
+    pass that builds the text straight from the mapped pages, with
+    max_chars incrementally, so pages past the budget are never read.
+    """
+    encodings = ['utf-8', 'latin-1', 'cp1252']
+    budget = CharBudget.from_options(options)
+    
+    try:
+        with open_mapped(file_path) as file:
+            for encoding in encodings:
+                try:
+                    return _decode_text(file, encoding, budget), None
+                except UnicodeDecodeError:
+                    continue
+    except Exception as e:
+        logger.error(f"TXT extraction error: {str(e)}")
+        return None, str(e)
+    
+    return None, "Could not read text file with any supported encoding"
+
+def _decode_text(file, encoding, budget):
+    """Decode a mapped or open binary file with universal newlines"""
+    file.seek(0)
+    if budget.max_chars is None:
+        # Decoding the whole map at once avoids holding decoded pieces and
+        # their joined copy at the same time
+        if isinstance(file, mmap.mmap):
+            text = str(file, encoding)
+            # The mapped bytes are not needed while newlines are translated
+            release_mapped_pages(file)
+        else:
+            text = str(file.read(), encoding)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+    
+    budget.reset()
+    content = ''.join(budget.iter_limited(_iter_file_text(file, encoding)))
+    if budget.truncated:
+        budget.stopped_at = {'line': content.count('\n') + 1}
+    return content
+
+def _iter_file_text(file, encoding):
+    """Decode a binary file chunk by chunk, translating newlines like text mode"""
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    for chunk in iter(lambda: file.read(READ_CHUNK_SIZE), b''):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+def extract_html(file_path, options=None):
+    """
+    Extract readable text from an HTML page in a single streaming pass
+    
+    Scripts, styles and navigation/header/footer boilerplate are dropped.
+    Files without any markup are rejected so that the fallback cascade
+    leaves plain text to extract_txt. With max_chars, the stop position is
+    the offset in the decoded source of the chunk being converted.
+    """
+    budget = CharBudget.from_options(options)
+    try:
+        with open(file_path, 'rb') as file:
+            first_chunk = file.read(64 * 1024)
+            if not looks_like_text(first_chunk):
+                return None, "File is not HTML"
+            
+            byte_chunks = itertools.chain([first_chunk], iter(lambda: file.read(64 * 1024), b''))
+            extractor = HTMLTextExtractor()
+            parts = []
+            source_offset = 0
+            for text in iter_decoded_text(byte_chunks):
+                source_offset += len(text)
+                if not budget.append(parts, extractor.feed_text(text), {'offset': source_offset}, separator=''):
+                    break
+            else:
+                budget.append(parts, extractor.finish(), {'offset': source_offset}, separator='')
+        
+        if not extractor.tag_count:
+            return None, "No HTML markup found"
+        return ''.join(parts), None
+    except Exception as e:
+        logger.error(f"HTML extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_sheets(file_path, reader_class, options=None):
+    """
+    Extract worksheets from a workbook, one row at a time
+    
+    Args:
+        file_path: Path to the workbook
+        reader_class: office_xml reader for the format (XLSXReader, ODSReader)
+        options: Optional dict; "sheets" selects sheets by name or 1-based
+            number, "max_rows" limits the rows read per sheet and
+            "include_rows" keeps the cell values of each row; with
+            "max_chars" no more rows or sheets are read once the budget
+            is spent
+        
+    Returns:
+        tuple: (list of per-sheet dicts with name, text, row_count and
+        truncated (plus rows when requested), error_message)
+    """
+    options = options or {}
+    max_rows = options.get('max_rows')
+    include_rows = options.get('include_rows', False)
+    budget = CharBudget.from_options(options)
+    
+    try:
+        with reader_class(file_path) as reader:
+            sheets = []
+            for name, member in reader.select_sheets(options.get('sheets')):
+                if budget.truncated:
+                    break
+                lines = []
+                rows = [] if include_rows else None
+                truncated = False
+                for number, values in enumerate(reader.iter_rows(member), start=1):
+                    if not values:  # Skip empty rows
+                        continue
+                    if max_rows is not None and len(lines) >= max_rows:
+                        truncated = True
+                        break
+                    if not budget.append(lines, ','.join(values), {'sheet': name, 'row': number}):
+                        truncated = True
+                        break
+                    if include_rows:
+                        rows.append(values)
+                
+                sheet = {
+                    'name': name,
+                    'text': '\n'.join(lines),
+                    'row_count': len(lines),
+                    'truncated': truncated
+                }
+                if include_rows:
+                    sheet['rows'] = rows
+                sheets.append(sheet)
+        return sheets, None
+    except Exception as e:
+        logger.error(f"Spreadsheet extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_xlsx_sheets(file_path, options=None):
+    """Extract the worksheets of an XLSX workbook (see extract_sheets)"""
+    return extract_sheets(file_path, XLSXReader, options)
+
+def extract_ods_sheets(file_path, options=None):
+    """Extract the sheets of an OpenDocument spreadsheet (see extract_sheets)"""
+    return extract_sheets(file_path, ODSReader, options)
+
+def combine_sheet_results(sheets):
+    """
+    Join sheet texts into one text with a header per sheet
+    
+    Returns:
+        tuple: (content, sheets) where each sheet dict records the offset
+        and length of its text within content instead of a copy
+    """
+    parts = []
+    summaries = []
+    offset = 0
+    for sheet in sheets:
+        header = f"--- {sheet['name']} ---\n"
+        if parts:
+            header = '\n\n' + header
+        parts.append(header)
+        offset += len(header)
+        parts.append(sheet['text'])
+        summary = {key: value for key, value in sheet.items() if key != 'text'}
+        summary['content_offset'] = offset
+        summary['content_length'] = len(sheet['text'])
+        offset += len(sheet['text'])
+        summaries.append(summary)
+    return ''.join(parts), summaries
+
+def extract_xlsx(file_path, options=None):
+    """Extract text from the worksheets of an XLSX workbook"""
+    sheets, error = extract_xlsx_sheets(file_path, options)
+    if error:
+        return None, error
+    content, _ = combine_sheet_results(sheets)
+    if not any(sheet['row_count'] for sheet in sheets):
+        return None, "No rows found in workbook"
+    return content, None
+
+def extract_ods(file_path, options=None):
+    """Extract text from the sheets of an OpenDocument spreadsheet"""
+    sheets, error = extract_ods_sheets(file_path, options)
+    if error:
+        return None, error
+    content, _ = combine_sheet_results(sheets)
+    if not any(sheet['row_count'] for sheet in sheets):
+        return None, "No rows found in spreadsheet"
+    return content, None
+
+# Sheet-level extractors used for the per-sheet "sheets" response field
+SPREADSHEET_EXTRACTORS = {
+    '.xlsx': extract_xlsx_sheets,
+    '.ods': extract_ods_sheets
+}
+
+def format_slides(slides, budget=None):
+    """Join (number, text, notes) slides with a header per slide"""
+    budget = budget or CharBudget()
+    parts = []
+    for number, text, notes in slides:
+        part = f"--- Slide {number} ---\n{text}"
+        if notes:
+            part += f"\n\nNotes:\n{notes}"
+        if not budget.append(parts, part, {'slide': number}, separator='\n\n'):
+            break
+    return '\n\n'.join(parts)
+
+def extract_pptx(file_path, options=None):
+    """
+    Extract slide text and speaker notes from a PPTX presentation
+    
+    Args:
+        file_path: Path to the presentation
+        options: Optional dict; "pages" limits extraction to the given
+            zero-based slide indices
+        
+    Returns:
+        tuple: (content, error_message)
+    """
+    options = options or {}
+    try:
+        with PPTXReader(file_path) as reader:
+            content = format_slides(reader.iter_slides(options.get('pages')), CharBudget.from_options(options))
+        if not content:
+            return None, "No slides found in presentation"
+        return content, None
+    except Exception as e:
+        logger.error(f"PPTX extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_odp(file_path, options=None):
+    """Extract slide text and notes from an OpenDocument presentation"""
+    options = options or {}
+    try:
+        content = format_slides(iter_odp_slides(file_path, options.get('pages')), CharBudget.from_options(options))
+        if not content:
+            return None, "No slides found in presentation"
+        return content, None
+    except Exception as e:
+        logger.error(f"ODP extraction error: {str(e)}")
+        return None, str(e)
+
+def extract_odt(file_path, options=None):
+    """Extract paragraphs and headings from an OpenDocument text document"""
+    budget = CharBudget.from_options(options)
+    try:
+        paragraphs = []
+        for number, paragraph in enumerate(iter_odt_paragraphs(file_path), start=1):
+            if not budget.append(paragraphs, paragraph, {'paragraph': number}):
+                break
+        content = '\n'.join(paragraphs)
+        if not content:
+            return None, "No text found in document"
+        return content, None
+    except Exception as e:
+        logger.error(f"ODT extraction error: {str(e)}")
+        return None, str(e)
+
+class ArchiveLimitExceeded(Exception):
+    """Raised when an archive exceeds the member, size or ratio limits"""
+
+class ArchiveLimits:
+    """
+    Running bomb-protection accounting for one archive
+    
+    Tracks the member count and the uncompressed bytes written, and fails
+    as soon as a limit is crossed instead of after a member is unpacked.
+    """
+    
+    def __init__(self, archive_size):
+        self.archive_size = max(archive_size, 1)
+        self.members = 0
+        self.total_bytes = 0
+    
+    def add_member(self):
+        self.members += 1
+        if self.members > SETTINGS['ARCHIVE_MAX_MEMBERS']:
+            raise ArchiveLimitExceeded(
+                f"Archive has more than {SETTINGS['ARCHIVE_MAX_MEMBERS']} members"
+            )
+    
+    def add_bytes(self, count):
+        self.total_bytes += count
+        if self.total_bytes > SETTINGS['ARCHIVE_MAX_TOTAL_SIZE']:
+            raise ArchiveLimitExceeded(
+                f"Archive expands to more than {SETTINGS['ARCHIVE_MAX_TOTAL_SIZE'] / (1024*1024):.1f}MB"
+            )
+        if self.total_bytes > self.archive_size * SETTINGS['ARCHIVE_MAX_RATIO']:
+            raise ArchiveLimitExceeded(
+                f"Archive compression ratio exceeds {SETTINGS['ARCHIVE_MAX_RATIO']}:1"
+            )
+
+def _copy_member(source, target_path, limits, chunk_size=64 * 1024):
+    """Copy an archive member to disk, enforcing the archive limits"""
+    with open(target_path, 'wb') as target:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            limits.add_bytes(len(chunk))
+            target.write(chunk)
+
+def _member_extension(name):
+    """Extension of an archive member if it can be extracted, else None"""
+    suffix = Path(name).suffix.lower()
+    if suffix in EXTRACTION_FUNCTIONS and suffix not in ARCHIVE_EXTENSIONS:
+        return suffix
+    return None
+
+def iter_archive_members(file_path, work_dir, limits, source_name=None):
+    """
+    Stream members out of a ZIP, tar (optionally compressed) or gzip file
+    
+    Members with an extractable extension are written one at a time to
+    work_dir; others are skipped without being decompressed.
+    
+    Args:
+        file_path: Path to the archive
+        work_dir: Directory for unpacked members
+        limits: ArchiveLimits for this archive
+        source_name: Original file name, used to name a bare gzip member
+        
+    Yields:
+        tuple: (member_name, member_path or None, file_extension or None)
+    """
+    with open(file_path, 'rb') as file:
+        signature = file.read(4)
+    
+    if signature.startswith(b'PK\x03\x04'):
+        with zipfile.ZipFile(file_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                limits.add_member()
+                extension = _member_extension(info.filename)
+                if not extension:
+                    yield info.filename, None, None
+                    continue
+                if info.file_size > max(info.compress_size, 1) * SETTINGS['ARCHIVE_MAX_RATIO']:
+                    raise ArchiveLimitExceeded(
+                        f"Member {info.filename} compression ratio exceeds {SETTINGS['ARCHIVE_MAX_RATIO']}:1"
+                    )
+                member_path = os.path.join(work_dir, f'{limits.members}{extension}')
+                with archive.open(info) as source:
+                    _copy_member(source, member_path, limits)
+                yield info.filename, member_path, extension
+        return
+    
+    if tarfile.is_tarfile(file_path):
+        # Stream mode reads members sequentially without seeking back
+        with tarfile.open(file_path, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                limits.add_member()
+                extension = _member_extension(member.name)
+                if not extension:
+                    yield member.name, None, None
+                    continue
+                member_path = os.path.join(work_dir, f'{limits.members}{extension}')
+                _copy_member(archive.extractfile(member), member_path, limits)
+                yield member.name, member_path, extension
+        return
+    
+    if signature.startswith(b'\x1f\x8b'):
+        name = Path(source_name).stem if source_name else 'member'
+        limits.add_member()
+        extension = _member_extension(name)
+        member_path = os.path.join(work_dir, f'1{extension or ".tmp"}')
+        with gzip.open(file_path, 'rb') as source:
+            _copy_member(source, member_path, limits)
+        yield name, member_path, extension
+        return
+    
+    raise ValueError("Not a ZIP, tar or gzip archive")
+
+def _extract_member(member_path, extension, options):
+    """Extract one unpacked archive member; nested archives are not unpacked"""
+    if extension:
+        return EXTRACTION_FUNCTIONS[extension](member_path, options)
+    with open(member_path, 'rb') as file:
+        signature = file.read(4)
+    if signature.startswith((b'PK\x03\x04', b'\x1f\x8b')) or tarfile.is_tarfile(member_path):
+        return None, "Nested archives are not extracted"
+    content, _, error = try_extract_with_fallback(member_path, None, options, exclude=ARCHIVE_EXTENSIONS)
+    return content, error
+
+def extract_archive_members(file_path, options=None):
+    """
+    Extract every supported member of an archive, in parallel
+    
+    Members are unpacked sequentially (archives are read front to back)
+    and each one is handed to a thread pool as soon as it is on disk, so
+    extraction of earlier members overlaps with unpacking later ones.
+    
+    Args:
+        file_path: Path to the archive
+        options: Extractor options; "source_name" names bare gzip members
+        
+    Returns:
+        tuple: (list of per-member result dicts, error_message)
+    """
+    options = options or {}
+    # Members run in parallel, each with its own max_chars budget
+    member_options = {
+        key: value for key, value in options.items() if key not in ('source_name', 'budget')
+    } or None
+    limits = ArchiveLimits(os.path.getsize(file_path))
+    results = []
+    
+    with tempfile.TemporaryDirectory(prefix='archive-') as work_dir, \
+            ThreadPoolExecutor(max_workers=SETTINGS['ARCHIVE_WORKERS']) as executor:
+        futures = []
+        try:
+            for name, member_path, extension in iter_archive_members(
+                file_path, work_dir, limits, options.get('source_name')
+            ):
+                result = {'name': name, 'file_type': extension}
+                results.append(result)
+                if member_path is None:
+                    result.update(success=False, error='Unsupported file type')
+                    continue
+                futures.append((result, executor.submit(_extract_member, member_path, extension, member_options)))
+        except ArchiveLimitExceeded as e:
+            for _, future in futures:
+                future.cancel()
+            logger.warning(f"Archive rejected: {str(e)}")
+            return None, str(e)
+        except Exception as e:
+            for _, future in futures:
+                future.cancel()
+            logger.error(f"Archive extraction error: {str(e)}")
+            return None, str(e)
+        
+        for result, future in futures:
+            try:
+                content, error = future.result()
+            except Exception as e:
+                content, error = None, str(e)
+            if content and not error:
+                result.update(success=True, content=content)
+            else:
+                result.update(success=False, error=error or 'No content extracted')
+    
+    logger.info(
+        f"Extracted archive: {len(results)} members, {limits.total_bytes} bytes unpacked"
+    )
+    return results, None
+
+def combine_archive_results(results):
+    """
+    Join member contents into one text with a header per member
+    
+    Returns:
+        tuple: (content, members) where each member dict records the
+        offset and length of its text within content instead of a copy
+    """
+    parts = []
+    members = []
+    offset = 0
+    for result in results:
+        member = {key: value for key, value in result.items() if key != 'content'}
+        if result.get('success'):
+            header = f"--- {result['name']} ---\n"
+            if parts:
+                header = '\n\n' + header
+            parts.append(header)
+            offset += len(header)
+            parts.append(result['content'])
+            member['content_offset'] = offset
+            member['content_length'] = len(result['content'])
+            offset += len(result['content'])
+        members.append(member)
+    return ''.join(parts), members
+
+def extract_archive(file_path, options=None):
+    """Extract text from all supported members of a ZIP, tar or gzip file"""
+    results, error = extract_archive_members(file_path, options)
+    if error:
+        return None, error
+    content, _ = combine_archive_results(results)
+    if not content:
+        return None, "No extractable members in archive"
+    return content, None
+
+# Formats that can be decoded while the download is still arriving
+STREAMABLE_EXTENSIONS = ('.txt', '.csv', '.md', '.html', '.htm')
+
+# Leading bytes of binary formats that may hide behind a text URL
+BINARY_SIGNATURES = (b'%PDF', b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
+
+class FallbackTextDecoder:
+    """
+    Incremental text decoder for streamed downloads
+    
+    Decodes as UTF-8 and, at the first invalid byte, switches to the
+    fallback encoding for the rest of the stream (the byte-at-a-time
+    equivalent of extract_txt's encoding cascade). Newlines are translated
+    like open() in text mode.
+    """
+    
+    def __init__(self, encoding='utf-8', fallback='latin-1'):
+        self.encoding = encoding
+        self.fallback = fallback
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._newlines = io.IncrementalNewlineDecoder(None, translate=True)
+    
+    def decode(self, data, final=False):
+        pending = self._decoder.getstate()[0]
+        try:
+            text = self._decoder.decode(data, final)
+        except UnicodeDecodeError as e:
+            combined = pending + bytes(data)
+            text = combined[:e.start].decode(self.encoding)
+            logger.debug(f"Invalid {self.encoding} at byte {e.start}, switching to {self.fallback}")
+            self.encoding = self.fallback
+            self._decoder = codecs.getincrementaldecoder(self.fallback)()
+            text += self._decoder.decode(combined[e.start:], final)
+        return self._newlines.decode(text, final)
+
+def looks_like_text(chunk):
+    """Heuristic check on the first downloaded chunk before decoding it as text"""
+    return b'\x00' not in chunk and not chunk.startswith(BINARY_SIGNATURES)
+
+def iter_decoded_text(byte_chunks):
+    """Decode an iterable of byte chunks into text chunks"""
+    decoder = FallbackTextDecoder()
+    for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def iter_text_lines(text_chunks):
+    """Split text chunks into lines, keeping the line endings"""
+    pending = ''
+    for chunk in text_chunks:
+        pending += chunk
+        if '\n' not in chunk:
+            continue
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
+
+def iter_csv_text(text_chunks):
+    """Stream CSV rows in the same output format as extract_csv"""
+    first = True
+    for row in csv.reader(iter_text_lines(text_chunks)):
+        if not row:  # Skip empty rows
+            continue
+        line = ','.join(str(cell) for cell in row)
+        yield line if first else '\n' + line
+        first = False
+
+def iter_stream_extraction(byte_chunks, file_extension, budget=None):
+    """
+    Extract text from a download while its bytes are still arriving
+    
+    Args:
+        byte_chunks: Iterable of raw byte chunks
+        file_extension: One of STREAMABLE_EXTENSIONS
+        budget: Optional CharBudget; once it is spent no more bytes are
+            read and the stop position is the number of bytes consumed
+        
+    Returns:
+        Iterator of text chunks
+    """
+    if budget is not None and budget.max_chars is not None:
+        consumed = [0]
+        
+        def counted(chunks):
+            for chunk in chunks:
+                consumed[0] += len(chunk)
+                yield chunk
+        
+        text_chunks = iter_stream_extraction(counted(byte_chunks), file_extension)
+        return budget.iter_limited(text_chunks, lambda: {'byte': consumed[0]})
+    
+    text_chunks = iter_decoded_text(byte_chunks)
+    if file_extension == '.csv':
+        return iter_csv_text(text_chunks)
+    if file_extension in HTML_EXTENSIONS:
+        return iter_html_text(text_chunks)
+    return text_chunks
+
+def resolve_file_extension(filename=None, content_type=None):
+    """
+    Resolve file extension from filename or Content-Type.
+    
+    Args:
+        filename: Original file name (optional)
+        content_type: MIME type string (optional)
+        
+    Returns:
+        str | None: Lowercase extension including dot, or None
+    """
+    suffix = Path(filename).suffix.lower() if filename else ''
+    if suffix in SUPPORTED_EXTENSIONS or (suffix and not content_type):
+        return suffix
+    
+    # Unknown suffixes such as ".php" or ".aspx" defer to the Content-Type
+    if content_type:
+        content_type_lower = content_type.lower()
+        if 'pdf' in content_type_lower:
+            return '.pdf'
+        if 'spreadsheetml' in content_type_lower:
+            return '.xlsx'
+        if 'presentationml' in content_type_lower:
+            return '.pptx'
+        if 'opendocument.text' in content_type_lower:
+            return '.odt'
+        if 'opendocument.spreadsheet' in content_type_lower:
+            return '.ods'
+        if 'opendocument.presentation' in content_type_lower:
+            return '.odp'
+        if 'word' in content_type_lower or 'document' in content_type_lower:
+            return '.docx' if 'openxml' in content_type_lower else '.doc'
+        if 'csv' in content_type_lower or 'text/csv' in content_type_lower:
+            return '.csv'
+        if 'html' in content_type_lower:
+            return '.html'
+        if 'markdown' in content_type_lower:
+            return '.md'
+        if 'text/plain' in content_type_lower:
+            return '.txt'
+        if 'zip' in content_type_lower:
+            return '.zip'
+        if 'gzip' in content_type_lower:
+            return '.gz'
+        if 'x-tar' in content_type_lower:
+            return '.tar'
+    
+    return suffix or None
+
+# Extraction function mapping. Archives and HTML come before CSV/TXT so
+# that the fallback cascade detects them before decoding them as text.
+EXTRACTION_FUNCTIONS = {
+    '.pdf': extract_pdf,
+    '.docx': extract_docx,
+    '.doc': extract_doc,
+    '.xlsx': extract_xlsx,
+    '.pptx': extract_pptx,
+    '.odt': extract_odt,
+    '.ods': extract_ods,
+    '.odp': extract_odp,
+    '.zip': extract_archive,
+    '.gz': extract_archive,
+    '.tgz': extract_archive,
+    '.tar': extract_archive,
+    '.html': extract_html,
+    '.htm': extract_html,
+    '.csv': extract_csv,
+    '.txt': extract_txt,
+    '.md': extract_txt
+}
+
+def _traced_attempt(extract_func, file_path, file_extension, options):
+    # One span per extractor tried, so traces show which fallback took the time
+    with tracing.span('extract_attempt', {'file.type': file_extension}) as span:
+        content, error = extract_func(file_path, options)
+        if error or not content:
+            span.set_error(error or 'No content')
+        return content, error
+
+def try_extract_with_fallback(file_path, file_extension=None, options=None, exclude=()):
+    """
+    Try extraction with multiple methods if file extension is unknown
+    
+    Args:
+        file_path: Path to the file
+        file_extension: Known extension or None
+        options: Optional extractor options (e.g. {"pages": [0, 1]})
+        exclude: Extensions whose extractors are not tried in the cascade
+        
+    Returns:
+        tuple: (content, detected_extension, error_message)
+    """
+    # If we have a known extension, try it first
+    if file_extension and file_extension in EXTRACTION_FUNCTIONS:
+        extract_func = EXTRACTION_FUNCTIONS[file_extension]
+        try:
+            content, error = _traced_attempt(extract_func, file_path, file_extension, options)
+            if content and not error:
+                return content, file_extension, None
+        except Exception as e:
+            logger.debug(f"Extraction with {file_extension} failed: {str(e)}")
+    
+    # Try all supported formats
+    for ext, extract_func in EXTRACTION_FUNCTIONS.items():
+        if (file_extension and ext == file_extension) or ext in exclude:
+            continue  # Already tried or not allowed
+        try:
+            content, error = _traced_attempt(extract_func, file_path, ext, options)
+            if content and not error:
+                logger.info("Detected file type as %s via content analysis", ext)
+                return content, ext, None
+        except Exception as e:
+            logger.debug("Extraction with %s failed: %s", ext, e)
+            continue
+    
+    return None, file_extension, "Could not extract content with any supported method"
+
+
+# Chunk size when reading buffers and file objects
+READ_CHUNK_SIZE = 64 * 1024
+
+class ExtractionResult:
+    """
+    Outcome of an extraction
+    
+    Attributes:
+        content: Extracted text, or None on failure
+        file_type: Extension the content was extracted as (e.g. ".pdf")
+        error: Error message, or None on success
+        details: Per-format extras: {"sheets": [...]} for workbooks,
+            {"members": [...]} for archives, otherwise empty
+    """
+    
+    __slots__ = ('content', 'file_type', 'error', 'details')
+    
+    def __init__(self, content=None, file_type=None, error=None, details=None):
+        self.content = content
+        self.file_type = file_type
+        self.error = error
+        self.details = details or {}
+    
+    @property
+    def success(self):
+        return self.error is None and self.content is not None
+    
+    def to_dict(self):
+        """The result in the shape of the API's JSON responses"""
+        if not self.success:
+            return {'success': False, 'error': self.error, 'file_type': self.file_type, **self.details}
+        return {
+            'success': True,
+            'content': self.content,
+            'file_type': self.file_type,
+            'content_length': len(self.content),
+            **self.details
+        }
+    
+    def __repr__(self):
+        if self.success:
+            return f'<ExtractionResult {self.file_type} {len(self.content)} chars>'
+        return f'<ExtractionResult {self.file_type} error={self.error!r}>'
+
+@tracing.traced()
+def extract_path(file_path, file_extension=None, options=None):
+    """
+    Extract a file on disk
+    
+    Workbooks and archives are extracted sheet by sheet and member by
+    member, with the per-part summaries in result.details; other files go
+    through try_extract_with_fallback.
+    
+    Args:
+        file_path: Path to the file
+        file_extension: Known extension or None to detect it
+        options: Extractor options, see parse_extraction_options;
+            "source_name" names a bare .gz file's single member
+        
+    Returns:
+        ExtractionResult; with max_chars its details report "truncated"
+        and "stopped_at"
+    """
+    budget = CharBudget((options or {}).get('max_chars'))
+    if budget.max_chars is not None:
+        options = dict(options, budget=budget)
+    
+    if file_extension in ARCHIVE_EXTENSIONS:
+        results, error = extract_archive_members(file_path, options)
+        if error:
+            return ExtractionResult(file_type=file_extension, error=error)
+        content, members = combine_archive_results(results)
+        if not content:
+            return ExtractionResult(
+                file_type=file_extension, error='No extractable members in archive', details={'members': members}
+            )
+        logger.info(
+            "Successfully extracted archive %s, members: %d", file_extension, len(members),
+            extra={'event': 'extracted', 'file_type': file_extension, 'members': len(members)}
+        )
+        return _budgeted_result(content, file_extension, budget, {'members': members})
+    
+    if file_extension in SPREADSHEET_EXTRACTORS:
+        sheets, error = SPREADSHEET_EXTRACTORS[file_extension](file_path, options)
+        if error:
+            return ExtractionResult(file_type=file_extension, error=error)
+        content, summaries = combine_sheet_results(sheets)
+        logger.info(
+            "Successfully extracted workbook, sheets: %d", len(summaries),
+            extra={'event': 'extracted', 'file_type': file_extension, 'sheets': len(summaries)}
+        )
+        return _budgeted_result(content, file_extension, budget, {'sheets': summaries})
+    
+    content, detected_ext, error = try_extract_with_fallback(file_path, file_extension, options)
+    if error or content is None:
+        return ExtractionResult(
+            file_type=detected_ext or file_extension,
+            error=error or 'Unsupported file type or failed to extract content'
+        )
+    logger.info(
+        "Successfully extracted %s file, length: %d", detected_ext, len(content),
+        extra={'event': 'extracted', 'file_type': detected_ext, 'chars': len(content)}
+    )
+    return _budgeted_result(content, detected_ext, budget)
+
+# Position key reported for a cut in each kind of part summary
+PART_POSITIONS = {'sheets': 'sheet', 'members': 'member'}
+
+def _budgeted_result(content, file_type, budget, details=None):
+    """
+    Build a successful result, clipping content to max_chars
+    
+    Extractors stop at the budget for the text they produce; headers added
+    when sheets or archive members are combined are clipped here. Part
+    summaries are clipped to the content that is left, and if no extractor
+    recorded a stop position the first part that was cut is reported.
+    """
+    details = dict(details or {})
+    limit = budget.max_chars
+    if limit is not None and len(content) > limit:
+        content = content[:limit]
+        budget.truncated = True
+        for field, parts in details.items():
+            for part in parts:
+                if 'content_offset' not in part:
+                    continue
+                if budget.stopped_at is None and part['content_offset'] + part['content_length'] > limit:
+                    budget.stopped_at = {PART_POSITIONS[field]: part['name']}
+                part['content_offset'] = min(part['content_offset'], limit)
+                part['content_length'] = min(part['content_length'], limit - part['content_offset'])
+    details.update(budget.details())
+    return ExtractionResult(content, file_type, details=details)
+
+def resolve_hint(hint):
+    """
+    Extension for an extract() hint
+    
+    Args:
+        hint: File name ("report.pdf"), extension (".pdf") or MIME type
+        
+    Returns:
+        str | None: Supported extension, or None if the hint does not name one
+    """
+    if not hint:
+        return None
+    hint = hint.strip()
+    if hint.startswith('.') and hint.lower() in SUPPORTED_EXTENSIONS:
+        return hint.lower()
+    suffix = Path(hint).suffix.lower()
+    if suffix in SUPPORTED_EXTENSIONS:
+        return suffix
+    if '/' in hint:
+        extension = resolve_file_extension(None, hint)
+        if extension in SUPPORTED_EXTENSIONS:
+            return extension
+    return None
+
+def _iter_buffer_chunks(view, chunk_size=READ_CHUNK_SIZE):
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+def _extract_chunks(chunks, file_extension, options, spill, rewind=None):
+    """
+    Extract from an iterator of byte chunks
+    
+    Text formats are decoded straight from the chunks; anything else (or
+    binary data behind a text extension) is written to a temporary file
+    with spill(file) and extracted from there. A text file the streaming
+    decoder rejects (e.g. a CSV field over the csv module's size limit) is
+    written out whole with rewind(file) and goes through the same fallback
+    cascade as a path would.
+    """
+    first_chunk = bytes(next(chunks, b''))
+    if not first_chunk:
+        return ExtractionResult(file_type=file_extension, error='File is empty')
+    
+    if file_extension in STREAMABLE_EXTENSIONS and looks_like_text(first_chunk):
+        budget = CharBudget((options or {}).get('max_chars'))
+        try:
+            content = ''.join(iter_stream_extraction(itertools.chain([first_chunk], chunks), file_extension, budget))
+        except (csv.Error, UnicodeDecodeError) as e:
+            if rewind is None:
+                return ExtractionResult(file_type=file_extension, error=str(e))
+            logger.warning(f"Streaming {file_extension} extraction failed, extracting from a file: {str(e)}")
+            first_chunk, spill = b'', rewind
+        else:
+            if not content:
+                return ExtractionResult(file_type=file_extension, error='No text content found')
+            return ExtractionResult(content, file_extension, details=budget.details())
+    
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_extension or '.tmp')
+    try:
+        try:
+            temp_file.write(first_chunk)
+            spill(temp_file)
+        finally:
+            temp_file.close()
+        return extract_path(temp_file.name, file_extension, options)
+    finally:
+        try:
+            os.unlink(temp_file.name)
+        except OSError as e:
+            logger.warning(f"Failed to delete temp file {temp_file.name}: {str(e)}")
+
+@tracing.traced()
+def extract(source, hint=None, options=None):
+    """
+    Extract text from a path, a bytes-like object or a binary file object
+    
+    Bytes-like sources (bytes, bytearray, memoryview, mmap, ...) are read
+    through a memoryview and never copied as a whole: text formats are
+    decoded chunk by chunk and other formats are written to a temporary
+    file straight from the buffer.
+    
+    Args:
+        source: Path (str or os.PathLike), bytes-like object or binary
+            file object
+        hint: File name, extension (".pdf") or MIME type naming the
+            format; defaults to the path's name. Without one the format is
+            detected by trying every extractor.
+        options: Extractor options, see parse_extraction_options
+        
+    Returns:
+        ExtractionResult
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        file_extension = resolve_hint(hint) or resolve_hint(path)
+        if file_extension in ARCHIVE_EXTENSIONS and not (options or {}).get('source_name'):
+            options = dict(options or {}, source_name=os.path.basename(path))
+        return extract_path(path, file_extension, options)
+    
+    file_extension = resolve_hint(hint)
+    if file_extension in ARCHIVE_EXTENSIONS and hint and not (options or {}).get('source_name'):
+        options = dict(options or {}, source_name=os.path.basename(hint))
+    
+    if hasattr(source, 'read'):
+        start = source.tell() if getattr(source, 'seekable', lambda: False)() else None
+        
+        def rewind(file):
+            source.seek(start)
+            shutil.copyfileobj(source, file, READ_CHUNK_SIZE)
+        
+        chunks = iter(lambda: source.read(READ_CHUNK_SIZE), b'')
+        return _extract_chunks(chunks, file_extension, options,
+                               lambda file: shutil.copyfileobj(source, file, READ_CHUNK_SIZE),
+                               rewind if start is not None else None)
+    
+    view = memoryview(source).cast('B')
+    chunks = _iter_buffer_chunks(view)
+    return _extract_chunks(chunks, file_extension, options,
+                           lambda file: file.write(view[READ_CHUNK_SIZE:]), lambda file: file.write(view))
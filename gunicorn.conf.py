@@ -0,0 +1,27 @@
+"""
+Gunicorn settings (`gunicorn app:app` also loads this file from the working directory)
+
+Workers are recycled in two ways, so heap growth from the parsers cannot
+accumulate until the instance is killed:
+
+- after MAX_REQUESTS requests, plus a random jitter of up to
+  MAX_REQUESTS_JITTER so workers do not all restart at once;
+- once the memory governor finds their RSS over MEMORY_SOFT_LIMIT_MB.
+
+A retiring worker finishes its in-flight requests (for up to
+GRACEFUL_TIMEOUT seconds) before the arbiter replaces it.
+"""
+import os
+
+max_requests = int(os.environ.get('MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('MAX_REQUESTS_JITTER', 100))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 60))
+
+
+def post_request(worker, req, environ, resp):
+    """Retire the worker once the app's memory governor asks for it"""
+    governor = getattr(worker.wsgi, 'extensions', {}).get('memory_governor')
+    if governor is not None and governor.should_retire and worker.alive:
+        worker.log.info("Worker %s over its memory soft limit; restarting after in-flight requests", worker.pid)
+        # What gunicorn itself does once max_requests is reached
+        worker.alive = False
@@ -0,0 +1,268 @@
+"""
+Per-origin budgets for outbound downloads
+
+Batch ingests can send hundreds of requests for files on one customer
+server at once, which then throttles or times out. Every outbound
+download takes a slot of its host first: at most max_concurrency
+downloads per host run at a time across all workers of the instance, and
+new ones are started at no more than rate per second (token bucket of
+burst requests). Requests over the budget queue in arrival order instead
+of failing, up to max_wait seconds.
+"""
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from admission import AdmissionRejected
+from scheduler import LATENCY_SAMPLES, percentile
+from shared_state import SharedLedger
+
+logger = logging.getLogger(__name__)
+
+# Hosts whose statistics are kept; the least recently used are dropped
+MAX_TRACKED_HOSTS = 256
+
+# Ticket ids are unique per process, so limiters sharing a ledger never collide
+_ticket_ids = itertools.count(1)
+
+
+class HostBusy(AdmissionRejected):
+    """Raised when a host's download budget stays full for max_wait seconds"""
+
+
+def host_key(url):
+    """
+    Budget key of a URL: the lower-cased host, with the port if it is explicit
+
+    Args:
+        url: Absolute http(s) URL
+
+    Returns:
+        str: e.g. "files.example.com" or "files.example.com:8443"
+    """
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    return f'{host}:{port}' if port else host
+
+
+class HostTicket:
+    """A granted download slot"""
+
+    def __init__(self, ticket_id, host):
+        self.id = ticket_id
+        self.host = host
+        self.acquired_at = time.monotonic()
+        self.released = False
+
+
+class HostLimiter:
+    """
+    Per-host concurrency and request-rate budget shared by the workers.
+
+    Slots live in a SharedLedger like admission reservations. Waiting
+    requests of one host are granted in arrival order.
+
+    Args:
+        state_path: Ledger file shared by the workers
+        max_concurrency: Concurrent downloads per host, 0 for no limit
+        rate: Downloads started per second per host, 0 for no limit
+        burst: Downloads that may start at once before rate applies
+        max_wait: Seconds a download may queue before HostBusy is raised
+        poll_interval: Seconds between budget checks while waiting
+    """
+
+    def __init__(self, state_path, max_concurrency=4, rate=0, burst=10, max_wait=30.0,
+                 poll_interval=0.05):
+        self.ledger = SharedLedger(state_path, sections=('active', 'waiting'))
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self._released = threading.Condition()
+
+    def _tokens(self, state, host, now):
+        """Refilled token count of a host's bucket"""
+        bucket = state.setdefault('buckets', {}).get(host)
+        if bucket is None:
+            return self.burst
+        return min(self.burst, bucket['tokens'] + (now - bucket['updated']) * self.rate)
+
+    def _has_room(self, state, host, now):
+        if self.max_concurrency:
+            active = sum(1 for entry in state['active'].values() if entry['host'] == host)
+            if active >= self.max_concurrency:
+                return False
+        return not self.rate or self._tokens(state, host, now) >= 1
+
+    @staticmethod
+    def _is_next(state, key, host):
+        entry = state['waiting'][key]
+        return not any(
+            (other['since'], other_key) < (entry['since'], key)
+            for other_key, other in state['waiting'].items()
+            if other['host'] == host
+        )
+
+    def _grant(self, state, key, host, now, waited):
+        state['active'][key] = {'host': host, 'since': now}
+        if self.rate:
+            buckets = state['buckets']
+            buckets[host] = {'tokens': self._tokens(state, host, now) - 1, 'updated': now}
+            # Full buckets hold no information
+            for name in [name for name in buckets if self._tokens(state, name, now) >= self.burst]:
+                del buckets[name]
+        stats = self._stats(state, host, now)
+        stats['requests'] += 1
+        self._sample(stats, 'wait_ms', waited * 1000)
+
+    def acquire(self, host, wait=True):
+        """
+        Take a download slot of host, queueing up to max_wait.
+
+        Args:
+            host: Key from host_key()
+            wait: With False, return None at once if the budget is full or
+                other downloads of the host are queued
+
+        Returns:
+            HostTicket | None
+
+        Raises:
+            HostBusy: If no slot frees up in time
+        """
+        ticket = HostTicket(next(_ticket_ids), host)
+        key = SharedLedger.entry_key(ticket.id)
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        while True:
+            with self.ledger.transaction() as state:
+                now = time.time()
+                if wait and key not in state['waiting']:
+                    state['waiting'][key] = {'host': host, 'since': now}
+                if wait:
+                    ready = self._is_next(state, key, host)
+                else:
+                    # Optional slots never jump ahead of queued downloads
+                    ready = all(entry['host'] != host for entry in state['waiting'].values())
+                if ready and self._has_room(state, host, now):
+                    state['waiting'].pop(key, None)
+                    self._grant(state, key, host, now, time.monotonic() - started)
+                    ticket.acquired_at = time.monotonic()
+                    return ticket
+                if not wait:
+                    return None
+            if not self._wait(deadline):
+                with self.ledger.transaction() as state:
+                    state['waiting'].pop(key, None)
+                    self._stats(state, host, time.time())['rejected'] += 1
+                self._notify()
+                logger.warning(f"Download budget of {host} stayed full for {self.max_wait}s")
+                raise HostBusy(
+                    f'Too many concurrent downloads from {host}, please retry later',
+                    max(1, math.ceil(1 / self.rate)) if self.rate else max(1, math.ceil(self.max_wait))
+                )
+
+    def try_acquire(self, host):
+        """
+        Take a download slot of host without queueing.
+
+        For callers that already hold an admission slot: waiting here would
+        keep that instance-wide slot busy for a single slow host.
+
+        Returns:
+            HostTicket
+
+        Raises:
+            HostBusy: If the budget is full or downloads of host are queued
+        """
+        ticket = self.acquire(host, wait=False)
+        if ticket is not None:
+            return ticket
+        with self.ledger.transaction() as state:
+            stats = self._stats(state, host, time.time())
+            stats['rejected'] += 1
+            held_ms = percentile(stats['latency_ms'], 0.5)
+        if self.rate:
+            retry_after = max(1, math.ceil(1 / self.rate))
+        else:
+            # A slot frees up about when a typical download of the host ends
+            retry_after = max(1, math.ceil((held_ms or 0) / 1000))
+        raise HostBusy(f'Too many concurrent downloads from {host}, please retry later', retry_after)
+
+    def release(self, ticket):
+        """Return a slot (idempotent) and record how long it was held"""
+        if ticket is None or ticket.released:
+            return
+        ticket.released = True
+        held = time.monotonic() - ticket.acquired_at
+        with self.ledger.transaction() as state:
+            state['active'].pop(SharedLedger.entry_key(ticket.id), None)
+            self._sample(self._stats(state, ticket.host, time.time()), 'latency_ms', held * 1000)
+        self._notify()
+
+    @contextmanager
+    def slot(self, host, wait=True):
+        """Context manager around acquire (or try_acquire with wait=False) and release"""
+        ticket = self.acquire(host) if wait else self.try_acquire(host)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _wait(self, deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        with self._released:
+            self._released.wait(min(remaining, self.poll_interval * random.uniform(0.5, 1.5)))
+        return True
+
+    def _notify(self):
+        with self._released:
+            self._released.notify_all()
+
+    @staticmethod
+    def _stats(state, host, now):
+        stats = state.setdefault('host_stats', {})
+        if host not in stats and len(stats) >= MAX_TRACKED_HOSTS:
+            del stats[min(stats, key=lambda name: stats[name]['last'])]
+        entry = stats.setdefault(host, {'requests': 0, 'rejected': 0, 'wait_ms': [], 'latency_ms': []})
+        entry['last'] = now
+        return entry
+
+    @staticmethod
+    def _sample(stats, field, value):
+        samples = stats[field]
+        samples.append(round(value, 1))
+        del samples[:-LATENCY_SAMPLES]
+
+    def metrics(self):
+        """Per-host slots in use, queue depth and wait/latency percentiles"""
+        state = self.ledger.read()
+        hosts = {}
+        for name, stats in state.get('host_stats', {}).items():
+            hosts[name] = {
+                'active': 0,
+                'queued': 0,
+                'requests': stats['requests'],
+                'rejected': stats['rejected'],
+                'wait_ms_p50': percentile(stats['wait_ms'], 0.5),
+                'wait_ms_p95': percentile(stats['wait_ms'], 0.95),
+                'latency_ms_p50': percentile(stats['latency_ms'], 0.5),
+                'latency_ms_p95': percentile(stats['latency_ms'], 0.95),
+            }
+        empty = {'active': 0, 'queued': 0, 'requests': 0, 'rejected': 0}
+        for section, field in (('active', 'active'), ('waiting', 'queued')):
+            for entry in state.get(section, {}).values():
+                hosts.setdefault(entry['host'], dict(empty))[field] += 1
+        return hosts
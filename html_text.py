@@ -0,0 +1,252 @@
+"""
+Readable text from HTML in a single incremental pass
+
+The tokenizer is fed decoded chunks as they arrive and hands back the
+text produced so far, so pages can be converted while they download.
+Scripts, styles and page chrome (navigation, headers, footers, forms) are
+dropped; headings and list items get Markdown-style prefixes.
+"""
+import re
+from html import unescape
+
+# Elements whose entire content is dropped
+SKIP_TAGS = frozenset({
+    'script', 'style', 'noscript', 'template', 'head', 'svg', 'canvas', 'iframe',
+    'nav', 'header', 'footer', 'aside', 'form', 'button', 'select', 'dialog',
+    'textarea', 'title',
+})
+
+# Elements whose content is raw text up to the matching end tag
+RAW_TEXT_TAGS = frozenset({'script', 'style', 'textarea', 'title'})
+
+# Elements that end a paragraph (blank line before and after)
+PARAGRAPH_TAGS = frozenset({
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'table',
+    'ul', 'ol', 'dl', 'figure', 'section', 'article', 'main', 'hr',
+})
+
+# Elements that start on a new line
+LINE_TAGS = frozenset({
+    'div', 'li', 'tr', 'br', 'dt', 'dd', 'figcaption', 'address', 'caption',
+    'details', 'summary', 'fieldset', 'legend',
+})
+
+# Elements without end tags
+VOID_TAGS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr',
+})
+
+HEADING_LEVELS = {f'h{level}': level for level in range(1, 7)}
+
+WHITESPACE = re.compile(r'\s+')
+
+# Longest named character reference ("&CounterClockwiseContourIntegral;")
+MAX_CHARREF_LENGTH = 33
+
+# One token per match: text, comment, tag or declaration. Quoted attribute
+# values may contain ">".
+TOKEN = re.compile(
+    r"""
+    (?P<text>[^<]+)
+    |<!--.*?-->
+    |<(?P<end>/?)(?P<tag>[a-zA-Z][^\s/>]*)(?P<attrs>(?:[^>"']|"[^"]*"|'[^']*')*)>
+    |<!(?!--)[^>]*>|<\?[^>]*>
+    """,
+    re.DOTALL | re.VERBOSE
+)
+
+# A "<" that may still become a tag, comment or declaration
+TAG_OPENER = re.compile(r'<[a-zA-Z/!?]')
+
+RAW_TEXT_END = {tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+
+
+class HTMLTextExtractor:
+    """
+    Incremental HTML to text converter.
+
+    A regex tokenizer walks the buffered markup; an incomplete token at the
+    end of a chunk is kept until the next chunk arrives. The content of
+    raw-text elements such as <script> is discarded without tokenizing it.
+
+    Usage:
+        extractor = HTMLTextExtractor()
+        for chunk in chunks:
+            yield extractor.feed_text(chunk)
+        yield extractor.finish()
+    """
+
+    def __init__(self):
+        self.tag_count = 0
+        self._buffer = ''
+        self._raw_tag = None
+        self._parts = []
+        self._skip_stack = []
+        self._pre_depth = 0
+        self._pending_break = 0
+        self._pending_space = False
+        self._started = False
+        self._at_space = True
+        self._cell_index = 0
+
+    def feed_text(self, data):
+        """Feed a chunk of markup and return the text completed so far"""
+        self._buffer += data
+        self._tokenize(final=False)
+        return self._drain()
+
+    def finish(self):
+        """Flush buffered input and return the remaining text"""
+        self._tokenize(final=True)
+        return self._drain()
+
+    def _drain(self):
+        text = ''.join(self._parts)
+        self._parts.clear()
+        return text
+
+    def _tokenize(self, final):
+        buffer = self._buffer
+        length = len(buffer)
+        position = 0
+        while position < length:
+            if self._raw_tag:
+                match = RAW_TEXT_END[self._raw_tag].search(buffer, position)
+                if not match:
+                    # Raw text is always skipped; keep only a possible partial end tag
+                    position = length if final else max(position, length - len(self._raw_tag) - 3)
+                    break
+                self.handle_endtag(self._raw_tag)
+                self._raw_tag = None
+                position = match.end()
+                continue
+
+            match = TOKEN.match(buffer, position)
+            if match is None:
+                # An unterminated tag or comment may be completed by the next chunk
+                if not final and (position == length - 1 or TAG_OPENER.match(buffer, position)):
+                    break
+                # A stray "<" is text
+                self.handle_data('<')
+                position += 1
+                continue
+
+            text, end, tag, attrs = match.group('text', 'end', 'tag', 'attrs')
+            if text is not None:
+                if not final and match.end() == length:
+                    # The text may continue in the next chunk; hold back a
+                    # possibly incomplete character reference
+                    cut = text.rfind('&')
+                    if cut != -1 and ';' not in text[cut:] and len(text) - cut <= MAX_CHARREF_LENGTH:
+                        text = text[:cut]
+                        if text:
+                            self.handle_data(unescape(text))
+                        position += cut
+                        break
+                self.handle_data(unescape(text) if '&' in text else text)
+            elif tag:
+                tag = tag.lower()
+                if end:
+                    self.handle_endtag(tag)
+                else:
+                    self.handle_starttag(tag)
+                    if tag in RAW_TEXT_TAGS:
+                        self._raw_tag = tag
+                    elif attrs.endswith('/') and tag not in VOID_TAGS:
+                        self.handle_endtag(tag)
+            position = match.end()
+        self._buffer = buffer[position:]
+
+    def _break(self, lines):
+        if self._started:
+            self._pending_break = max(self._pending_break, lines)
+
+    def _emit(self, text):
+        if self._pending_break:
+            self._parts.append('\n' * self._pending_break)
+            self._pending_break = 0
+        elif self._pending_space and not self._at_space:
+            self._parts.append(' ')
+        self._pending_space = False
+        self._parts.append(text)
+        self._at_space = text[-1].isspace()
+        self._started = True
+
+    def handle_starttag(self, tag):
+        self.tag_count += 1
+        if self._skip_stack:
+            if tag in SKIP_TAGS and tag not in VOID_TAGS:
+                self._skip_stack.append(tag)
+            return
+        if tag in SKIP_TAGS:
+            self._skip_stack.append(tag)
+            return
+
+        if tag in PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in LINE_TAGS:
+            self._break(1)
+
+        if tag == 'pre':
+            self._pre_depth += 1
+        elif tag in HEADING_LEVELS:
+            self._emit('#' * HEADING_LEVELS[tag] + ' ')
+        elif tag == 'li':
+            self._emit('- ')
+        elif tag == 'tr':
+            self._cell_index = 0
+        elif tag in ('td', 'th'):
+            if self._cell_index:
+                self._emit('\t')
+            self._cell_index += 1
+
+    def handle_endtag(self, tag):
+        if self._skip_stack:
+            if tag in self._skip_stack:
+                # Unwind to the matching element, tolerating unclosed children
+                while self._skip_stack.pop() != tag:
+                    pass
+            return
+
+        if tag == 'pre' and self._pre_depth:
+            self._pre_depth -= 1
+        if tag in PARAGRAPH_TAGS:
+            self._break(2)
+        elif tag in LINE_TAGS:
+            self._break(1)
+
+    def handle_data(self, data):
+        if self._skip_stack or not data:
+            return
+        if self._pre_depth:
+            self._emit(data)
+            return
+
+        leading_space = data[0].isspace()
+        trailing_space = data[-1].isspace()
+        text = WHITESPACE.sub(' ', data).strip()
+        if not text:
+            self._pending_space = self._pending_space or leading_space
+            return
+        if leading_space:
+            self._pending_space = True
+        self._emit(text)
+        self._pending_space = trailing_space
+
+
+def iter_html_text(text_chunks):
+    """Convert an iterable of HTML text chunks into readable text chunks"""
+    extractor = HTMLTextExtractor()
+    for chunk in text_chunks:
+        text = extractor.feed_text(chunk)
+        if text:
+            yield text
+    tail = extractor.finish()
+    if tail:
+        yield tail
+
+
+def html_to_text(html):
+    """Convert an HTML document to readable text"""
+    return ''.join(iter_html_text([html]))
@@ -0,0 +1,563 @@
+"""
+HTTP Range helpers for reading remote files without downloading them whole,
+and for resuming downloads that were cut off part way
+"""
+import io
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from resolver import pinned_connections
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)', re.IGNORECASE)
+
+
+class RangeNotSupported(Exception):
+    """Raised when the origin does not honour byte range requests"""
+
+
+class RangeBudgetExceeded(Exception):
+    """Raised when a range-backed file would fetch more than its byte budget"""
+
+
+class ResumeFailed(requests.RequestException):
+    """Raised when an interrupted download cannot be resumed"""
+
+
+# Errors that mean the connection dropped mid-transfer, not that the request was refused
+INTERRUPTED_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def parse_content_range(header):
+    """
+    Parse a Content-Range header.
+
+    Args:
+        header: Header value such as "bytes 0-1023/4096"
+
+    Returns:
+        tuple | None: (start, end, total) with total None when unknown
+    """
+    if not header:
+        return None
+    match = CONTENT_RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), None if total == '*' else int(total)
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file object backed by HTTP Range requests.
+
+    The remote file is split into fixed-size blocks which are fetched on
+    demand and kept in a small LRU cache, so a parser that seeks around
+    (like pypdf reading the trailer, xref and then individual objects)
+    only transfers the blocks it actually touches. Contiguous missing
+    blocks are fetched with a single request.
+    """
+
+    def __init__(self, url, size, timeout=30, block_size=256 * 1024,
+                 max_cached_blocks=64, max_bytes=None, etag=None):
+        super().__init__()
+        self.url = url
+        self.size = size
+        self.timeout = timeout
+        self.block_size = block_size
+        self.max_cached_blocks = max_cached_blocks
+        self.max_bytes = max_bytes
+        self.etag = etag
+        self.bytes_fetched = 0
+        self.requests_made = 0
+        self._position = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        if self._position >= self.size:
+            return 0
+        view = memoryview(buffer).cast('B')
+        # Never serve more than half the cache in one call so the blocks of
+        # the current read cannot evict each other.
+        max_read = self.block_size * max(1, self.max_cached_blocks // 2)
+        wanted = min(len(view), self.size - self._position, max_read)
+        if wanted <= 0:
+            return 0
+
+        start = self._position
+        end = start + wanted
+        first_block = start // self.block_size
+        last_block = (end - 1) // self.block_size
+
+        with self._lock:
+            self._ensure_blocks(first_block, last_block)
+            written = 0
+            for index in range(first_block, last_block + 1):
+                block = self._blocks[index]
+                self._blocks.move_to_end(index)
+                block_start = index * self.block_size
+                lo = max(start, block_start) - block_start
+                hi = min(end, block_start + len(block)) - block_start
+                view[written:written + hi - lo] = block[lo:hi]
+                written += hi - lo
+
+        self._position += written
+        return written
+
+    def seed_block(self, index, data):
+        """Store an already downloaded block (e.g. from the probe request)"""
+        with self._lock:
+            self._store_block(index, data)
+
+    def _ensure_blocks(self, first_block, last_block):
+        run_start = None
+        for index in range(first_block, last_block + 2):
+            missing = index <= last_block and index not in self._blocks
+            if index <= last_block and not missing:
+                self._blocks.move_to_end(index)
+            if missing and run_start is None:
+                run_start = index
+            elif not missing and run_start is not None:
+                self._fetch_blocks(run_start, index - 1)
+                run_start = None
+
+    def _fetch_blocks(self, first_block, last_block):
+        start = first_block * self.block_size
+        end = min((last_block + 1) * self.block_size, self.size) - 1
+        length = end - start + 1
+
+        if self.max_bytes is not None and self.bytes_fetched + length > self.max_bytes:
+            raise RangeBudgetExceeded(
+                f"Range reads would exceed {self.max_bytes} bytes"
+            )
+
+        headers = {'Range': f'bytes={start}-{end}'}
+        if self.etag:
+            headers['If-Range'] = self.etag
+
+        # Streamed, so a 200 with the whole file is refused before its body is read
+        response = requests.get(self.url, headers=headers, timeout=self.timeout, stream=True)
+        self.requests_made += 1
+        try:
+            if response.status_code != 206:
+                raise RangeNotSupported(
+                    f"Expected 206 for range {start}-{end}, got {response.status_code}"
+                )
+            content_range = parse_content_range(response.headers.get('Content-Range'))
+            if content_range and content_range[0] != start:
+                raise RangeNotSupported(
+                    f"Origin returned range starting at {content_range[0]} instead of {start}"
+                )
+
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                data += chunk
+                if len(data) > length:
+                    break
+        finally:
+            response.close()
+        if len(data) != length:
+            raise RangeNotSupported(
+                f"Range response of the wrong size: expected {length} bytes, got {len(data)}"
+            )
+        self.bytes_fetched += len(data)
+
+        for index in range(first_block, last_block + 1):
+            offset = (index - first_block) * self.block_size
+            self._store_block(index, data[offset:offset + self.block_size])
+
+    def _store_block(self, index, data):
+        self._blocks[index] = bytes(data)
+        self._blocks.move_to_end(index)
+        while len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+
+
+def open_range_file(url, timeout=30, block_size=256 * 1024, max_cached_blocks=64,
+                    max_bytes=None):
+    """
+    Probe an origin for byte range support and open a range-backed file.
+
+    The probe asks for the first block, which doubles as the cached header
+    block when the origin answers with 206 Partial Content.
+
+    Args:
+        url: URL of the remote file
+        timeout: Per-request timeout in seconds
+        block_size: Size of each fetched/cached block in bytes
+        max_cached_blocks: Maximum number of blocks kept in memory
+        max_bytes: Optional cap on the total bytes fetched
+
+    Returns:
+        tuple: (buffered_file, range_file). Both are None when the origin
+        does not support ranges, so the caller can fall back to a full
+        download.
+    """
+    headers = {'Range': f'bytes=0-{block_size - 1}'}
+    response = requests.get(url, headers=headers, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+        accept_ranges = response.headers.get('Accept-Ranges', '').lower()
+        if response.status_code != 206 or accept_ranges == 'none':
+            logger.info("Origin does not support range requests, falling back to full download")
+            return None, None
+
+        content_range = parse_content_range(response.headers.get('Content-Range'))
+        if not content_range or content_range[0] != 0 or content_range[2] is None:
+            logger.info("Origin returned an unusable Content-Range, falling back to full download")
+            return None, None
+
+        _, end, total = content_range
+        range_file = HTTPRangeFile(
+            url,
+            total,
+            timeout=timeout,
+            block_size=block_size,
+            max_cached_blocks=max_cached_blocks,
+            max_bytes=max_bytes,
+            etag=resume_validator(response.headers),
+        )
+        first_block = response.content
+        if len(first_block) != end + 1:
+            return None, None
+        range_file.bytes_fetched = len(first_block)
+        range_file.requests_made = 1
+        range_file.seed_block(0, first_block)
+        return io.BufferedReader(range_file, buffer_size=min(block_size, 64 * 1024)), range_file
+    finally:
+        response.close()
+
+
+def resume_validator(headers):
+    """
+    Validator that lets a resumed request prove the file has not changed.
+
+    Args:
+        headers: Headers of the original response
+
+    Returns:
+        str | None: A strong ETag, else Last-Modified, else None (weak
+        ETags cannot be used with If-Range)
+    """
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+class ResumableDownload:
+    """
+    Download body that resumes with Range requests after a dropped connection.
+
+    Wraps a streamed response and offers the same iter_content() / close()
+    / headers interface. When the connection fails part way (or closes
+    before Content-Length bytes arrived) the rest of the file is requested
+    with "Range: bytes=<received>-" and If-Range set to the original
+    ETag (or Last-Modified), so a file that changed in between is never
+    stitched together from two versions. Retries are limited to
+    max_retries and wait a jittered exponential backoff.
+
+    Every request is recorded in attempts with the offset it started at,
+    the bytes it delivered, its duration and the error that ended it.
+    on_close, if set, is called once when the download is closed.
+
+    A response to a range request (e.g. one segment of a segmented
+    download) passes offset and end, the byte range it covers, so resumes
+    ask for the rest of that range only.
+
+    pins, the vetted addresses from resolver.current_pins() when the
+    download was opened, are used for every later request, so resumes and
+    their redirects are held to the same SSRF checks as the first request.
+    """
+
+    def __init__(self, response, url=None, timeout=30, max_retries=3, backoff=0.5,
+                 max_backoff=8.0, sleep=None, offset=0, end=None, pins=None):
+        self.response = response
+        self.url = url or response.url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep or time.sleep
+        self.headers = response.headers
+        self.validator = resume_validator(response.headers)
+        self.offset = offset
+        self.end = end
+        self.received = 0
+        self.retries = 0
+        self.attempts = []
+        self.segments = 0
+        self.on_close = None
+        self.closed = False
+        self.pins = pins
+
+        content_length = response.headers.get('Content-Length', '')
+        self.total = int(content_length) if content_length.isdigit() else None
+        # Offsets of an encoded body do not match the decoded bytes we count
+        self.identity = response.headers.get('Content-Encoding', 'identity').lower() == 'identity'
+        self.resumable = (
+            self.validator is not None
+            and self.identity
+            and response.headers.get('Accept-Ranges', '').lower() != 'none'
+        )
+
+    @property
+    def resumed(self):
+        return len(self.attempts) > 1
+
+    @property
+    def mode(self):
+        if self.segments:
+            return 'segmented'
+        return 'resumed' if self.resumed else 'download'
+
+    def iter_content(self, chunk_size=8192):
+        """Yield the body, resuming after interruptions until it is complete"""
+        response = self.response
+        attempt = self._start_attempt(self.offset)
+        while True:
+            try:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        self.received += len(chunk)
+                        attempt['bytes'] += len(chunk)
+                        yield chunk
+                # Content-Length counts encoded bytes; decoded bodies are not comparable
+                if self.identity and self.total is not None and self.received < self.total:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Connection closed after {self.received} of {self.total} bytes"
+                    )
+                self._finish_attempt(attempt)
+                return
+            except INTERRUPTED_ERRORS as e:
+                self._finish_attempt(attempt, e)
+                response.close()
+                if not self.resumable or self.received == 0:
+                    raise
+                response, attempt = self._resume(e)
+                self.response = response
+
+    def close(self):
+        """Close the current response and run on_close; later calls do nothing"""
+        if self.closed:
+            return
+        self.closed = True
+        self.response.close()
+        callback, self.on_close = self.on_close, None
+        if callback is not None:
+            callback()
+
+    def transfer_info(self):
+        """Summary of the download for responses and logs"""
+        info = {
+            'mode': self.mode,
+            'bytes_fetched': sum(attempt['bytes'] for attempt in self.attempts),
+            'file_size': self.total,
+            'requests': len(self.attempts),
+            'attempts': [
+                {key: value for key, value in attempt.items() if not key.startswith('_')}
+                for attempt in self.attempts
+            ],
+        }
+        if self.segments:
+            info['segments'] = self.segments
+        return info
+
+    def can_segment(self, min_size):
+        """Whether the file is large enough and the origin advertises byte ranges"""
+        return (
+            self.resumable
+            and self.offset == 0
+            and self.total is not None
+            and self.total >= min_size
+            and self.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        )
+
+    def write_segments(self, fd, segments, chunk_size=64 * 1024):
+        """
+        Download the file into fd with concurrent Range requests.
+
+        The file is preallocated to its full size and split into equal
+        segments. The first segment is read from the already open response;
+        the others are requested with If-Range and written at their offset,
+        each resuming on its own if its connection drops. No segment writes
+        past its end, so at most Content-Length bytes reach the file.
+
+        Args:
+            fd: File descriptor opened for writing
+            segments: Number of concurrent segments
+            chunk_size: Read size per segment
+
+        Returns:
+            int: Bytes written
+        """
+        size = self.total
+        os.ftruncate(fd, size)
+        step = -(-size // segments)
+        bounds = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+        self.segments = len(bounds)
+        failed = threading.Event()
+
+        def write_range(chunks, start, end):
+            position = start
+            for chunk in chunks:
+                if failed.is_set():
+                    raise ResumeFailed("Another segment failed")
+                chunk = chunk[:end + 1 - position]
+                os.pwrite(fd, chunk, position)
+                position += len(chunk)
+                if position > end:
+                    break
+            if position <= end:
+                raise ResumeFailed(f"Segment {start}-{end} ended at byte {position}")
+            return position - start
+
+        def first_segment():
+            chunks = self.iter_content(chunk_size)
+            try:
+                return write_range(chunks, *bounds[0])
+            finally:
+                chunks.close()
+                self.close()
+                if self.attempts and '_started' in self.attempts[-1]:
+                    self._finish_attempt(self.attempts[-1])
+
+        def other_segment(start, end):
+            # Pool threads have no pinned scope of their own; _request enters the download's
+            response = self._request({'Range': f'bytes={start}-{end}', 'If-Range': self.validator})
+            content_range = parse_content_range(response.headers.get('Content-Range'))
+            etag = response.headers.get('ETag')
+            if (response.status_code != 206 or not content_range or content_range[0] != start
+                    or (etag is not None and etag != self.headers.get('ETag'))):
+                response.close()
+                raise ResumeFailed(f"Segment {start}-{end} was answered with {response.status_code}")
+            part = ResumableDownload(
+                response, self.url, timeout=self.timeout, max_retries=self.max_retries,
+                backoff=self.backoff, max_backoff=self.max_backoff, sleep=self.sleep,
+                offset=start, end=end, pins=self.pins,
+            )
+            part.validator = self.validator
+            try:
+                return write_range(part.iter_content(chunk_size), start, end), part
+            finally:
+                part.close()
+                for attempt in part.attempts:
+                    attempt['status'] = attempt['status'] or 206
+                    if '_started' in attempt:
+                        part._finish_attempt(attempt)
+
+        with ThreadPoolExecutor(max_workers=len(bounds)) as executor:
+            others = [executor.submit(other_segment, start, end) for start, end in bounds[1:]]
+            try:
+                written = first_segment()
+                for future in others:
+                    count, part = future.result()
+                    written += count
+                    self.attempts.extend(part.attempts)
+            except BaseException:
+                failed.set()
+                raise
+        logger.info(f"Segmented download of {size} bytes in {len(bounds)} segments")
+        return written
+
+    def _start_attempt(self, start, status=None):
+        attempt = {'start': start, 'bytes': 0, 'status': status, 'seconds': None, 'error': None}
+        attempt['_started'] = time.monotonic()
+        self.attempts.append(attempt)
+        return attempt
+
+    def _finish_attempt(self, attempt, error=None):
+        attempt['seconds'] = round(time.monotonic() - attempt.pop('_started'), 4)
+        if error is not None:
+            attempt['error'] = str(error)
+        logger.info(
+            "Download attempt %d from byte %d: %d bytes in %ss%s",
+            len(self.attempts), attempt['start'], attempt['bytes'], attempt['seconds'],
+            f", interrupted: {attempt['error']}" if error is not None else '',
+            extra={'event': 'download_attempt', 'start': attempt['start'], 'bytes': attempt['bytes'],
+                   'seconds': attempt['seconds'], 'error': attempt['error']}
+        )
+
+    def _request(self, headers):
+        """GET the URL, inside the pinned scope the download was opened in"""
+        if self.pins is None:
+            return requests.get(self.url, headers=headers, timeout=self.timeout, stream=True)
+        with pinned_connections(self.pins):
+            return requests.get(self.url, headers=headers, timeout=self.timeout, stream=True)
+
+    def _resume(self, error):
+        """Request the rest of the file, retrying with backoff; returns (response, attempt)"""
+        last_error = error
+        while self.retries < self.max_retries:
+            self.retries += 1
+            # Full jitter spreads retries of many clients hitting one flaky origin
+            self.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (self.retries - 1))))
+
+            start = self.offset + self.received
+            attempt = self._start_attempt(start)
+            end = '' if self.end is None else self.end
+            headers = {'Range': f'bytes={start}-{end}', 'If-Range': self.validator}
+            try:
+                response = self._request(headers)
+            except INTERRUPTED_ERRORS as e:
+                self._finish_attempt(attempt, e)
+                last_error = e
+                continue
+
+            attempt['status'] = response.status_code
+            if response.status_code == 206:
+                content_range = parse_content_range(response.headers.get('Content-Range'))
+                etag = response.headers.get('ETag')
+                if (content_range and content_range[0] == start
+                        and (etag is None or etag == self.headers.get('ETag'))):
+                    return response, attempt
+                reason = f"origin returned range {response.headers.get('Content-Range')}"
+            elif response.status_code == 429 or response.status_code >= 500:
+                response.close()
+                last_error = requests.HTTPError(f"{response.status_code} while resuming")
+                self._finish_attempt(attempt, last_error)
+                continue
+            elif response.status_code == 200:
+                reason = 'file changed or ranges are not supported'
+            else:
+                reason = f"origin answered {response.status_code}"
+            response.close()
+            self._finish_attempt(attempt, reason)
+            raise ResumeFailed(f"Download interrupted after {self.received} bytes and could not be resumed: {reason}")
+
+        raise ResumeFailed(
+            f"Download interrupted after {self.received} bytes; gave up after {self.retries} retries: {last_error}"
+        )
@@ -0,0 +1,130 @@
+"""
+Worker memory governor
+
+Parsers such as pypdf and python-docx fragment the heap and keep caches,
+so a worker's resident set grows over hundreds of large files and is not
+given back. The governor reads the worker's RSS before and after each
+extraction, keeps the deltas per file type (to show which formats grow
+the heap) and, once RSS stays above the soft limit after a garbage
+collection, asks the worker to retire. Under gunicorn the post_request
+hook in gunicorn.conf.py then lets the worker finish its in-flight
+requests and exit, and the arbiter starts a fresh one.
+
+RSS is read from /proc/self/statm, or with psutil where /proc is missing.
+"""
+import gc
+import logging
+import os
+import threading
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """
+    Resident set size of this process
+
+    Returns:
+        int | None: Bytes, or None where it cannot be measured
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as file:
+            return int(file.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class MemoryGovernor:
+    """
+    Tracks per-request RSS deltas and decides when the worker retires
+
+    Deltas are exact with one request per process at a time (gunicorn's
+    sync workers); with threads, concurrent requests share the growth.
+
+        rss_before = governor.begin()
+        ...
+        governor.end(rss_before, '.pdf')
+        if governor.should_retire: ...
+    """
+
+    def __init__(self, soft_limit=0, measure=current_rss):
+        self.soft_limit = soft_limit
+        self._measure = measure
+        self._lock = threading.Lock()
+        self.formats = {}
+        self.requests = 0
+        self.rss = None
+        self.should_retire = False
+
+    def begin(self):
+        """RSS at the start of a request, or None where it cannot be measured"""
+        return self._measure()
+
+    def end(self, rss_before, label):
+        """
+        Record a finished request and check the soft limit
+
+        Args:
+            rss_before: Result of begin()
+            label: Group of the request in the report, e.g. its file type
+        """
+        if rss_before is None:
+            return
+        rss = self._measure()
+        delta = rss - rss_before
+        with self._lock:
+            self.requests += 1
+            self.rss = rss
+            stats = self.formats.setdefault(label, {'requests': 0, 'growth': 0, 'max_delta': 0})
+            stats['requests'] += 1
+            stats['growth'] += delta
+            stats['max_delta'] = max(stats['max_delta'], delta)
+        if self.soft_limit and rss > self.soft_limit and not self.should_retire:
+            self._check_limit()
+
+    def _check_limit(self):
+        # Unreachable cycles can hold whole parsed documents; give them back first
+        gc.collect()
+        rss = self._measure()
+        self.rss = rss
+        if rss <= self.soft_limit:
+            return
+        self.should_retire = True
+        worst = sorted(self.formats.items(), key=lambda item: item[1]['growth'], reverse=True)[:3]
+        logger.warning(
+            "Worker RSS %.1fMB is over the %.1fMB soft limit after %d requests; retiring. Largest growth: %s",
+            rss / 2 ** 20, self.soft_limit / 2 ** 20, self.requests,
+            ', '.join(f"{label} {stats['growth'] / 2 ** 20:+.1f}MB" for label, stats in worst),
+            extra={'event': 'memory_retire', 'rss': rss, 'requests': self.requests}
+        )
+
+    def stats(self):
+        """RSS, soft limit and per-format growth of this worker, in MB"""
+        with self._lock:
+            formats = {
+                label: {
+                    'requests': stats['requests'],
+                    'growth_mb': round(stats['growth'] / 2 ** 20, 2),
+                    'avg_delta_kb': round(stats['growth'] / stats['requests'] / 1024, 1),
+                    'max_delta_mb': round(stats['max_delta'] / 2 ** 20, 2),
+                }
+                for label, stats in self.formats.items()
+            }
+        return {
+            'rss_mb': round(self.rss / 2 ** 20, 1) if self.rss is not None else None,
+            'soft_limit_mb': round(self.soft_limit / 2 ** 20, 1) if self.soft_limit else None,
+            'requests': self.requests,
+            'retiring': self.should_retire,
+            'formats': formats,
+        }
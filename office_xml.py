@@ -0,0 +1,596 @@
+"""
+Streaming readers for zip-packaged XML office documents
+
+XLSX, PPTX and OpenDocument files are zip packages of XML parts. Only the
+parts that hold text are opened; media and other binary parts are never
+read. Parts are parsed with iterparse and every element is dropped from
+the tree as soon as it has been handled, so memory depends on the largest
+single record (a row, a paragraph) rather than on the size of the part.
+"""
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+SPREADSHEET_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+OFFICE_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PACKAGE_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DRAWING_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+PRESENTATION_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+NOTES_SLIDE_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+
+ODF_TEXT_NS = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+ODF_TABLE_NS = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+ODF_DRAW_NS = 'urn:oasis:names:tc:opendocument:xmlns:drawing:1.0'
+ODF_PRESENTATION_NS = 'urn:oasis:names:tc:opendocument:xmlns:presentation:1.0'
+
+# Upper bound for ODF repeated rows/columns that carry content; empty
+# repeats (often 1M rows or 16K columns) are never expanded
+ODF_MAX_REPEAT = 1000
+
+# Widest row kept (Excel's and LibreOffice's column limit); cells beyond it
+# are dropped, so gaps and repeats cannot pad a row without bound
+MAX_COLUMNS = 16384
+
+
+def qualified(namespace, tag):
+    """ElementTree tag name for tag in namespace"""
+    return f'{{{namespace}}}{tag}'
+
+
+def iter_member_events(archive, member, tags, start_tags=()):
+    """
+    Stream the elements with the given tags out of a zip member.
+
+    Each element in tags is yielded as ('end', element) once it is
+    complete (children included) and is removed from the tree afterwards,
+    together with every other finished element outside a match. Elements
+    in start_tags are yielded as ('start', element) when they open, with
+    their attributes but no children. Callers must copy what they need
+    before advancing the iterator.
+
+    Args:
+        archive: Open zipfile.ZipFile
+        member: Member name
+        tags: Set of qualified tag names to yield when complete
+        start_tags: Set of qualified tag names to yield when opened
+
+    Yields:
+        tuple: (event, xml.etree.ElementTree.Element)
+    """
+    with archive.open(member) as stream:
+        stack = []
+        inside_match = 0
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                if element.tag in tags:
+                    inside_match += 1
+                elif element.tag in start_tags and not inside_match:
+                    yield 'start', element
+                continue
+
+            stack.pop()
+            if element.tag in tags:
+                inside_match -= 1
+                if inside_match:
+                    continue
+                yield 'end', element
+            elif inside_match:
+                continue
+            if stack:
+                stack[-1].remove(element)
+
+
+def iter_member_elements(archive, member, tags):
+    """Stream complete elements with the given tags (see iter_member_events)"""
+    for _, element in iter_member_events(archive, member, tags):
+        yield element
+
+
+def has_member(archive, member):
+    """Whether a zip archive contains member, without listing all names"""
+    try:
+        archive.getinfo(member)
+        return True
+    except KeyError:
+        return False
+
+
+def _relationships(archive, rels_member, base_dir):
+    """Map relationship ids to (member name, relationship type) from a .rels part"""
+    if not has_member(archive, rels_member):
+        return {}
+    relationships = {}
+    relationship = qualified(PACKAGE_REL_NS, 'Relationship')
+    for element in iter_member_elements(archive, rels_member, {relationship}):
+        if element.get('TargetMode') == 'External':
+            continue
+        target = element.get('Target', '')
+        if target.startswith('/'):
+            member = target.lstrip('/')
+        else:
+            member = posixpath.normpath(posixpath.join(base_dir, target))
+        relationships[element.get('Id')] = (member, element.get('Type', ''))
+    return relationships
+
+
+def _part_relationships(archive, member):
+    """Relationships of a package part, resolved relative to the part"""
+    directory, name = posixpath.split(member)
+    return _relationships(archive, posixpath.join(directory, '_rels', name + '.rels'), directory)
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+
+def column_index(reference):
+    """Zero-based column index of a cell reference such as "AB12"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - ord('A') + 1)
+    return index - 1
+
+
+class SharedStrings:
+    """
+    Lazily decoded shared-strings table of a workbook.
+
+    The table is parsed only as far as the highest index requested so far,
+    so sheets that reference few strings never decode the whole part.
+    """
+
+    def __init__(self, archive, member='xl/sharedStrings.xml'):
+        self._strings = []
+        if has_member(archive, member):
+            self._items = iter_member_elements(archive, member, {qualified(SPREADSHEET_NS, 'si')})
+        else:
+            self._items = None
+
+    def __getitem__(self, index):
+        while len(self._strings) <= index:
+            item = next(self._items, None) if self._items else None
+            if item is None:
+                raise IndexError(f'Shared string {index} out of range')
+            self._strings.append(rich_text(item))
+        return self._strings[index]
+
+    def close(self):
+        if self._items:
+            self._items.close()
+
+
+def rich_text(element):
+    """Text of an <si> or <is> element, skipping phonetic runs"""
+    text_tag = qualified(SPREADSHEET_NS, 't')
+    run_tag = qualified(SPREADSHEET_NS, 'r')
+    parts = []
+    for child in element:
+        if child.tag == text_tag:
+            parts.append(child.text or '')
+        elif child.tag == run_tag:
+            run_text = child.find(text_tag)
+            if run_text is not None:
+                parts.append(run_text.text or '')
+    return ''.join(parts)
+
+
+class SpreadsheetReader:
+    """
+    Base class for row-by-row workbook readers.
+
+    Subclasses set self.sheets to (name, key) pairs in workbook order and
+    implement iter_rows(key).
+    """
+
+    sheets = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        pass
+
+    def select_sheets(self, selection=None):
+        """
+        Resolve a sheet selection to (name, key) pairs.
+
+        Args:
+            selection: None for all sheets, or a list of sheet names and
+                1-based sheet numbers
+
+        Raises:
+            ValueError: If a selected sheet does not exist
+        """
+        if not selection:
+            return list(self.sheets)
+
+        selected = []
+        for item in selection:
+            match = next((sheet for sheet in self.sheets if sheet[0] == str(item)), None)
+            if match is None and str(item).isdigit() and 1 <= int(item) <= len(self.sheets):
+                match = self.sheets[int(item) - 1]
+            if match is None:
+                raise ValueError(f'Sheet not found: {item}')
+            if match not in selected:
+                selected.append(match)
+        return selected
+
+    def iter_rows(self, key):
+        """Stream the rows of a sheet as lists of cell strings"""
+        raise NotImplementedError
+
+
+class XLSXReader(SpreadsheetReader):
+    """
+    Row-by-row reader for .xlsx workbooks.
+
+    Usage:
+        with XLSXReader(path) as reader:
+            for name, member in reader.select_sheets(['Summary', 2]):
+                for row in reader.iter_rows(member):
+                    ...
+    """
+
+    def __init__(self, file_path):
+        self.archive = zipfile.ZipFile(file_path)
+        try:
+            self.sheets = self._list_sheets()
+            self.shared_strings = SharedStrings(self.archive)
+        except Exception:
+            self.archive.close()
+            raise
+
+    def close(self):
+        self.shared_strings.close()
+        self.archive.close()
+
+    def _list_sheets(self):
+        """(name, member) pairs in workbook order"""
+        names = set(self.archive.namelist())
+        if 'xl/workbook.xml' not in names:
+            raise ValueError('Not an XLSX workbook')
+
+        targets = {
+            rel_id: member
+            for rel_id, (member, _) in _part_relationships(self.archive, 'xl/workbook.xml').items()
+        }
+        sheet_tag = qualified(SPREADSHEET_NS, 'sheet')
+        rel_id = qualified(OFFICE_REL_NS, 'id')
+        sheets = []
+        for element in iter_member_elements(self.archive, 'xl/workbook.xml', {sheet_tag}):
+            member = targets.get(element.get(rel_id))
+            if member in names:
+                sheets.append((element.get('name'), member))
+
+        if not sheets:
+            # Workbooks without relationships: fall back to the part names
+            members = sorted(
+                (name for name in names if re.match(r'xl/worksheets/sheet\d+\.xml$', name)),
+                key=_natural_key
+            )
+            sheets = [(posixpath.splitext(posixpath.basename(m))[0], m) for m in members]
+        return sheets
+
+    def iter_rows(self, member):
+        """
+        Stream the rows of a worksheet as lists of cell strings.
+
+        Gaps between referenced cells are filled with empty strings and
+        trailing empty cells are dropped.
+        """
+        row_tag = qualified(SPREADSHEET_NS, 'row')
+        cell_tag = qualified(SPREADSHEET_NS, 'c')
+        value_tag = qualified(SPREADSHEET_NS, 'v')
+        inline_tag = qualified(SPREADSHEET_NS, 'is')
+
+        for row in iter_member_elements(self.archive, member, {row_tag}):
+            values = []
+            for cell in row.iter(cell_tag):
+                reference = cell.get('r')
+                if reference:
+                    position = column_index(reference)
+                    if position >= MAX_COLUMNS:
+                        continue
+                    if position > len(values):
+                        values.extend([''] * (position - len(values)))
+
+                cell_type = cell.get('t')
+                if cell_type == 'inlineStr':
+                    inline = cell.find(inline_tag)
+                    value = rich_text(inline) if inline is not None else ''
+                else:
+                    value_element = cell.find(value_tag)
+                    value = (value_element.text or '') if value_element is not None else ''
+                    if cell_type == 's' and value:
+                        value = self.shared_strings[int(value)]
+                    elif cell_type == 'b' and value:
+                        value = 'TRUE' if value == '1' else 'FALSE'
+                values.append(value)
+
+            while values and not values[-1]:
+                values.pop()
+            yield values
+
+
+def drawing_paragraph_text(paragraph):
+    """Text of a DrawingML <a:p> paragraph, with line breaks kept"""
+    text_tag = qualified(DRAWING_NS, 't')
+    break_tag = qualified(DRAWING_NS, 'br')
+    parts = []
+    for element in paragraph.iter():
+        if element.tag == text_tag:
+            parts.append(element.text or '')
+        elif element.tag == break_tag:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+class PPTXReader:
+    """
+    Slide-by-slide reader for .pptx presentations.
+
+    Slides are read in presentation order from their own parts; speaker
+    notes come from the body placeholder of each slide's notes part.
+    """
+
+    def __init__(self, file_path):
+        self.archive = zipfile.ZipFile(file_path)
+        try:
+            self.slides = self._list_slides()
+        except Exception:
+            self.archive.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.archive.close()
+
+    def _list_slides(self):
+        """Slide part names in presentation order"""
+        names = set(self.archive.namelist())
+        if 'ppt/presentation.xml' not in names:
+            raise ValueError('Not a PPTX presentation')
+
+        relationships = _part_relationships(self.archive, 'ppt/presentation.xml')
+        slide_id_tag = qualified(PRESENTATION_NS, 'sldId')
+        rel_id = qualified(OFFICE_REL_NS, 'id')
+        slides = []
+        for element in iter_member_elements(self.archive, 'ppt/presentation.xml', {slide_id_tag}):
+            member, _ = relationships.get(element.get(rel_id), (None, None))
+            if member in names:
+                slides.append(member)
+
+        if not slides:
+            slides = sorted(
+                (name for name in names if re.match(r'ppt/slides/slide\d+\.xml$', name)),
+                key=_natural_key
+            )
+        return slides
+
+    def slide_text(self, member):
+        """Text of a slide, one line per non-empty paragraph"""
+        paragraph_tag = qualified(DRAWING_NS, 'p')
+        lines = (drawing_paragraph_text(p) for p in iter_member_elements(self.archive, member, {paragraph_tag}))
+        return '\n'.join(line for line in lines if line.strip())
+
+    def notes_text(self, member):
+        """Speaker notes of a slide, or an empty string"""
+        notes_member = next(
+            (target for target, rel_type in _part_relationships(self.archive, member).values()
+             if rel_type == NOTES_SLIDE_REL),
+            None
+        )
+        if notes_member is None or not has_member(self.archive, notes_member):
+            return ''
+
+        shape_tag = qualified(PRESENTATION_NS, 'sp')
+        placeholder_path = '/'.join(qualified(PRESENTATION_NS, tag) for tag in ('nvSpPr', 'nvPr', 'ph'))
+        paragraph_tag = qualified(DRAWING_NS, 'p')
+        lines = []
+        for shape in iter_member_elements(self.archive, notes_member, {shape_tag}):
+            # Only the body placeholder holds notes; others are the slide
+            # image, slide number, header and footer
+            placeholder = shape.find(placeholder_path)
+            if placeholder is None or placeholder.get('type') != 'body':
+                continue
+            lines.extend(drawing_paragraph_text(p) for p in shape.iter(paragraph_tag))
+        return '\n'.join(line for line in lines if line.strip())
+
+    def iter_slides(self, selection=None):
+        """
+        Stream slides as (number, text, notes) tuples.
+
+        Args:
+            selection: Optional zero-based slide indices
+        """
+        indices = range(len(self.slides)) if selection is None else selection
+        for index in indices:
+            if 0 <= index < len(self.slides):
+                member = self.slides[index]
+                yield index + 1, self.slide_text(member), self.notes_text(member)
+
+
+def odf_text(element):
+    """Text of an ODF paragraph or heading, expanding spaces, tabs and breaks"""
+    space_tag = qualified(ODF_TEXT_NS, 's')
+    tab_tag = qualified(ODF_TEXT_NS, 'tab')
+    break_tag = qualified(ODF_TEXT_NS, 'line-break')
+    count_attr = qualified(ODF_TEXT_NS, 'c')
+    parts = []
+
+    def walk(node):
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            if child.tag == space_tag:
+                parts.append(' ' * int(child.get(count_attr, '1')))
+            elif child.tag == tab_tag:
+                parts.append('\t')
+            elif child.tag == break_tag:
+                parts.append('\n')
+            else:
+                walk(child)
+            if child.tail:
+                parts.append(child.tail)
+
+    walk(element)
+    return ''.join(parts)
+
+
+def open_odf(file_path):
+    """Open an OpenDocument package, checking that it has a content part"""
+    archive = zipfile.ZipFile(file_path)
+    if not has_member(archive, 'content.xml'):
+        archive.close()
+        raise ValueError('Not an OpenDocument file')
+    return archive
+
+
+def iter_odt_paragraphs(file_path):
+    """
+    Stream the paragraphs and headings of an .odt document in order.
+
+    Headings are prefixed with "#" per outline level.
+    """
+    paragraph_tag = qualified(ODF_TEXT_NS, 'p')
+    heading_tag = qualified(ODF_TEXT_NS, 'h')
+    level_attr = qualified(ODF_TEXT_NS, 'outline-level')
+    with open_odf(file_path) as archive:
+        for element in iter_member_elements(archive, 'content.xml', {paragraph_tag, heading_tag}):
+            text = odf_text(element)
+            if not text.strip():
+                continue
+            if element.tag == heading_tag:
+                text = '#' * int(element.get(level_attr, '1')) + ' ' + text
+            yield text
+
+
+def iter_odp_slides(file_path, selection=None):
+    """
+    Stream the slides of an .odp presentation as (number, text, notes).
+
+    Args:
+        file_path: Path to the presentation
+        selection: Optional zero-based slide indices
+    """
+    page_tag = qualified(ODF_DRAW_NS, 'page')
+    paragraph_tag = qualified(ODF_TEXT_NS, 'p')
+    heading_tag = qualified(ODF_TEXT_NS, 'h')
+    notes_tag = qualified(ODF_PRESENTATION_NS, 'notes')
+    wanted = set(selection) if selection is not None else None
+
+    def finished(number, lines, notes):
+        if number and (wanted is None or number - 1 in wanted):
+            return number, '\n'.join(lines), '\n'.join(notes)
+        return None
+
+    with open_odf(file_path) as archive:
+        number, lines, notes = 0, [], []
+        events = iter_member_events(
+            archive, 'content.xml', {paragraph_tag, heading_tag, notes_tag}, start_tags={page_tag}
+        )
+        for event, element in events:
+            if event == 'start':
+                slide = finished(number, lines, notes)
+                if slide:
+                    yield slide
+                number, lines, notes = number + 1, [], []
+                if wanted is not None and number - 1 > max(wanted, default=-1):
+                    return
+            elif element.tag == notes_tag:
+                notes.extend(odf_text(p) for p in element.iter(paragraph_tag))
+                notes = [line for line in notes if line.strip()]
+            else:
+                text = odf_text(element)
+                if text.strip():
+                    lines.append(text)
+        slide = finished(number, lines, notes)
+        if slide:
+            yield slide
+
+
+class ODSReader(SpreadsheetReader):
+    """
+    Row-by-row reader for .ods spreadsheets.
+
+    All sheets live in content.xml, so each sheet is read with its own
+    streaming pass that skips the rows of the other sheets.
+    """
+
+    def __init__(self, file_path):
+        self.archive = open_odf(file_path)
+        try:
+            self.sheets = self._list_sheets()
+        except Exception:
+            self.archive.close()
+            raise
+
+    def close(self):
+        self.archive.close()
+
+    def _list_sheets(self):
+        table_tag = qualified(ODF_TABLE_NS, 'table')
+        name_attr = qualified(ODF_TABLE_NS, 'name')
+        sheets = []
+        for _, element in iter_member_events(self.archive, 'content.xml', (), start_tags={table_tag}):
+            sheets.append((element.get(name_attr) or f'Sheet{len(sheets) + 1}', len(sheets)))
+        return sheets
+
+    def iter_rows(self, key):
+        """
+        Stream the rows of the sheet at index key as lists of cell strings.
+
+        Repeated cells and rows are expanded up to ODF_MAX_REPEAT when they
+        carry content; empty rows and trailing empty cells are dropped, and
+        rows are cut at MAX_COLUMNS.
+        """
+        table_tag = qualified(ODF_TABLE_NS, 'table')
+        row_tag = qualified(ODF_TABLE_NS, 'table-row')
+        cell_tags = (qualified(ODF_TABLE_NS, 'table-cell'), qualified(ODF_TABLE_NS, 'covered-table-cell'))
+        paragraph_tag = qualified(ODF_TEXT_NS, 'p')
+        columns_attr = qualified(ODF_TABLE_NS, 'number-columns-repeated')
+        rows_attr = qualified(ODF_TABLE_NS, 'number-rows-repeated')
+
+        table_index = -1
+        events = iter_member_events(self.archive, 'content.xml', {row_tag}, start_tags={table_tag})
+        for event, element in events:
+            if event == 'start':
+                table_index += 1
+                if table_index > key:
+                    return
+                continue
+            if table_index != key:
+                continue
+
+            values = []
+            pending_empty = 0
+            for cell in element:
+                if cell.tag not in cell_tags:
+                    continue
+                repeat = int(cell.get(columns_attr, '1'))
+                value = '\n'.join(odf_text(p) for p in cell.iter(paragraph_tag))
+                if not value:
+                    pending_empty += repeat
+                    continue
+                if len(values) + pending_empty >= MAX_COLUMNS:
+                    break
+                values.extend([''] * pending_empty)
+                pending_empty = 0
+                values.extend([value] * min(repeat, ODF_MAX_REPEAT, MAX_COLUMNS - len(values)))
+
+            if not values:
+                continue
+            for _ in range(min(int(element.get(rows_attr, '1')), ODF_MAX_REPEAT)):
+                yield list(values)
@@ -0,0 +1,279 @@
+"""
+Opt-in profiling of extraction requests
+
+A PROFILE_SAMPLE_RATE fraction of requests runs under cProfile. Requests
+that are still running after PROFILE_SLOW_THRESHOLD seconds have their
+stack sampled by a background thread from then on, so slow requests are
+captured without profiling every request. Profiles are kept with the
+input's hash and file type in a bounded directory shared by the workers,
+oldest first out.
+
+cProfile data is stored in the marshal format read by pstats and tools
+such as snakeviz; stack samples as collapsed stacks ("a;b;c 12" lines)
+for flame graph tools.
+"""
+import cProfile
+import json
+import logging
+import marshal
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+# Stored format of each kind of profile: (file suffix, mimetype)
+PROFILE_FORMATS = {
+    'pstats': ('.prof', 'application/octet-stream'),
+    'collapsed': ('.folded', 'text/plain'),
+}
+
+
+class ProfileStore:
+    """
+    Ring buffer of profiles on disk, shared by the worker processes
+
+    Each profile is a data file plus a JSON file of metadata; once more
+    than max_profiles are stored the oldest are deleted.
+    """
+
+    def __init__(self, directory, max_profiles=50):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _meta_path(self, profile_id):
+        return os.path.join(self.directory, profile_id + '.json')
+
+    def _data_path(self, profile_id, profile_format):
+        return os.path.join(self.directory, profile_id + PROFILE_FORMATS[profile_format][0])
+
+    def save(self, data, profile_format, metadata):
+        """
+        Store a profile, evicting the oldest beyond max_profiles
+
+        Args:
+            data: Profile bytes
+            profile_format: "pstats" or "collapsed"
+            metadata: JSON-serialisable dict describing the request
+
+        Returns:
+            str: Profile identifier
+        """
+        profile_id = secrets.token_urlsafe(12)
+        record = dict(metadata, id=profile_id, format=profile_format, size=len(data), created=time.time())
+        data_path = self._data_path(profile_id, profile_format)
+        meta_path = self._meta_path(profile_id)
+        with open(data_path + '.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(data_path + '.tmp', data_path)
+        # The metadata file is written last: it is what makes a profile visible
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as file:
+            json.dump(record, file)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._evict()
+        return profile_id
+
+    def list(self):
+        """Metadata of the stored profiles, newest first"""
+        records = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            record = self._read_meta(name[:-len('.json')])
+            if record is not None:
+                records.append(record)
+        records.sort(key=lambda record: record['created'], reverse=True)
+        return records
+
+    def get(self, profile_id):
+        """
+        Read a stored profile
+
+        Returns:
+            tuple | None: (metadata, data), or None if unknown or evicted
+        """
+        if not PROFILE_ID_RE.match(profile_id or ''):
+            return None
+        record = self._read_meta(profile_id)
+        if record is None:
+            return None
+        try:
+            with open(self._data_path(profile_id, record['format']), 'rb') as file:
+                return record, file.read()
+        except OSError:
+            return None
+
+    def _read_meta(self, profile_id):
+        try:
+            with open(self._meta_path(profile_id), encoding='utf-8') as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return record if record.get('format') in PROFILE_FORMATS else None
+
+    def _evict(self):
+        with self._lock:
+            for record in self.list()[self.max_profiles:]:
+                # Another worker may be evicting the same profile
+                for path in (self._meta_path(record['id']), self._data_path(record['id'], record['format'])):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+
+
+def collapse_stack(frame):
+    """One collapsed-stack line key, outermost frame first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples the stacks of watched threads that have run past a threshold
+
+    A single daemon thread wakes every interval seconds; threads younger
+    than the threshold cost a dict entry and nothing else.
+    """
+
+    def __init__(self, threshold, interval=0.01):
+        self.threshold = threshold
+        self.interval = interval
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def watch(self):
+        """Start watching the calling thread"""
+        with self._lock:
+            self._watched[threading.get_ident()] = (time.monotonic(), Counter())
+            # Threads do not survive a fork; start one per worker process
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def unwatch(self):
+        """
+        Stop watching the calling thread
+
+        Returns:
+            Counter: Samples per collapsed stack, empty if the thread
+            never ran past the threshold
+        """
+        with self._lock:
+            entry = self._watched.pop(threading.get_ident(), None)
+        return entry[1] if entry else Counter()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            deadline = time.monotonic() - self.threshold
+            with self._lock:
+                slow = [(ident, samples) for ident, (started, samples) in self._watched.items()
+                        if started <= deadline]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in slow:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples[collapse_stack(frame)] += 1
+
+
+class Capture:
+    """Profiling state of one request"""
+
+    def __init__(self, profiler, watched):
+        self.started = time.monotonic()
+        self.profiler = profiler
+        self.watched = watched
+
+
+class RequestProfiler:
+    """
+    Decides which requests are profiled and stores their profiles
+
+        capture = profiler.begin()
+        ...
+        profiler.end(capture, {'file_type': '.pdf', 'input_sha256': digest})
+    """
+
+    def __init__(self, store, sample_rate=0.0, slow_threshold=0.0, interval=0.01):
+        self.store = store
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.sampler = StackSampler(slow_threshold, interval) if slow_threshold > 0 else None
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0 or self.sampler is not None
+
+    def begin(self):
+        """
+        Start profiling the calling thread's request, if it is selected
+
+        Returns:
+            Capture | None: None when the request is not profiled
+        """
+        profiler = None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                profiler = None
+        if self.sampler is not None:
+            self.sampler.watch()
+        if profiler is None and self.sampler is None:
+            return None
+        return Capture(profiler, self.sampler is not None)
+
+    def end(self, capture, metadata=None):
+        """
+        Stop profiling and store the profile if the request was sampled or slow
+
+        Args:
+            capture: Result of begin()
+            metadata: Description of the request stored with the profile
+
+        Returns:
+            str | None: Profile identifier, or None if nothing was stored
+        """
+        if capture is None:
+            return None
+        duration = time.monotonic() - capture.started
+        samples = self.sampler.unwatch() if capture.watched else Counter()
+        if capture.profiler is not None:
+            capture.profiler.disable()
+        slow = self.sampler is not None and duration >= self.slow_threshold
+        if capture.profiler is None and not slow:
+            return None
+
+        if capture.profiler is not None:
+            capture.profiler.create_stats()
+            data, profile_format = marshal.dumps(capture.profiler.stats), 'pstats'
+        else:
+            lines = ''.join(f'{stack} {count}\n' for stack, count in samples.most_common())
+            data, profile_format = lines.encode('utf-8'), 'collapsed'
+        record = dict(metadata or {}, duration=round(duration, 4), reason='slow' if slow else 'sampled')
+        try:
+            return self.store.save(data, profile_format, record)
+        except OSError as e:
+            logger.warning(f"Failed to store profile: {str(e)}")
+            return None
@@ -0,0 +1,248 @@
+"""
+Cached DNS resolution, address vetting and connection pinning for outbound requests
+"""
+import ipaddress
+import logging
+import socket
+import threading
+from contextlib import contextmanager
+
+import urllib3.util.connection
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# dnspython (optional) exposes record TTLs; getaddrinfo does not
+try:
+    import dns.exception
+    import dns.resolver
+    DNSPYTHON_AVAILABLE = True
+except ImportError:
+    DNSPYTHON_AVAILABLE = False
+
+# Networks an outbound request must never reach
+BLOCKED_NETWORKS = tuple(ipaddress.ip_network(network) for network in (
+    '0.0.0.0/8',          # "this" network
+    '10.0.0.0/8',         # private
+    '100.64.0.0/10',      # carrier-grade NAT
+    '127.0.0.0/8',        # loopback
+    '169.254.0.0/16',     # link-local, cloud metadata
+    '172.16.0.0/12',      # private
+    '192.0.0.0/24',       # IETF protocol assignments
+    '192.0.2.0/24',       # TEST-NET-1
+    '192.168.0.0/16',     # private
+    '198.18.0.0/15',      # benchmarking
+    '198.51.100.0/24',    # TEST-NET-2
+    '203.0.113.0/24',     # TEST-NET-3
+    '224.0.0.0/4',        # multicast
+    '240.0.0.0/4',        # reserved, broadcast
+    '::/128',             # unspecified
+    '::1/128',            # loopback
+    '64:ff9b:1::/48',     # local-use NAT64
+    '100::/64',           # discard-only
+    '2001:db8::/32',      # documentation
+    'fc00::/7',           # unique local
+    'fe80::/10',          # link-local
+    'ff00::/8',           # multicast
+))
+BLOCKED_IPV4_NETWORKS = tuple(n for n in BLOCKED_NETWORKS if n.version == 4)
+BLOCKED_IPV6_NETWORKS = tuple(n for n in BLOCKED_NETWORKS if n.version == 6)
+
+
+class BlockedAddressError(OSError):
+    """Raised when an outbound connection would reach a blocked address"""
+
+
+def is_blocked_address(address):
+    """
+    Check whether an IP address is private, loopback, link-local or reserved.
+
+    IPv4-mapped and 6to4-embedded IPv4 addresses are checked as IPv4.
+
+    Args:
+        address: IP address string or ipaddress object
+
+    Returns:
+        bool: True if connections to the address must be refused
+    """
+    ip = ipaddress.ip_address(address) if isinstance(address, str) else address
+    if ip.version == 6:
+        embedded = ip.ipv4_mapped or ip.sixtofour
+        if embedded is not None:
+            ip = embedded
+        else:
+            return any(ip in network for network in BLOCKED_IPV6_NETWORKS)
+    return any(ip in network for network in BLOCKED_IPV4_NETWORKS)
+
+
+def parse_ip_literal(host):
+    """Return an ipaddress object if host is an IP literal, else None"""
+    try:
+        return ipaddress.ip_address(host.strip('[]').split('%', 1)[0])
+    except ValueError:
+        return None
+
+
+class CachingResolver:
+    """
+    DNS resolver with a TTL-respecting cache.
+
+    Record TTLs are honoured (clamped to [min_ttl, max_ttl]) when dnspython
+    is installed; otherwise getaddrinfo results are cached for default_ttl.
+    Resolution failures are cached for negative_ttl so a flood of requests
+    to a dead hostname does not hammer the system resolver.
+    """
+
+    def __init__(self, default_ttl=60, min_ttl=5, max_ttl=300, negative_ttl=5,
+                 max_entries=1024):
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(max_entries=max_entries, default_ttl=default_ttl)
+
+    def resolve(self, host):
+        """
+        Resolve host to a tuple of IP address strings.
+
+        Raises:
+            socket.gaierror: If the name cannot be resolved (cached briefly)
+        """
+        key = host.lower().rstrip('.')
+        literal = parse_ip_literal(key)
+        if literal is not None:
+            return (str(literal),)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            if isinstance(cached, socket.gaierror):
+                raise cached
+            return cached
+
+        try:
+            addresses, ttl = self._lookup(key)
+        except socket.gaierror as e:
+            self.cache.set(key, e, ttl=self.negative_ttl)
+            raise
+        ttl = max(self.min_ttl, min(self.max_ttl, ttl))
+        self.cache.set(key, addresses, ttl=ttl)
+        return addresses
+
+    def _lookup(self, host):
+        if DNSPYTHON_AVAILABLE:
+            addresses, ttls = [], []
+            for record_type in ('A', 'AAAA'):
+                try:
+                    answer = dns.resolver.resolve(host, record_type)
+                except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN):
+                    continue
+                except dns.exception.DNSException as e:
+                    raise socket.gaierror(socket.EAI_AGAIN, str(e))
+                addresses.extend(rdata.to_text() for rdata in answer)
+                ttls.append(answer.rrset.ttl)
+            if addresses:
+                return tuple(dict.fromkeys(addresses)), min(ttls)
+            # Fall through to getaddrinfo for /etc/hosts and search domains
+
+        infos = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        addresses = tuple(dict.fromkeys(info[4][0] for info in infos))
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"No addresses for {host}")
+        return addresses, self.default_ttl
+
+    def vet(self, host):
+        """
+        Resolve host and check every returned address.
+
+        Returns:
+            tuple: (addresses, error_message). error_message is set when any
+            address is blocked.
+
+        Raises:
+            socket.gaierror: If the name cannot be resolved
+        """
+        addresses = self.resolve(host)
+        for address in addresses:
+            if is_blocked_address(address):
+                return addresses, "Private or reserved IP addresses are not allowed"
+        return addresses, None
+
+
+_original_create_connection = urllib3.util.connection.create_connection
+_guard_resolver = None
+_local = threading.local()
+
+
+def _guarded_create_connection(address, *args, **kwargs):
+    """urllib3 create_connection replacement that pins vetted addresses"""
+    pins = getattr(_local, 'pins', None)
+    if pins is None or _guard_resolver is None:
+        return _original_create_connection(address, *args, **kwargs)
+
+    host, port = address
+    key = host.strip('[]').lower()
+    addresses = pins.get(key)
+    if addresses is None:
+        # First connection to this host in the pinned scope (including
+        # redirects): resolve and vet it, then pin the result.
+        addresses, error = _guard_resolver.vet(key)
+        if error:
+            raise BlockedAddressError(f"Connection to {host} refused: {error}")
+        pins[key] = addresses
+
+    last_error = None
+    for ip in addresses:
+        try:
+            return _original_create_connection((ip, port), *args, **kwargs)
+        except OSError as e:
+            last_error = e
+    raise last_error
+
+
+def install_connection_guard(resolver):
+    """
+    Route urllib3 connections through the pinning guard.
+
+    The guard only acts inside pinned_connections(); other connections use
+    urllib3's default resolution. TLS still verifies against the hostname,
+    since only the socket address is replaced.
+    """
+    global _guard_resolver
+    _guard_resolver = resolver
+    urllib3.util.connection.create_connection = _guarded_create_connection
+
+
+def current_pins():
+    """
+    The pins of this thread's pinned_connections() block, or None outside one
+
+    Work that outlives the block, such as resuming a download after the
+    function that opened it returned, passes a copy to pinned_connections()
+    to keep connecting only to the addresses vetted for the request.
+    """
+    pins = getattr(_local, 'pins', None)
+    return None if pins is None else dict(pins)
+
+
+@contextmanager
+def pinned_connections(pins=None):
+    """
+    Pin outbound connections made by this thread to vetted addresses.
+
+    Args:
+        pins: Optional {host: addresses} already vetted by the caller
+
+    Inside the block every host is resolved once through the guard's
+    cached resolver, vetted, and then connected to by IP, so a DNS answer
+    that changes between validation and connection (rebinding) cannot
+    redirect the request to an internal address.
+    """
+    previous = getattr(_local, 'pins', None)
+    _local.pins = dict(previous or {})
+    if pins:
+        _local.pins.update({host.lower(): tuple(addresses) for host, addresses in pins.items()})
+    try:
+        yield _local.pins
+    finally:
+        _local.pins = previous
@@ -0,0 +1,200 @@
+"""
+Disk-backed store for full extraction results, used to serve content pages
+"""
+import base64
+import binascii
+import io
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+RESULT_ID_RE = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+CURSOR_VERSION = 'v1'
+
+
+def encode_cursor(result_id, offset, limit):
+    """
+    Build an opaque cursor token for a page of a stored result.
+
+    Args:
+        result_id: Identifier returned by ResultStore.put
+        offset: Character offset of the page
+        limit: Page size in characters
+
+    Returns:
+        str: URL-safe cursor token
+    """
+    raw = f'{CURSOR_VERSION}:{result_id}:{offset}:{limit}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token.
+
+    Args:
+        token: Cursor token from a previous response
+
+    Returns:
+        tuple | None: (result_id, offset, limit), or None if invalid
+    """
+    if not token or not isinstance(token, str) or len(token) > 256:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii')
+        version, result_id, offset, limit = raw.split(':')
+        offset, limit = int(offset), int(limit)
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+    if version != CURSOR_VERSION or not RESULT_ID_RE.match(result_id):
+        return None
+    if offset < 0 or limit < 1:
+        return None
+    return result_id, offset, limit
+
+
+class ResultStore:
+    """
+    Stores extracted text on disk for a TTL so follow-up page requests can
+    be answered without downloading or parsing the file again.
+
+    Files live in a shared directory, so every worker process on the
+    instance can serve any cursor. Alongside each UTF-8 text file the store
+    keeps the byte offset of every `checkpoint_interval`-th character,
+    which lets a page be read by seeking close to it instead of decoding
+    the whole result.
+    """
+
+    def __init__(self, directory, ttl=600, checkpoint_interval=64 * 1024,
+                 cleanup_interval=60):
+        self.directory = directory
+        self.ttl = ttl
+        self.checkpoint_interval = checkpoint_interval
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, result_id):
+        base = os.path.join(self.directory, result_id)
+        return base + '.txt', base + '.json'
+
+    def put(self, content, metadata=None):
+        """
+        Store a full extraction result.
+
+        Args:
+            content: Extracted text
+            metadata: Optional JSON-serialisable dict returned with each page
+
+        Returns:
+            str: Result identifier
+        """
+        self._maybe_cleanup()
+        result_id = secrets.token_urlsafe(18)
+        text_path, meta_path = self._paths(result_id)
+
+        checkpoints = []
+        written = 0
+        tmp_text = text_path + '.tmp'
+        with open(tmp_text, 'wb') as file:
+            for start in range(0, len(content), self.checkpoint_interval):
+                checkpoints.append(written)
+                encoded = content[start:start + self.checkpoint_interval].encode('utf-8', 'surrogatepass')
+                file.write(encoded)
+                written += len(encoded)
+        os.replace(tmp_text, text_path)
+
+        record = {
+            'created': time.time(),
+            'total_length': len(content),
+            'checkpoint_interval': self.checkpoint_interval,
+            'checkpoints': checkpoints,
+            'metadata': metadata or {},
+        }
+        tmp_meta = meta_path + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as file:
+            json.dump(record, file)
+        os.replace(tmp_meta, meta_path)
+        return result_id
+
+    def get_slice(self, result_id, offset, limit):
+        """
+        Read a page of a stored result.
+
+        Args:
+            result_id: Identifier returned by put
+            offset: Character offset
+            limit: Maximum number of characters
+
+        Returns:
+            tuple | None: (text, total_length, metadata), or None if the
+            result does not exist or has expired
+        """
+        if not RESULT_ID_RE.match(result_id or ''):
+            return None
+        text_path, meta_path = self._paths(result_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                record = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - record['created'] > self.ttl:
+            self._delete(result_id)
+            return None
+
+        total_length = record['total_length']
+        if offset >= total_length:
+            return '', total_length, record['metadata']
+
+        interval = record['checkpoint_interval']
+        checkpoint = offset // interval
+        try:
+            with open(text_path, 'rb') as raw:
+                raw.seek(record['checkpoints'][checkpoint])
+                reader = io.TextIOWrapper(raw, encoding='utf-8', errors='surrogatepass', newline='')
+                skip = offset - checkpoint * interval
+                if skip:
+                    reader.read(skip)
+                text = reader.read(limit)
+        except OSError:
+            return None
+        return text, total_length, record['metadata']
+
+    def cleanup(self):
+        """Delete expired results"""
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+    def _maybe_cleanup(self):
+        with self._lock:
+            now = time.time()
+            if now - self._last_cleanup < self.cleanup_interval:
+                return
+            self._last_cleanup = now
+        self.cleanup()
+
+    def _delete(self, result_id):
+        for path in self._paths(result_id):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,184 @@
+"""
+Weighted fair queuing of extraction work across API keys
+
+Waiting requests are ordered by priority class first (interactive before
+batch) and then by start-time fair queuing tags within the class: each
+key's tag advances by 1/weight per request, so a key with weight 2 is
+admitted twice as often as a key with weight 1 while both have work
+queued, and a key that was idle does not get to catch up in a burst.
+
+Batch keys may hold at most a share of the extraction slots so that
+interactive requests never queue behind a bulk backfill, but they are
+otherwise work-conserving: the slots interactive keys are not using go to
+batch work.
+
+All scheduling state lives in the admission ledger (see admission.py and
+shared_state.py) so that ordering holds across worker processes.
+"""
+import math
+import time
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+PRIORITY_CLASSES = (INTERACTIVE, BATCH)
+
+# Recent samples kept per key for latency percentiles
+LATENCY_SAMPLES = 128
+
+
+class Tenant:
+    """
+    Scheduling identity of an API key.
+
+    Args:
+        name: Stable name used in metrics
+        priority: "interactive" or "batch"
+        weight: Share of capacity relative to other keys of the same class
+        max_concurrency: Concurrent extractions allowed for the key, or None
+        admin: Whether the key may read every key's scheduler metrics
+    """
+
+    def __init__(self, name, priority=INTERACTIVE, weight=1.0, max_concurrency=None, admin=False):
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f'Unknown priority class: {priority}')
+        weight = float(weight)
+        if weight <= 0:
+            raise ValueError('weight must be positive')
+        self.name = name
+        self.priority = priority
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.admin = admin
+
+    def to_entry(self):
+        return {
+            'tenant': self.name,
+            'priority': self.priority,
+            'weight': self.weight,
+            'max_concurrency': self.max_concurrency,
+        }
+
+
+ANONYMOUS = Tenant('anonymous')
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of latency samples, or None without samples"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class FairScheduler:
+    """
+    Admission policy implementing class priority and weighted fair queuing.
+
+    The methods operate on the admission ledger state dict inside a ledger
+    transaction. Waiting and active entries carry their tenant's settings,
+    so every worker can evaluate eligibility without the keys file.
+
+    Args:
+        batch_share: Fraction of extraction slots batch keys may occupy
+    """
+
+    def __init__(self, batch_share=0.75):
+        self.batch_share = batch_share
+
+    def enqueue(self, state, tenant, nbytes):
+        """Build the waiting entry for a new request, assigning its start tag"""
+        tenant = tenant or ANONYMOUS
+        tags = state.setdefault('tags', {})
+        start = max(state.get('vclock', 0.0), tags.get(tenant.name, 0.0))
+        tags[tenant.name] = start + 1.0 / tenant.weight
+        return {**tenant.to_entry(), 'bytes': nbytes, 'start': start, 'since': time.time()}
+
+    def _batch_limit(self, max_active):
+        return max(1, math.floor(max_active * self.batch_share))
+
+    def _eligible(self, entry, active_by_tenant, active_batch, max_active):
+        limit = entry.get('max_concurrency')
+        if limit is not None and active_by_tenant.get(entry['tenant'], 0) >= limit:
+            return False
+        if entry['priority'] == BATCH and active_batch >= self._batch_limit(max_active):
+            return False
+        return True
+
+    def is_next(self, state, key, max_active):
+        """
+        Whether the waiting request under key is the one to admit next.
+
+        Requests whose key is at its concurrency limit (or batch requests
+        when batch work holds its full share) are skipped, so they never
+        block other keys.
+        """
+        active_by_tenant = {}
+        active_batch = 0
+        for entry in state['entries'].values():
+            name = entry.get('tenant')
+            active_by_tenant[name] = active_by_tenant.get(name, 0) + 1
+            if entry.get('priority') == BATCH:
+                active_batch += 1
+
+        best_key = None
+        best_order = None
+        for waiting_key, entry in state['waiting'].items():
+            if not self._eligible(entry, active_by_tenant, active_batch, max_active):
+                continue
+            order = (PRIORITY_CLASSES.index(entry['priority']), entry['start'], entry['since'])
+            if best_order is None or order < best_order:
+                best_key, best_order = waiting_key, order
+        return best_key == key
+
+    def on_admit(self, state, entry):
+        """Advance the virtual clock and record the queueing delay"""
+        state['vclock'] = max(state.get('vclock', 0.0), entry['start'])
+        stats = self._stats(state, entry['tenant'])
+        stats['priority'] = entry['priority']
+        stats['admitted'] += 1
+        self._sample(stats, 'wait_ms', (time.time() - entry['since']) * 1000)
+
+    def on_reject(self, state, tenant_name):
+        self._stats(state, tenant_name)['rejected'] += 1
+
+    def on_release(self, state, tenant_name, held_seconds):
+        """Record how long the request held its slot"""
+        self._sample(self._stats(state, tenant_name), 'service_ms', held_seconds * 1000)
+
+    @staticmethod
+    def _stats(state, tenant_name):
+        stats = state.setdefault('tenant_stats', {})
+        return stats.setdefault(tenant_name, {'admitted': 0, 'rejected': 0, 'wait_ms': [], 'service_ms': []})
+
+    @staticmethod
+    def _sample(stats, field, value):
+        samples = stats[field]
+        samples.append(round(value, 1))
+        del samples[:-LATENCY_SAMPLES]
+
+    def metrics(self, state):
+        """Per-key queue depth, activity and latency percentiles"""
+        keys = {}
+
+        def key_metrics(name, priority=None):
+            if name not in keys:
+                keys[name] = {'priority': priority, 'queued': 0, 'active': 0}
+            elif priority and not keys[name]['priority']:
+                keys[name]['priority'] = priority
+            return keys[name]
+
+        for entry in state.get('waiting', {}).values():
+            key_metrics(entry.get('tenant'), entry.get('priority'))['queued'] += 1
+        for entry in state.get('entries', {}).values():
+            key_metrics(entry.get('tenant'), entry.get('priority'))['active'] += 1
+        for name, stats in state.get('tenant_stats', {}).items():
+            metrics = key_metrics(name, stats.get('priority'))
+            metrics.update(
+                admitted=stats['admitted'],
+                rejected=stats['rejected'],
+                wait_ms_p50=percentile(stats['wait_ms'], 0.5),
+                wait_ms_p95=percentile(stats['wait_ms'], 0.95),
+                service_ms_p50=percentile(stats['service_ms'], 0.5),
+                service_ms_p95=percentile(stats['service_ms'], 0.95),
+            )
+        return keys
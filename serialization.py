@@ -0,0 +1,240 @@
+"""
+Response serialization: pluggable fast JSON encoders and content negotiation
+"""
+import json
+import logging
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger(__name__)
+
+# orjson (optional, fastest)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ujson (optional)
+try:
+    import ujson
+    UJSON_AVAILABLE = True
+except ImportError:
+    UJSON_AVAILABLE = False
+
+# MessagePack (optional)
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+JSON_MIMETYPE = 'application/json'
+TEXT_MIMETYPE = 'text/plain'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Prefix for metadata headers in raw text responses
+METADATA_HEADER_PREFIX = 'X-Extract-'
+
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _ujson_dumps(obj):
+    return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+JSON_BACKENDS = {
+    'orjson': (ORJSON_AVAILABLE, _orjson_dumps),
+    'ujson': (UJSON_AVAILABLE, _ujson_dumps),
+    'stdlib': (True, _stdlib_dumps),
+}
+
+
+def select_json_backend(preferred='auto'):
+    """
+    Pick a JSON encoder.
+
+    Args:
+        preferred: "auto" for the fastest installed backend, or one of
+            "orjson", "ujson", "stdlib"
+
+    Returns:
+        tuple: (backend_name, dumps_function returning bytes)
+    """
+    if preferred != 'auto':
+        available, dumps = JSON_BACKENDS.get(preferred, (False, None))
+        if available:
+            return preferred, dumps
+        logger.warning(f"JSON serializer '{preferred}' not available, falling back to auto")
+
+    for name in ('orjson', 'ujson', 'stdlib'):
+        available, dumps = JSON_BACKENDS[name]
+        if available:
+            return name, dumps
+    return 'stdlib', _stdlib_dumps
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with the fastest available backend.
+
+    jsonify() goes through this provider, so every JSON response skips the
+    stdlib encoder and the extra str -> bytes copy when orjson or ujson is
+    installed. Objects the backend cannot encode fall back to the default
+    provider.
+    """
+
+    def __init__(self, app, backend='auto'):
+        super().__init__(app)
+        self.backend_name, self._dumps_bytes = select_json_backend(backend)
+
+    def dumps_bytes(self, obj):
+        """Serialize obj to UTF-8 encoded JSON bytes"""
+        try:
+            return self._dumps_bytes(obj)
+        except TypeError:
+            return super().dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def available_formats():
+    """Response mimetypes that can be negotiated, in server preference order"""
+    formats = [JSON_MIMETYPE, TEXT_MIMETYPE]
+    if MSGPACK_AVAILABLE:
+        formats.append(MSGPACK_MIMETYPE)
+    return formats
+
+
+def negotiate_format(accept_mimetypes):
+    """
+    Choose the response mimetype for a request.
+
+    Args:
+        accept_mimetypes: werkzeug MIMEAccept (request.accept_mimetypes)
+
+    Returns:
+        str: Selected mimetype, JSON when nothing else is preferred
+    """
+    return accept_mimetypes.best_match(available_formats(), default=JSON_MIMETYPE)
+
+
+def _header_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        # Header values must be Latin-1; sheet and member names are not
+        return json.dumps(value, separators=(',', ':'))
+    return str(value)
+
+
+def metadata_headers(body, content_key='content'):
+    """
+    Convert the non-content fields of a response body into headers.
+
+    "file_type" becomes "X-Extract-File-Type"; dicts and lists are sent as
+    compact, ASCII-only JSON (non-ASCII characters as \\u escapes) and None
+    values are omitted.
+    """
+    headers = {}
+    for key, value in body.items():
+        if key == content_key or value is None:
+            continue
+        name = METADATA_HEADER_PREFIX + '-'.join(part.capitalize() for part in key.split('_'))
+        headers[name] = _header_value(value)
+    return headers
+
+
+def make_negotiated_response(body, mimetype, status=200, json_provider=None):
+    """
+    Render a success body in the negotiated format.
+
+    Args:
+        body: Response dict with a "content" field
+        mimetype: Result of negotiate_format
+        status: HTTP status code
+        json_provider: Provider used for JSON bodies (defaults to stdlib)
+
+    Returns:
+        Response
+    """
+    if mimetype == TEXT_MIMETYPE:
+        response = Response(body.get('content') or '', status=status, mimetype=TEXT_MIMETYPE)
+        response.headers.update(metadata_headers(body))
+        return response
+
+    if mimetype == MSGPACK_MIMETYPE and MSGPACK_AVAILABLE:
+        payload = msgpack.packb(body, use_bin_type=True)
+        return Response(payload, status=status, mimetype=MSGPACK_MIMETYPE)
+
+    payload = json_provider.dumps_bytes(body) if json_provider else _stdlib_dumps(body)
+    return Response(payload, status=status, mimetype=JSON_MIMETYPE)
+
+
+def iter_json_envelope(text_chunks, fields, json_provider=None):
+    """
+    Stream a JSON object whose "content" string is produced incrementally.
+
+    The object is written as {<fields>, "content": "...", "content_length": N,
+    "success": true}. If the chunk iterator fails part way, the object is
+    closed with "success": false and an "error" message instead.
+    """
+    dumps = json_provider.dumps_bytes if json_provider else _stdlib_dumps
+    head = dumps(fields)
+    yield head[:-1] + (b',' if fields else b'') + b'"content":"'
+
+    length = 0
+    tail = {'success': True}
+    try:
+        for chunk in text_chunks:
+            length += len(chunk)
+            # Encode the chunk as a JSON string and drop the surrounding quotes
+            yield dumps(chunk)[1:-1]
+    except Exception as e:
+        logger.error(f"Streaming extraction failed: {str(e)}")
+        tail = {'success': False, 'error': f'Failed to extract content: {str(e)}'}
+
+    tail = {'content_length': length, **tail}
+    yield b'",' + dumps(tail)[1:]
+
+
+def make_streamed_response(text_chunks, fields, mimetype, json_provider=None):
+    """
+    Build a streamed response for content produced incrementally.
+
+    Args:
+        text_chunks: Iterator of extracted text chunks
+        fields: Metadata sent before the content (headers for text/plain)
+        mimetype: Result of negotiate_format; msgpack falls back to JSON
+        json_provider: Provider used for JSON bodies
+
+    Returns:
+        Response
+    """
+    if mimetype == TEXT_MIMETYPE:
+        def encode_text():
+            for chunk in text_chunks:
+                yield chunk.encode('utf-8')
+
+        response = Response(encode_text(), mimetype=TEXT_MIMETYPE)
+        response.headers.update(metadata_headers(fields))
+        return response
+
+    return Response(
+        iter_json_envelope(text_chunks, fields, json_provider),
+        mimetype=JSON_MIMETYPE
+    )
@@ -0,0 +1,126 @@
+"""
+State shared by the worker processes of one instance
+
+Gunicorn runs several worker processes, so per-process counters cannot
+see the load of the whole instance. SharedLedger keeps a small JSON
+document in a local file and serializes updates with an exclusive flock.
+Entries are tagged with the owning process id and are dropped when that
+process is gone, so a crashed worker cannot leak reservations.
+"""
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# fcntl is POSIX-only; without it the ledger is shared by threads only
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+def process_alive(pid):
+    """Whether a process with the given id is still running"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedLedger:
+    """
+    File-backed table of per-process entries, updated under a file lock.
+
+    The document is a dict; each key listed in sections holds a dict of
+    "<pid>:<id>" entries, other top-level keys are free for callers. Use
+    transaction() to read and modify it atomically across processes.
+    """
+
+    def __init__(self, path, sections=('entries',)):
+        self.path = path
+        self.sections = sections
+        self._thread_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Lock the ledger and yield its state dict; changes are written back.
+
+        Section entries owned by processes that no longer exist are removed
+        before the state is handed out.
+        """
+        with self._thread_lock, open(self.path, 'a+', encoding='utf-8') as file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                file.seek(0)
+                raw = file.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    logger.warning(f"Discarding corrupt shared state file {self.path}")
+                    state = {}
+                alive = {}
+                for section in self.sections:
+                    self._prune(state.setdefault(section, {}), alive)
+
+                yield state
+
+                file.seek(0)
+                file.truncate()
+                file.write(json.dumps(state, separators=(',', ':')))
+                file.flush()
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    def read(self):
+        """Snapshot of the current state"""
+        with self.transaction() as state:
+            return json.loads(json.dumps(state))
+
+    def peek(self):
+        """
+        Snapshot of the current state without taking the lock, for frequent
+        read-only probes.
+
+        Entries of processes that no longer exist are left out, but stay in
+        the file until the next transaction. A file caught part way through
+        a write is read again with read().
+        """
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                state = json.loads(file.read() or 'null')
+        except (OSError, ValueError):
+            state = None
+        if not isinstance(state, dict):
+            return self.read()
+        alive = {}
+        for section in self.sections:
+            self._prune(state.setdefault(section, {}), alive)
+        return state
+
+    @staticmethod
+    def entry_key(entry_id, pid=None):
+        return f'{pid or os.getpid()}:{entry_id}'
+
+    @staticmethod
+    def _prune(entries, alive):
+        for key in list(entries):
+            pid = int(key.split(':', 1)[0])
+            if pid not in alive:
+                alive[pid] = process_alive(pid)
+            if not alive[pid]:
+                del entries[key]
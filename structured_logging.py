@@ -0,0 +1,218 @@
+"""
+Structured, queued logging for the API
+
+Log calls in request threads only stamp the record with the request's
+correlation id and put it on a queue; a background thread formats it, as
+one JSON object per line or as text, and writes it to stderr. Messages
+use %-style arguments, so records that are filtered or sampled out are
+never formatted. A full queue drops records instead of blocking requests.
+
+High-volume info events, the records logged with an ``event`` field, are
+kept for a LOG_SAMPLE_RATE fraction of requests. The decision is made
+once per request, so a sampled request keeps all of its events. Warnings
+and errors are never sampled.
+
+    logger.info("Downloaded file: %d bytes", size, extra={'event': 'downloaded', 'bytes': size})
+"""
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Correlation id and sampling decision of the request being handled
+request_id = contextvars.ContextVar('request_id', default=None)
+request_sampled = contextvars.ContextVar('request_sampled', default=None)
+
+# Incoming X-Request-ID values that are passed through unchanged
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# LogRecord attributes that are not fields passed through extra=
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'request_id', 'taskName'
+}
+
+_handler = None
+_listener = None
+
+
+def begin_request(incoming_id=None, sample_rate=1.0):
+    """
+    Assign the correlation id and sampling decision of a request
+
+    Args:
+        incoming_id: The caller's X-Request-ID, reused when well-formed
+        sample_rate: Fraction of requests whose info events are logged
+
+    Returns:
+        str: The request id
+    """
+    value = incoming_id if incoming_id and REQUEST_ID_PATTERN.match(incoming_id) else uuid.uuid4().hex
+    request_id.set(value)
+    request_sampled.set(sample_rate >= 1 or random.random() < sample_rate)
+    return value
+
+
+def end_request():
+    """Clear the request context; sync workers reuse their thread"""
+    request_id.set(None)
+    request_sampled.set(None)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the correlation id of the request that logged them"""
+
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep info events of sampled requests only"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+        self.dropped = 0
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno > logging.INFO or not hasattr(record, 'event'):
+            return True
+        sampled = request_sampled.get()
+        if sampled is None:
+            # Outside a request every event is sampled on its own
+            sampled = random.random() < self.rate
+        if not sampled:
+            self.dropped += 1
+        return sampled
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with the extra= fields at the top level"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the listener thread unformatted, without ever blocking
+
+    Arguments are formatted by the listener, so they must not be mutated
+    after the log call; the code logs numbers and strings only.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # A copy, so handlers that see the record later still get exc_info
+        record = copy.copy(record)
+        if record.exc_info:
+            # Tracebacks hold frames that may change once the call returns
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(config):
+    """
+    Install the API's root log handler, replacing one installed earlier
+
+    Args:
+        config: Mapping with LOG_LEVEL, LOG_FORMAT ("json" or "text"),
+            LOG_ASYNC, LOG_QUEUE_SIZE and LOG_SAMPLE_RATE
+
+    Returns:
+        logging.Handler: The handler added to the root logger
+    """
+    global _handler, _listener
+    stop_logging()
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JSONFormatter() if config['LOG_FORMAT'] == 'json' else logging.Formatter(TEXT_FORMAT))
+    if config['LOG_ASYNC']:
+        _handler = QueuedHandler(queue.Queue(config['LOG_QUEUE_SIZE']))
+        _listener = logging.handlers.QueueListener(_handler.queue, stream)
+        _listener.start()
+    else:
+        _handler = stream
+    _handler.addFilter(ContextFilter())
+    _handler.addFilter(SamplingFilter(config['LOG_SAMPLE_RATE']))
+    root.addHandler(_handler)
+    root.setLevel(config['LOG_LEVEL'])
+    return _handler
+
+
+def stop_logging():
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is None:
+        return
+    try:
+        _listener.stop()
+    except queue.Full:
+        # No room for the stop sentinel: the remaining records are dropped
+        pass
+    _listener = None
+
+
+def _restart_after_fork():
+    # Only the forking thread survives, and the queue's lock may be held
+    if _listener is not None:
+        _handler.queue = _listener.queue = queue.Queue(_handler.queue.maxsize)
+        _listener._thread = None
+        _listener.start()
+
+
+def logging_stats():
+    """Queue depth and records dropped by a full queue or by sampling"""
+    if _handler is None:
+        return None
+    sampling = next((f for f in _handler.filters if isinstance(f, SamplingFilter)), None)
+    return {
+        'async': _listener is not None,
+        'queued': _handler.queue.qsize() if isinstance(_handler, QueuedHandler) else 0,
+        'dropped': getattr(_handler, 'dropped', 0),
+        'sampled_out': sampling.dropped if sampling else 0,
+    }
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_after_fork)
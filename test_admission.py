@@ -0,0 +1,110 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+from app import app, CONFIG, limiter
+from shared_state import SharedLedger
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / 'admission.json')
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def auth_headers():
+    """Return auth headers when API key auth is enabled."""
+    api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    if not api_key:
+        return {}
+    return {'Authorization': f'Bearer {api_key}'}
+
+
+def test_budget_is_shared_between_controllers(state_file):
+    # Two controllers on one ledger stand in for two worker processes
+    first = AdmissionController(state_file, max_bytes=100, max_active=4, max_wait=0)
+    second = AdmissionController(state_file, max_bytes=100, max_active=4, max_wait=0)
+
+    ticket = first.acquire(80)
+    with pytest.raises(AdmissionRejected):
+        second.acquire(30)
+    assert second.occupancy()['bytes_in_flight'] == 80
+    assert second.occupancy()['rejected'] == 1
+
+    first.release(ticket)
+    with second.admit(30):
+        assert first.occupancy()['active'] == 1
+    assert first.occupancy()['active'] == 0
+
+
+def test_oversized_request_runs_alone(state_file):
+    controller = AdmissionController(state_file, max_bytes=100, max_active=4, max_wait=0)
+    ticket = controller.acquire(500)
+    assert controller.occupancy()['saturated'] is True
+    controller.release(ticket)
+
+
+def test_waiter_is_admitted_when_capacity_frees(state_file):
+    controller = AdmissionController(state_file, max_bytes=100, max_active=1, max_wait=2)
+    ticket = controller.acquire(10)
+    threading.Timer(0.1, controller.release, args=(ticket,)).start()
+
+    start = time.monotonic()
+    with controller.admit(10):
+        waited = time.monotonic() - start
+    assert 0.05 < waited < 1.5
+
+
+def test_resize_waits_then_rejects(state_file):
+    controller = AdmissionController(state_file, max_bytes=100, max_active=4, max_wait=0)
+    small = controller.acquire(10)
+    other = controller.acquire(50)
+    with pytest.raises(AdmissionRejected):
+        controller.resize(small, 60)
+    controller.resize(small, 40)
+    assert controller.occupancy()['bytes_in_flight'] == 90
+    controller.release(other)
+    controller.release(small)
+
+
+def test_dead_worker_reservations_are_dropped(state_file):
+    ledger = SharedLedger(state_file)
+    with ledger.transaction() as state:
+        state['entries'][SharedLedger.entry_key(1, pid=2 ** 22 + 1)] = {'bytes': 100, 'since': 0}
+    controller = AdmissionController(state_file, max_bytes=100, max_active=4, max_wait=0)
+    assert controller.occupancy()['active'] == 0
+
+
+def test_shed_request_gets_503_with_retry_after(client, monkeypatch, state_file):
+    controller = AdmissionController(state_file, max_bytes=100, max_active=1, max_wait=0)
+    monkeypatch.setattr('app.admission', controller)
+    held = controller.acquire(1)
+    try:
+        payload = base64.b64encode(b'some text').decode('utf-8')
+        response = client.post(
+            '/extract-base64', headers=auth_headers(), json={'base64': payload, 'filename': 'a.txt'}
+        )
+    finally:
+        controller.release(held)
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+    assert 'capacity' in json.loads(response.data)['error']
+
+    health = json.loads(client.get('/health').data)
+    assert health['admission']['active'] == 0
+    assert health['admission']['rejected'] == 1
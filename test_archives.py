@@ -0,0 +1,149 @@
+import base64
+import gzip
+import io
+import json
+import tarfile
+import zipfile
+from unittest.mock import patch
+
+import pytest
+
+from app import app, CONFIG, limiter, extract_archive, extract_archive_members
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config["TESTING"] = True
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+@pytest.fixture
+def archive_limits():
+    """Restore the archive limits after a test changes them."""
+    keys = ("ARCHIVE_MAX_MEMBERS", "ARCHIVE_MAX_TOTAL_SIZE", "ARCHIVE_MAX_RATIO")
+    original = {key: CONFIG[key] for key in keys}
+    yield CONFIG
+    CONFIG.update(original)
+
+
+def auth_headers():
+    """Return auth headers when API key auth is enabled."""
+    api_key = CONFIG.get("FILE_EXTRACTOR_KEY", "")
+    if not api_key:
+        return {}
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def build_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def build_tar(members, mode="w:gz"):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_zip_members_extracted_in_order(tmp_path):
+    path = write(tmp_path, "bundle.zip", build_zip({
+        "notes.txt": b"hello from notes",
+        "data/table.csv": b"a,b\n1,2\n",
+        "image.png": b"\x89PNG....",
+    }))
+    results, error = extract_archive_members(path)
+    assert error is None
+    assert [r["name"] for r in results] == ["notes.txt", "data/table.csv", "image.png"]
+    assert results[0]["content"] == "hello from notes"
+    assert results[1]["content"] == "a,b\n1,2"
+    assert results[2]["success"] is False
+
+
+def test_tar_gz_and_bare_gzip(tmp_path):
+    tar_path = write(tmp_path, "bundle.tgz", build_tar({"readme.txt": b"tar member"}))
+    content, error = extract_archive(tar_path)
+    assert error is None
+    assert content == "--- readme.txt ---\ntar member"
+
+    gz_path = write(tmp_path, "upload.gz", gzip.compress(b"x,y\n3,4\n"))
+    results, error = extract_archive_members(gz_path, {"source_name": "export.csv.gz"})
+    assert error is None
+    assert results[0]["name"] == "export.csv"
+    assert results[0]["content"] == "x,y\n3,4"
+
+
+def test_nested_archives_are_not_unpacked(tmp_path):
+    nested = gzip.compress(gzip.compress(gzip.compress(b"deep text")))
+    path = write(tmp_path, "nested.gz", nested)
+    with patch("extraction.extract_archive") as inner:
+        results, error = extract_archive_members(path, {"source_name": "nested.gz"})
+    inner.assert_not_called()
+    assert error is None
+    assert results == [{"name": "nested", "file_type": None, "success": False,
+                        "error": "Nested archives are not extracted"}]
+
+    path = write(tmp_path, "outer.zip", build_zip({"inner": build_zip({"a.txt": b"a"})}))
+    content, error = extract_archive(path)
+    assert content is None
+    assert error == "No extractable members in archive"
+
+
+def test_member_count_limit(tmp_path, archive_limits):
+    archive_limits["ARCHIVE_MAX_MEMBERS"] = 2
+    path = write(tmp_path, "many.zip", build_zip({f"{i}.txt": b"x" for i in range(3)}))
+    results, error = extract_archive_members(path)
+    assert results is None
+    assert "more than 2 members" in error
+
+
+def test_compression_ratio_limit(tmp_path, archive_limits):
+    archive_limits["ARCHIVE_MAX_RATIO"] = 10
+    path = write(tmp_path, "bomb.zip", build_zip({"zeros.txt": b"0" * 100000}))
+    results, error = extract_archive_members(path)
+    assert results is None
+    assert "ratio" in error
+
+
+def test_total_size_limit(tmp_path, archive_limits):
+    archive_limits["ARCHIVE_MAX_TOTAL_SIZE"] = 1000
+    data = build_tar({"a.txt": b"a" * 600, "b.txt": b"b" * 600}, mode="w")
+    path = write(tmp_path, "big.tar", data)
+    results, error = extract_archive_members(path)
+    assert results is None
+    assert "expands to more than" in error
+
+
+def test_base64_archive_reports_members(client):
+    archive = build_zip({"one.txt": b"first", "two.txt": b"second", "skip.bin": b"\x00"})
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(),
+        json={"base64": base64.b64encode(archive).decode("utf-8"), "filename": "docs.zip"},
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["file_type"] == ".zip"
+    members = {member["name"]: member for member in data["members"]}
+    assert "content" not in members["one.txt"]
+    second = members["two.txt"]
+    assert data["content"][second["content_offset"]:][:second["content_length"]] == "second"
+    assert members["skip.bin"]["success"] is False
@@ -0,0 +1,99 @@
+import json
+import logging
+import os
+
+import pytest
+
+from bulk_extract import load_checkpoint, main
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / 'docs'
+    (root / 'sub').mkdir(parents=True)
+    (root / 'a.txt').write_text('hello')
+    (root / 'sub' / 'b.csv').write_text('x,y\n1,2\n')
+    (root / 'image.bin').write_bytes(b'\x00\x01')
+    (root / 'empty.txt').write_text('')
+    return root
+
+
+def read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_directory_to_jsonl_with_pool(docs, tmp_path):
+    output = tmp_path / 'out.jsonl'
+    assert main([str(docs), '--output', str(output), '--workers', '2', '--progress-interval', '0']) == 1
+    records = {record['name']: record for record in read_jsonl(output)}
+    # Files without a supported extension are not picked up from directories
+    assert set(records) == {
+        os.path.join('docs', 'a.txt'), os.path.join('docs', 'empty.txt'), os.path.join('docs', 'sub', 'b.csv')
+    }
+    assert records[os.path.join('docs', 'empty.txt')]['success'] is False
+    assert records[os.path.join('docs', 'a.txt')]['content'] == 'hello'
+    assert records[os.path.join('docs', 'sub', 'b.csv')]['file_type'] == '.csv'
+
+
+def test_rerun_skips_unchanged_and_redoes_modified(docs, tmp_path, capsys):
+    output = tmp_path / 'out.jsonl'
+    main([str(docs), '-o', str(output), '-j', '1'])
+    assert len(load_checkpoint(str(output) + '.checkpoint.jsonl')) == 2
+
+    (docs / 'a.txt').write_text('hello again')
+    capsys.readouterr()
+    main([str(docs), '-o', str(output), '-j', '1'])
+    # The empty file failed and is retried along with the modified one
+    assert '1 unchanged' in capsys.readouterr().err
+    records = read_jsonl(output)
+    assert len(records) == 5
+    assert [r['content'] for r in records if r['name'].endswith('a.txt')] == ['hello', 'hello again']
+
+
+def test_hash_compare_ignores_touched_files(docs, tmp_path, capsys):
+    output = tmp_path / 'out.jsonl'
+    main([str(docs), '-o', str(output), '-j', '1', '--compare', 'hash'])
+    os.utime(docs / 'a.txt', ns=(0, 0))
+    capsys.readouterr()
+    main([str(docs), '-o', str(output), '-j', '1', '--compare', 'hash'])
+    assert '2 unchanged' in capsys.readouterr().err
+    assert len(read_jsonl(output)) == 4
+
+
+def test_manifest_to_output_dir_with_failures(docs, tmp_path):
+    manifest = tmp_path / 'files.txt'
+    manifest.write_text('# backfill\ndocs/a.txt\n\ndocs/empty.txt\n')
+    output_dir = tmp_path / 'texts'
+    assert main(['--manifest', str(manifest), '--output-dir', str(output_dir), '-j', '1']) == 1
+    assert (output_dir / 'docs' / 'a.txt.txt').read_text() == 'hello'
+    assert not (output_dir / 'docs' / 'empty.txt.txt').exists()
+    # Only successes are checkpointed, so failures are retried next time
+    assert [os.path.basename(path) for path in load_checkpoint(str(output_dir / '.checkpoint.jsonl'))] == ['a.txt']
+
+
+def test_same_file_names_get_distinct_outputs(tmp_path):
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / 'report.txt').write_text(f'from {folder}')
+    inputs = [str(tmp_path / 'a' / 'report.txt'), str(tmp_path / 'b' / 'report.txt'), str(tmp_path / 'a' / 'report.txt')]
+    output_dir = tmp_path / 'texts'
+    assert main([*inputs, '--output-dir', str(output_dir), '-j', '1']) == 0
+    assert (output_dir / 'report.txt.txt').read_text() == 'from a'
+    assert (output_dir / 'report-2.txt.txt').read_text() == 'from b'
+    assert len(load_checkpoint(str(output_dir / '.checkpoint.jsonl'))) == 2
+
+
+def test_requires_inputs():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+def test_run_leaves_global_logging_alone(tmp_path):
+    docs = tmp_path / 'docs'
+    docs.mkdir()
+    (docs / 'a.txt').write_text('hello')
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    main([str(docs), '-o', str(tmp_path / 'out.jsonl'), '-j', '1', '--verbose'])
+    assert (root.level, root.handlers) == (level, handlers)
@@ -0,0 +1,81 @@
+import base64
+import gzip
+import json
+import zlib
+
+from flask import Response
+
+from app import app, CONFIG
+from compression import compress_response, negotiate_encoding, parse_accept_encoding
+
+
+def auth_headers():
+    """Return auth headers when API key auth is enabled."""
+    api_key = CONFIG.get("FILE_EXTRACTOR_KEY", "")
+    if not api_key:
+        return {}
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def post_text(client, text, headers):
+    payload = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+    return client.post(
+        "/extract-base64",
+        headers={**auth_headers(), **headers},
+        json={"base64": payload, "filename": "large.txt"},
+    )
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=0") == {
+        "gzip": 0.5,
+        "br": 1.0,
+        "identity": 0.0,
+    }
+
+
+def test_negotiate_encoding_respects_qvalues():
+    encodings = ["zstd", "br", "gzip", "deflate"]
+    assert negotiate_encoding("gzip, deflate", encodings) == "gzip"
+    assert negotiate_encoding("gzip;q=0.2, deflate;q=0.8", encodings) == "deflate"
+    assert negotiate_encoding("br, gzip", ["gzip", "deflate"]) == "gzip"
+    assert negotiate_encoding("*", encodings) == "zstd"
+    assert negotiate_encoding("gzip;q=0", encodings) is None
+    assert negotiate_encoding("", encodings) is None
+
+
+def test_large_response_is_gzipped():
+    app.config["TESTING"] = True
+    text = "compressible line of extracted text\n" * 2000
+    with app.test_client() as client:
+        response = post_text(client, text, {"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.data) < len(text) / 10
+    data = json.loads(gzip.decompress(response.data))
+    assert data["content"] == text
+
+
+def test_small_response_is_not_compressed():
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        response = post_text(client, "tiny", {"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.data)["content"] == "tiny"
+
+
+def test_streamed_response_is_compressed_incrementally():
+    chunks = [b"chunk-%d " % i * 100 for i in range(5)]
+    with app.test_request_context():
+        response = Response(iter(chunks), mimetype="text/plain")
+        response = compress_response(response, "deflate", min_size=10 ** 9)
+        compressed = list(response.response)
+
+    assert response.headers["Content-Encoding"] == "deflate"
+    # One compressed piece per input chunk plus the final flush
+    assert len(compressed) >= len(chunks)
+    assert zlib.decompress(b"".join(compressed)) == b"".join(chunks)
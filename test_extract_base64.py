@@ -112,3 +112,19 @@ def test_extract_base64_file_too_large(client):
         assert "File too large" in data["error"]
     finally:
         CONFIG["MAX_FILE_SIZE"] = original_max_file_size
+
+
+def test_extract_base64_csv_rejected_by_parser_falls_back_to_text(client):
+    """A CSV field over the csv module's size limit is read as plain text."""
+    payload = base64.b64encode(b'"' + b"x" * 200000 + b'"\n').decode("utf-8")
+
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(),
+        json={"base64": payload, "filename": "huge.csv", "contentType": "text/csv"},
+    )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["success"] is True
+    assert "x" * 1000 in data["content"]
@@ -0,0 +1,75 @@
+import io
+import subprocess
+import sys
+import zipfile
+
+from extraction import extract, resolve_hint
+from test_xlsx import build_xlsx, sheet_xml
+
+
+def test_import_does_not_load_web_stack():
+    code = (
+        "import sys, extraction; "
+        "loaded = [m for m in ('flask', 'flask_limiter', 'dotenv', 'app') if m in sys.modules]; "
+        "print(','.join(loaded))"
+    )
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ''
+
+
+def test_hint_forms():
+    assert resolve_hint('report.PDF') == '.pdf'
+    assert resolve_hint('.csv') == '.csv'
+    assert resolve_hint('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet') == '.xlsx'
+    assert resolve_hint('application/octet-stream') is None
+    assert resolve_hint(None) is None
+
+
+def test_path_and_buffer_sources(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'caf\xc3\xa9\r\nline two')
+    from_path = extract(path)
+    assert from_path.success
+    assert from_path.file_type == '.txt'
+    assert from_path.content == 'café\nline two'
+
+    data = bytearray(b'a,b\n1,2\n')
+    from_view = extract(memoryview(data), hint='text/csv')
+    assert (from_view.content, from_view.file_type) == ('a,b\n1,2', '.csv')
+
+
+def test_file_object_workbook_has_sheet_details():
+    data = build_xlsx({'Data': sheet_xml([
+        [('A1', 'inlineStr', 'name'), ('B1', 'inlineStr', 'qty')],
+        [('A2', 'inlineStr', 'apple'), ('B2', None, 3)],
+    ])})
+    result = extract(io.BytesIO(data), hint='stock.xlsx', options={'max_rows': 1})
+    assert result.success
+    assert result.details['sheets'][0]['truncated'] is True
+    assert result.to_dict()['sheets'][0]['name'] == 'Data'
+
+
+def test_archive_members_from_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('a.txt', 'alpha')
+        archive.writestr('image.png', b'\x89PNG')
+    result = extract(buffer.getvalue(), hint='bundle.zip')
+    assert result.success
+    assert '--- a.txt ---\nalpha' in result.content
+    assert [member['success'] for member in result.details['members']] == [True, False]
+
+
+def test_failure_is_reported_not_raised():
+    result = extract(b'', hint='.pdf')
+    assert not result.success
+    assert result.content is None
+    assert result.to_dict() == {'success': False, 'error': 'File is empty', 'file_type': '.pdf'}
+
+
+def test_csv_rejected_by_parser_is_extracted_from_a_file():
+    data = b'"' + b'x' * 200000 + b'"\n'
+    for source in (data, io.BytesIO(data)):
+        result = extract(source, 'huge.csv')
+        assert result.success, result.error
+        assert 'x' * 1000 in result.content
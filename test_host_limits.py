@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import app, CONFIG, limiter
+from host_limits import HostBusy, HostLimiter, host_key
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def test_host_key():
+    assert host_key('https://Files.Example.com/a.pdf?x=1') == 'files.example.com'
+    assert host_key('http://files.example.com:8080/a.pdf') == 'files.example.com:8080'
+
+
+def test_concurrency_is_shared_through_the_ledger(tmp_path):
+    path = str(tmp_path / 'hosts.json')
+    worker_a = HostLimiter(path, max_concurrency=2, max_wait=0)
+    worker_b = HostLimiter(path, max_concurrency=2, max_wait=0)
+    held = [worker_a.acquire('files.example'), worker_b.acquire('files.example')]
+    assert worker_b.acquire('files.example', wait=False) is None
+    with pytest.raises(HostBusy):
+        worker_a.acquire('files.example')
+    # Other hosts have their own budget
+    with worker_b.slot('other.example'):
+        metrics = worker_a.metrics()
+    assert metrics['files.example']['active'] == 2
+    assert metrics['files.example']['rejected'] == 1
+    assert metrics['other.example']['requests'] == 1
+    for ticket in held:
+        worker_a.release(ticket)
+    assert worker_b.metrics()['files.example']['active'] == 0
+
+
+def test_full_budget_queues_in_arrival_order(tmp_path):
+    host_limiter = HostLimiter(str(tmp_path / 'hosts.json'), max_concurrency=1, max_wait=5)
+    held = host_limiter.acquire('files.example')
+    order = []
+
+    def download(name):
+        with host_limiter.slot('files.example'):
+            order.append(name)
+
+    first = threading.Thread(target=download, args=('first',))
+    first.start()
+    time.sleep(0.1)
+    second = threading.Thread(target=download, args=('second',))
+    second.start()
+    time.sleep(0.1)
+    assert host_limiter.metrics()['files.example']['queued'] == 2
+    # A slot that does not wait must not overtake the queue
+    assert host_limiter.acquire('files.example', wait=False) is None
+
+    host_limiter.release(held)
+    first.join()
+    second.join()
+    assert order == ['first', 'second']
+    metrics = host_limiter.metrics()['files.example']
+    assert metrics['wait_ms_p95'] >= 100
+    assert metrics['latency_ms_p50'] is not None
+
+
+def test_rate_budget_spaces_out_starts(tmp_path):
+    host_limiter = HostLimiter(str(tmp_path / 'hosts.json'), max_concurrency=0, rate=20, burst=2, max_wait=5)
+    started = time.monotonic()
+    tickets = [host_limiter.acquire('files.example') for _ in range(4)]
+    # Two start from the burst, the other two wait for tokens at 20/s
+    assert time.monotonic() - started >= 0.08
+    for ticket in tickets:
+        host_limiter.release(ticket)
+
+
+def test_busy_host_returns_429_without_queueing(client, monkeypatch, tmp_path):
+    # A request holds an admission slot, so it must not wait for the host
+    host_limiter = HostLimiter(str(tmp_path / 'hosts.json'), max_concurrency=1, max_wait=30)
+    monkeypatch.setattr('app.host_limiter', host_limiter)
+    with host_limiter.slot('files.example'):
+        started = time.monotonic()
+        response = client.get('/extract?url=http://files.example/report.pdf')
+        assert time.monotonic() - started < 5
+        assert host_limiter.metrics()['files.example']['queued'] == 0
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert 'files.example' in json.loads(response.data)['error']
+    assert host_limiter.metrics()['files.example']['rejected'] == 1
+
+
+def test_unread_stream_releases_its_host_slot(client, monkeypatch, tmp_path):
+    host_limiter = HostLimiter(str(tmp_path / 'hosts.json'), max_concurrency=1, max_wait=0)
+    monkeypatch.setattr('app.host_limiter', host_limiter)
+    response = Mock()
+    response.iter_content = Mock(return_value=iter([b'some text']))
+    response.headers = {'Content-Type': 'text/plain'}
+    with patch('app.requests.get', return_value=response):
+        for _ in range(2):
+            # HEAD responses are closed without the body being iterated
+            with client.head('/extract?url=http://files.example/a.txt&stream=true') as head:
+                assert head.status_code == 200
+    assert host_limiter.metrics()['files.example']['active'] == 0
@@ -0,0 +1,96 @@
+import base64
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import app, CONFIG, limiter, extract_html, resolve_file_extension
+from html_text import html_to_text, iter_html_text
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Ignored</title><style>p { color: red; }</style></head>
+<body>
+<header><a href="/">Logo</a></header>
+<nav><ul><li>Home</li><li>About</li></ul></nav>
+<h1>Release  notes</h1>
+<!-- build 42 > 41 -->
+<p>Version <b>2.0</b> &amp; friends<br>ships today &eacute;.</p>
+<script>document.write("<p>hidden</p>");</script>
+<ul><li>Faster</li><li>Smaller <a title="a>b" href="#">docs</a></li></ul>
+<table><tr><th>Key</th><th>Value</th></tr><tr><td>a</td><td>1</td></tr></table>
+<pre>  keep
+    spacing</pre>
+<footer>Copyright</footer>
+</body></html>
+"""
+
+EXPECTED = (
+    "# Release notes\n\n"
+    "Version 2.0 & friends\nships today é.\n\n"
+    "- Faster\n- Smaller docs\n\n"
+    "Key\tValue\na\t1\n\n"
+    "  keep\n    spacing"
+)
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def test_html_to_text_drops_boilerplate():
+    assert html_to_text(PAGE) == EXPECTED
+
+
+def test_chunk_boundaries_do_not_change_output():
+    for size in (1, 2, 5, 13):
+        chunks = [PAGE[i:i + size] for i in range(0, len(PAGE), size)]
+        assert ''.join(iter_html_text(chunks)) == EXPECTED
+
+
+def test_resolve_extension_prefers_content_type_for_unknown_suffix():
+    assert resolve_file_extension('/article.php', 'text/html; charset=utf-8') == '.html'
+    assert resolve_file_extension('/notes.md', 'text/plain') == '.md'
+    assert resolve_file_extension('/page.aspx', None) == '.aspx'
+
+
+def test_extract_html_rejects_plain_text(tmp_path):
+    path = tmp_path / 'notes'
+    path.write_text('just text, no markup')
+    content, error = extract_html(str(path))
+    assert content is None
+    assert 'No HTML markup' in error
+
+
+@patch('app.requests.get')
+def test_web_page_url_is_converted(mock_get, client):
+    body = PAGE.encode('utf-8')
+    response = Mock()
+    response.iter_content = Mock(return_value=iter([body[:100], body[100:]]))
+    response.headers = {'Content-Type': 'text/html; charset=utf-8'}
+    response.raise_for_status = Mock()
+    mock_get.return_value = response
+
+    with patch('app.tempfile.NamedTemporaryFile', side_effect=AssertionError('temp file used')):
+        result = client.get('/extract?url=https://example.com/blog/post.php')
+    assert result.status_code == 200
+    data = json.loads(result.data)
+    assert data['file_type'] == '.html'
+    assert data['content'] == EXPECTED
+
+
+def test_base64_html_upload(client):
+    payload = base64.b64encode(PAGE.encode('utf-8')).decode('utf-8')
+    result = client.post('/extract-base64', json={'base64': payload, 'filename': 'page.htm'})
+    assert result.status_code == 200
+    assert json.loads(result.data)['content'] == EXPECTED
@@ -0,0 +1,197 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import app, CONFIG, limiter, extract_pdf, parse_page_selection
+from http_range import HTTPRangeFile, RangeNotSupported, open_range_file, parse_content_range
+
+
+def build_pdf(page_texts, padding=0):
+    """Build a small multi-page PDF with a correct xref table."""
+    objects = []
+    page_count = len(page_texts)
+    kids = ' '.join(f'{3 + i * 2} 0 R' for i in range(page_count))
+    objects.append(b'<< /Type /Catalog /Pages 2 0 R >>')
+    objects.append(f'<< /Type /Pages /Kids [{kids}] /Count {page_count} >>'.encode())
+    for index, text in enumerate(page_texts):
+        content_id = 4 + index * 2
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content_id} 0 R '
+            f'/Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> >>'.encode()
+        )
+        # Padding comments make each page's content stream large so that
+        # unrequested pages live in blocks that are never fetched.
+        stream = f'BT /F1 12 Tf 100 700 Td ({text}) Tj ET\n'.encode() + b'%' + b'x' * padding + b'\n'
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'endstream')
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref_offset = len(output)
+    output += b'xref\n0 %d\n' % (len(objects) + 1)
+    output += b'0000000000 65535 f \n'
+    for offset in offsets:
+        output += b'%010d 00000 n \n' % offset
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+class RangeOrigin:
+    """Fake origin serving byte ranges from an in-memory file."""
+
+    def __init__(self, data, support_ranges=True, etag=None):
+        self.data = data
+        self.support_ranges = support_ranges
+        self.etag = etag
+        self.bytes_sent = 0
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.calls.append(headers.get('Range'))
+        self.if_range = headers.get('If-Range')
+        self.stream = kwargs.get('stream', False)
+        response = Mock()
+        response.raise_for_status = Mock()
+        response.close = Mock()
+        range_header = headers.get('Range')
+        if self.support_ranges and range_header:
+            start, end = (int(x) for x in range_header.split('=', 1)[1].split('-'))
+            end = min(end, len(self.data) - 1)
+            body = self.data[start:end + 1]
+            response.status_code = 206
+            response.headers = {
+                'Accept-Ranges': 'bytes',
+                'Content-Range': f'bytes {start}-{end}/{len(self.data)}',
+                'Content-Type': 'application/pdf',
+            }
+        else:
+            body = self.data
+            response.status_code = 200
+            response.headers = {'Content-Type': 'application/pdf'}
+        if self.etag:
+            response.headers['ETag'] = self.etag
+        self.bytes_sent += len(body)
+        response.content = body
+        response.iter_content = Mock(return_value=[body])
+        self.response = response
+        return response
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def test_parse_content_range():
+    assert parse_content_range('bytes 0-99/1000') == (0, 99, 1000)
+    assert parse_content_range('bytes 10-19/*') == (10, 19, None)
+    assert parse_content_range('garbage') is None
+
+
+def test_parse_page_selection():
+    assert parse_page_selection('1-3,7') == ([0, 1, 2, 6], None)
+    assert parse_page_selection([2, 2, 5]) == ([1, 4], None)
+    assert parse_page_selection(None) == (None, None)
+    pages, error = parse_page_selection('3-1')
+    assert pages is None
+    assert 'Invalid page range' in error
+
+
+def test_range_file_reads_and_caches_blocks():
+    data = bytes(range(256)) * 64
+    origin = RangeOrigin(data)
+    with patch('http_range.requests.get', side_effect=origin.get):
+        range_file = HTTPRangeFile('https://example.com/f.bin', len(data), block_size=1024)
+        range_file.seek(5000)
+        assert range_file.read(100) == data[5000:5100]
+        range_file.seek(-10, 2)
+        assert range_file.read() == data[-10:]
+        range_file.seek(5050)
+        assert range_file.read(10) == data[5050:5060]
+    # The repeated read was served from the block cache
+    assert range_file.requests_made == 2
+    assert range_file.bytes_fetched == 2048
+
+
+def test_range_file_refuses_full_body_and_weak_etag():
+    data = bytes(range(256)) * 64
+    origin = RangeOrigin(data, etag='W/"v1"')
+    with patch('http_range.requests.get', side_effect=origin.get):
+        buffered, range_file = open_range_file('https://example.com/f.bin', block_size=1024)
+        buffered.seek(5000)
+        assert buffered.read(10) == data[5000:5010]
+        # A weak ETag cannot be used with If-Range
+        assert range_file.etag is None and origin.if_range is None
+
+        # The origin stops honouring ranges: the 200 is refused unread
+        origin.support_ranges = False
+        range_file.seek(9000)
+        with pytest.raises(RangeNotSupported):
+            range_file.read(10)
+    assert origin.stream
+    origin.response.iter_content.assert_not_called()
+    origin.response.close.assert_called_once()
+
+
+def test_extract_pdf_selected_pages():
+    pdf_bytes = build_pdf(['First page', 'Second page', 'Third page'])
+    with patch('http_range.requests.get', side_effect=RangeOrigin(pdf_bytes).get):
+        buffered, _ = open_range_file('https://example.com/doc.pdf', block_size=512)
+        content, error = extract_pdf(buffered, {'pages': [1], 'strict': True})
+    assert error is None
+    assert 'Second page' in content
+    assert 'First page' not in content
+
+
+def test_extract_pages_uses_range_requests(client):
+    pdf_bytes = build_pdf([f'Page number {i}' for i in range(1, 41)], padding=20000)
+    origin = RangeOrigin(pdf_bytes)
+    original_block_size = CONFIG['RANGE_BLOCK_SIZE']
+    CONFIG['RANGE_BLOCK_SIZE'] = 16 * 1024
+    try:
+        with patch('app.requests.get', side_effect=origin.get):
+            response = client.get('/extract?url=https://example.com/catalog.pdf&pages=2-3')
+    finally:
+        CONFIG['RANGE_BLOCK_SIZE'] = original_block_size
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert 'Page number 2' in data['content']
+    assert 'Page number 3' in data['content']
+    assert 'Page number 10' not in data['content']
+    assert data['transfer']['mode'] == 'range'
+    assert data['transfer']['file_size'] == len(pdf_bytes)
+    assert origin.bytes_sent < len(pdf_bytes) / 4
+
+
+def test_extract_pages_falls_back_without_range_support(client):
+    pdf_bytes = build_pdf(['Alpha', 'Beta', 'Gamma'])
+    origin = RangeOrigin(pdf_bytes, support_ranges=False)
+    with patch('app.requests.get', side_effect=origin.get):
+        response = client.post('/extract', json={'url': 'https://example.com/doc.pdf', 'pages': '3'})
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert 'Gamma' in data['content']
+    assert 'Alpha' not in data['content']
+    assert 'transfer' not in data
+
+
+def test_extract_invalid_pages(client):
+    response = client.get('/extract?url=https://example.com/doc.pdf&pages=abc')
+    assert response.status_code == 400
+    assert 'Invalid page selection' in json.loads(response.data)['error']
@@ -0,0 +1,92 @@
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+
+from app import app, CONFIG, limiter
+from extraction import CharBudget, extract, parse_extraction_options
+from test_office import build_pptx
+from test_xlsx import build_xlsx, sheet_xml
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client with the API key check disabled."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def test_budget_cuts_and_records_position():
+    budget = CharBudget(10)
+    parts = []
+    assert budget.append(parts, 'abcd', {'line': 1})
+    assert not budget.append(parts, 'efghijk', {'line': 2})
+    assert '\n'.join(parts) == 'abcd\nefghi'
+    assert budget.details() == {'truncated': True, 'stopped_at': {'line': 2}}
+    assert CharBudget().details() == {}
+    assert parse_extraction_options({'max_chars': '0'}) == (None, 'max_chars must be at least 1')
+    assert parse_extraction_options({'max_chars': '25'}) == ({'max_chars': 25}, None)
+
+
+def test_text_and_csv_stop_at_line(tmp_path):
+    path = tmp_path / 'long.txt'
+    path.write_text(''.join(f'line {i}\n' for i in range(1, 100001)))
+    result = extract(path, options={'max_chars': 20})
+    assert result.content == 'line 1\nline 2\nline 3'
+    assert result.details == {'truncated': True, 'stopped_at': {'line': 3}}
+    # Buffers are decoded as a stream, so the position is a byte offset
+    from_buffer = extract(path.read_bytes(), hint='.txt', options={'max_chars': 20})
+    assert from_buffer.content == result.content
+    assert from_buffer.details['stopped_at']['byte'] < len(path.read_bytes())
+
+    csv_path = tmp_path / 'table.csv'
+    csv_path.write_text('a,b\n1,2\n3,4\n')
+    assert extract(csv_path, options={'max_chars': 11}).details == {'truncated': False, 'stopped_at': None}
+    result = extract(csv_path, options={'max_chars': 6})
+    assert result.content == 'a,b\n1,'
+    assert result.details['stopped_at'] == {'line': 2}
+
+
+def test_slides_stop_at_slide():
+    data = build_pptx([(['first slide'], None), (['second slide'], None), (['third slide'], None)])
+    result = extract(data, hint='deck.pptx', options={'max_chars': 30})
+    assert len(result.content) <= 30
+    assert 'third slide' not in result.content
+    assert result.details['stopped_at'] == {'slide': 2}
+
+
+def test_workbook_stops_reading_rows():
+    rows = [[(f'A{i}', 'inlineStr', f'row {i}')] for i in range(1, 501)]
+    data = build_xlsx({'First': sheet_xml(rows), 'Second': sheet_xml([[('A1', 'inlineStr', 'never read')]])})
+    result = extract(io.BytesIO(data), hint='book.xlsx', options={'max_chars': 40})
+    assert len(result.content) == 40
+    assert result.details['stopped_at']['sheet'] == 'First'
+    assert [sheet['name'] for sheet in result.details['sheets']] == ['First']
+    assert result.details['sheets'][0]['content_length'] <= 40
+
+
+def test_archive_reports_member(client):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('a.txt', 'alpha')
+        archive.writestr('b.txt', 'bravo ' * 100)
+        archive.writestr('c.txt', 'charlie')
+    response = client.post('/extract-base64', json={
+        'base64': base64.b64encode(buffer.getvalue()).decode(),
+        'filename': 'bundle.zip',
+        'max_chars': 50,
+    })
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert len(data['content']) == 50
+    assert data['truncated'] is True
+    assert data['stopped_at'] == {'member': 'b.txt'}
+    assert 'charlie' not in data['content']
@@ -0,0 +1,81 @@
+import json
+import os
+import runpy
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from app import app, CONFIG, limiter
+from memory_governor import MemoryGovernor, current_rss
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def readings(*values):
+    """A measure function returning the given RSS values, in MB, in turn."""
+    values = iter(values)
+    return lambda: next(values) * MB
+
+
+def test_current_rss_is_measured():
+    rss = current_rss()
+    assert rss is not None and rss > MB
+
+
+def test_deltas_are_reported_per_format():
+    governor = MemoryGovernor(measure=readings(100, 130, 130, 131, 131, 141))
+    for label in ('.pdf', '.txt', '.pdf'):
+        governor.end(governor.begin(), label)
+    stats = governor.stats()
+    assert (stats['requests'], stats['rss_mb'], stats['retiring']) == (3, 141, False)
+    assert stats['formats']['.pdf'] == {'requests': 2, 'growth_mb': 40, 'avg_delta_kb': 20480, 'max_delta_mb': 30}
+    assert stats['formats']['.txt']['growth_mb'] == 1
+
+
+def test_retires_only_if_still_over_the_limit_after_collection():
+    # 260MB after the request, 240MB once cycles are collected
+    governor = MemoryGovernor(250 * MB, measure=readings(200, 260, 240))
+    governor.end(governor.begin(), '.docx')
+    assert not governor.should_retire
+
+    governor = MemoryGovernor(250 * MB, measure=readings(200, 260, 255))
+    governor.end(governor.begin(), '.docx')
+    assert governor.should_retire
+    assert governor.stats()['rss_mb'] == 255
+
+
+def test_gunicorn_config_recycles_workers():
+    config = runpy.run_path(os.path.join(os.path.dirname(__file__), 'gunicorn.conf.py'))
+    assert config['max_requests'] > 0 and config['max_requests_jitter'] > 0
+
+    governor = MemoryGovernor()
+    worker = SimpleNamespace(wsgi=SimpleNamespace(extensions={'memory_governor': governor}),
+                             alive=True, pid=1, log=Mock())
+    config['post_request'](worker, None, {}, None)
+    assert worker.alive
+    governor.should_retire = True
+    config['post_request'](worker, None, {}, None)
+    assert not worker.alive
+
+
+def test_health_reports_memory_by_file_type(client, monkeypatch):
+    monkeypatch.setattr('app.memory_governor', MemoryGovernor())
+    client.post('/extract-base64', json={'base64': 'aGVsbG8=', 'filename': 'a.txt'})
+    memory = json.loads(client.get('/health').data)['memory']
+    assert list(memory['formats']) == ['.txt']
+    assert memory['formats']['.txt']['requests'] == 1
+    assert memory['soft_limit_mb'] is None
@@ -0,0 +1,73 @@
+import mmap
+
+import pytest
+
+import extraction
+from extraction import extract_pdf, extract_txt, open_mapped
+from test_http_range import build_pdf
+
+
+@pytest.fixture(params=[True, False], ids=['mmap', 'read'])
+def mmap_io(request, monkeypatch):
+    """Run a test with memory-mapped reads enabled and disabled"""
+    monkeypatch.setitem(extraction.SETTINGS, 'MMAP_IO', request.param)
+    return request.param
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_open_mapped_falls_back_to_the_file(tmp_path, monkeypatch):
+    path = write(tmp_path, 'notes.txt', b'hello')
+    with open_mapped(path) as file:
+        assert isinstance(file, mmap.mmap)
+        assert file.read(5) == b'hello'
+    # Empty files cannot be mapped
+    with open_mapped(write(tmp_path, 'empty.txt', b'')) as file:
+        assert not isinstance(file, mmap.mmap)
+    monkeypatch.setitem(extraction.SETTINGS, 'MMAP_IO', False)
+    with open_mapped(path) as file:
+        assert not isinstance(file, mmap.mmap)
+
+
+@pytest.mark.parametrize('data, expected', [
+    ('naïve café\r\nline two ✓\r\n'.encode('utf-8'), 'naïve café\nline two ✓\n'),
+    ('caf\xe9\rold mac\n'.encode('latin-1'), 'caf\xe9\nold mac\n'),
+    (b'', ''),
+])
+def test_text_matches_text_mode_reads(tmp_path, mmap_io, data, expected):
+    assert extract_txt(write(tmp_path, 'notes.txt', data)) == (expected, None)
+
+
+def test_budget_decodes_across_chunk_boundaries(tmp_path, mmap_io, monkeypatch):
+    # Chunks split both a two-byte character and a CRLF pair
+    monkeypatch.setattr(extraction, 'READ_CHUNK_SIZE', 3)
+    path = write(tmp_path, 'notes.txt', 'aé\r\nbc\r\nde\r\nfg'.encode('utf-8'))
+    options = {'max_chars': 100}
+    assert extract_txt(path, options) == ('aé\nbc\nde\nfg', None)
+    options = {'max_chars': 6}
+    assert extract_txt(path, options) == ('aé\nbc\n', None)
+
+
+def test_budget_reads_only_the_pages_it_needs(tmp_path, monkeypatch):
+    path = write(tmp_path, 'big.txt', b'line\n' * 100000)
+    reads = []
+    original = extraction._iter_file_text
+
+    def counting(file, encoding):
+        for text in original(file, encoding):
+            reads.append(len(text))
+            yield text
+    monkeypatch.setattr(extraction, '_iter_file_text', counting)
+    content, error = extract_txt(path, {'max_chars': 10})
+    assert (content, error) == ('line\nline\n', None)
+    assert len(reads) == 1
+
+
+def test_pdf_extracts_from_a_mapped_file(tmp_path, mmap_io):
+    path = write(tmp_path, 'report.pdf', build_pdf(['first page', 'second page', 'third page']))
+    assert extract_pdf(path) == ('first page\nsecond page\nthird page', None)
+    assert extract_pdf(path, {'pages': [1]}) == ('second page', None)
@@ -0,0 +1,141 @@
+import base64
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from app import app, CONFIG, limiter, DownloadTooLarge, download_error_is_transient
+from cache import NegativeCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client(monkeypatch, clock):
+    """Create a test client with an empty negative cache and authentication disabled."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    monkeypatch.setattr('app.negative_cache', NegativeCache(ttl=300, transient_ttl=15, clock=clock))
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def http_error(status):
+    response = Mock()
+    response.status_code = status
+    return requests.HTTPError(f'{status} Error', response=response)
+
+
+def failing_get(status):
+    response = Mock()
+    response.raise_for_status.side_effect = http_error(status)
+    return Mock(return_value=response)
+
+
+def serving_get(body, content_type='application/zip'):
+    def get(url, **kwargs):
+        response = Mock()
+        response.url = url
+        response.headers = {'Content-Type': content_type}
+        response.iter_content = Mock(return_value=[body])
+        return response
+    return Mock(side_effect=get)
+
+
+def test_error_classification():
+    assert download_error_is_transient(requests.Timeout('read timed out'))
+    assert download_error_is_transient(requests.ConnectionError('reset'))
+    assert download_error_is_transient(http_error(503))
+    assert download_error_is_transient(http_error(429))
+    assert not download_error_is_transient(http_error(404))
+    assert not download_error_is_transient(DownloadTooLarge())
+
+
+def test_ttls_per_kind(clock):
+    cache = NegativeCache(ttl=300, transient_ttl=15, clock=clock)
+    cache.add('gone', 'Not found')
+    cache.add('flaky', 'Timeout', transient=True)
+    clock.now = 20
+    assert cache.get('flaky') is None
+    assert cache.get('gone') == {'error': 'Not found', 'transient': False}
+    disabled = NegativeCache(ttl=0, transient_ttl=0, clock=clock)
+    disabled.add('gone', 'Not found')
+    assert disabled.get('gone') is None
+
+
+def test_request_counts_one_lookup(client):
+    with patch('app.requests.get', serving_get(b'plain text')):
+        client.get('/extract?url=https://example.com/notes.txt')
+    stats = json.loads(client.get('/health').data)['negative_cache']
+    # The URL and URL-with-options keys are one lookup
+    assert (stats['hits'], stats['misses']) == (0, 1)
+
+    cache = NegativeCache()
+    cache.add('second', 'Not found')
+    assert cache.get('first', 'second')['error'] == 'Not found'
+    assert cache.get('first', 'third') is None
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+
+
+def test_missing_url_is_answered_from_cache(client):
+    with patch('app.requests.get', failing_get(404)) as mock_get:
+        first = client.get('/extract?url=https://example.com/gone.pdf')
+        second = client.get('/extract?url=https://example.com/gone.pdf')
+    assert mock_get.call_count == 1
+    assert first.status_code == second.status_code == 400
+    data = json.loads(second.data)
+    assert data['error'] == json.loads(first.data)['error']
+    assert data['cached'] is True
+    assert data['transient'] is False
+
+
+def test_transient_errors_expire_sooner(client, clock):
+    with patch('app.requests.get', failing_get(503)) as mock_get:
+        client.get('/extract?url=https://example.com/busy.pdf')
+        assert json.loads(client.get('/extract?url=https://example.com/busy.pdf').data)['transient'] is True
+        clock.now = 16
+        client.get('/extract?url=https://example.com/busy.pdf')
+    assert mock_get.call_count == 2
+
+
+def test_unreadable_content_is_cached_by_hash(client):
+    body = b'PK\x03\x04 not really a zip'
+    with patch('app.requests.get', serving_get(body)) as mock_get:
+        first = client.get('/extract?url=https://example.com/export.zip?sig=1')
+        assert first.status_code == 400
+        # A new signature is a new URL, but the download has the same bytes
+        with patch('app.extract_path', side_effect=AssertionError('extractors ran again')):
+            second = client.get('/extract?url=https://example.com/export.zip?sig=2')
+            third = client.get('/extract?url=https://example.com/export.zip?sig=1')
+    assert json.loads(second.data)['cached'] is True
+    assert json.loads(second.data)['file_type'] == '.zip'
+    assert json.loads(third.data)['error'] == json.loads(first.data)['error']
+    # The first URL is answered without downloading again
+    assert mock_get.call_count == 2
+
+
+def test_base64_payload_cache_respects_options(client):
+    payload = {'base64': base64.b64encode(b'PK\x03\x04 broken').decode(), 'filename': 'a.zip'}
+    assert client.post('/extract-base64', json=payload).status_code == 400
+    with patch('app.extraction.extract', side_effect=AssertionError('extractors ran again')):
+        cached = client.post('/extract-base64', json=payload)
+    assert json.loads(cached.data)['cached'] is True
+    # Different options may succeed, so they are not answered from the cache
+    other = client.post('/extract-base64', json={**payload, 'max_chars': 10})
+    assert 'cached' not in json.loads(other.data)
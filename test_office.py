@@ -0,0 +1,207 @@
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+
+from app import app, CONFIG, limiter, extract_odp, extract_ods_sheets, extract_odt, extract_pptx
+
+P_NS = 'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+A_NS = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+R_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+RELS_NS = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+NOTES_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/notesSlide'
+
+ODF_NS = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:draw="urn:oasis:names:tc:opendocument:xmlns:drawing:1.0" '
+    'xmlns:presentation="urn:oasis:names:tc:opendocument:xmlns:presentation:1.0"'
+)
+
+
+def shape(paragraphs, placeholder=None):
+    ph = f'<p:nvSpPr><p:nvPr><p:ph type="{placeholder}"/></p:nvPr></p:nvSpPr>' if placeholder else ''
+    body = ''.join(f'<a:p><a:r><a:t>{text}</a:t></a:r></a:p>' for text in paragraphs)
+    return f'<p:sp>{ph}<p:txBody>{body}</p:txBody></p:sp>'
+
+
+def build_pptx(slides, media_size=0):
+    """Build a presentation from a list of (paragraphs, notes or None)."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        ids = ''.join(f'<p:sldId id="{255 + i}" r:id="rId{i}"/>' for i in range(1, len(slides) + 1))
+        archive.writestr('ppt/presentation.xml', f'<p:presentation {P_NS} {R_NS}><p:sldIdLst>{ids}</p:sldIdLst></p:presentation>')
+        rels = ''.join(
+            f'<Relationship Id="rId{i}" Target="slides/slide{i}.xml" Type="slide"/>'
+            for i in range(1, len(slides) + 1)
+        )
+        archive.writestr('ppt/_rels/presentation.xml.rels', f'<Relationships {RELS_NS}>{rels}</Relationships>')
+        for i, (paragraphs, notes) in enumerate(slides, start=1):
+            archive.writestr(
+                f'ppt/slides/slide{i}.xml',
+                f'<p:sld {P_NS} {A_NS}><p:cSld><p:spTree>{shape(paragraphs)}</p:spTree></p:cSld></p:sld>'
+            )
+            slide_rels = '<Relationship Id="rId1" Target="../media/image1.png" Type="image"/>'
+            if notes:
+                slide_rels += f'<Relationship Id="rId2" Target="../notesSlides/notesSlide{i}.xml" Type="{NOTES_TYPE}"/>'
+                archive.writestr(
+                    f'ppt/notesSlides/notesSlide{i}.xml',
+                    f'<p:notes {P_NS} {A_NS}><p:cSld><p:spTree>'
+                    f'{shape([str(i)], "sldNum")}{shape(notes, "body")}'
+                    f'</p:spTree></p:cSld></p:notes>'
+                )
+            archive.writestr(f'ppt/slides/_rels/slide{i}.xml.rels', f'<Relationships {RELS_NS}>{slide_rels}</Relationships>')
+        archive.writestr('ppt/media/image1.png', b'\x89PNG' + b'\x00' * media_size)
+    return buffer.getvalue()
+
+
+def build_odf(body, mimetype):
+    """Build an OpenDocument package around an office:body fragment."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('mimetype', mimetype)
+        archive.writestr('content.xml', f'<office:document-content {ODF_NS}><office:body>{body}</office:body></office:document-content>')
+    return buffer.getvalue()
+
+
+def odp_page(paragraphs, notes=None):
+    frames = ''.join(f'<draw:frame><draw:text-box><text:p>{text}</text:p></draw:text-box></draw:frame>' for text in paragraphs)
+    if notes:
+        frames += f'<presentation:notes><draw:frame><draw:text-box><text:p>{notes}</text:p></draw:text-box></draw:frame></presentation:notes>'
+    return f'<draw:page>{frames}</draw:page>'
+
+
+def ods_table(name, rows):
+    body = ''.join(
+        '<table:table-row>' + ''.join(
+            f'<table:table-cell><text:p>{value}</text:p></table:table-cell>' if value else '<table:table-cell/>'
+            for value in row
+        ) + '</table:table-row>'
+        for row in rows
+    )
+    return f'<table:table table:name="{name}">{body}</table:table>'
+
+
+def write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def test_pptx_slides_and_notes_in_order(tmp_path):
+    path = write(tmp_path, 'deck.pptx', build_pptx([
+        (['Welcome', 'Agenda'], ['Say hello']),
+        (['Results'], None),
+    ]))
+    content, error = extract_pptx(path)
+    assert error is None
+    assert content == (
+        '--- Slide 1 ---\nWelcome\nAgenda\n\nNotes:\nSay hello\n\n'
+        '--- Slide 2 ---\nResults'
+    )
+
+
+def test_pptx_slide_selection_skips_media(tmp_path):
+    path = write(tmp_path, 'deck.pptx', build_pptx([([f'Slide {i}'], None) for i in range(1, 6)]))
+    opened = []
+    original_open = zipfile.ZipFile.open
+
+    def tracking_open(self, name, *args, **kwargs):
+        opened.append(getattr(name, 'filename', name))
+        return original_open(self, name, *args, **kwargs)
+
+    zipfile.ZipFile.open = tracking_open
+    try:
+        content, error = extract_pptx(path, {'pages': [3]})
+    finally:
+        zipfile.ZipFile.open = original_open
+    assert error is None
+    assert content == '--- Slide 4 ---\nSlide 4'
+    assert 'ppt/slides/slide1.xml' not in opened
+    assert not any(name.startswith('ppt/media/') for name in opened)
+
+
+def test_odt_paragraphs_and_headings(tmp_path):
+    body = (
+        '<office:text><text:h text:outline-level="2">Intro</text:h>'
+        '<text:p>First<text:s text:c="2"/>line<text:tab/>tab</text:p>'
+        '<text:p/><text:p>Second <text:span>styled</text:span> paragraph</text:p></office:text>'
+    )
+    path = write(tmp_path, 'doc.odt', build_odf(body, 'application/vnd.oasis.opendocument.text'))
+    content, error = extract_odt(path)
+    assert error is None
+    assert content == '## Intro\nFirst  line\ttab\nSecond styled paragraph'
+
+
+def test_odp_slides_with_notes(tmp_path):
+    body = '<office:presentation>' + odp_page(['Title', 'Point'], 'Remember') + odp_page(['End']) + '</office:presentation>'
+    path = write(tmp_path, 'deck.odp', build_odf(body, 'application/vnd.oasis.opendocument.presentation'))
+    content, error = extract_odp(path)
+    assert error is None
+    assert content == '--- Slide 1 ---\nTitle\nPoint\n\nNotes:\nRemember\n\n--- Slide 2 ---\nEnd'
+    assert extract_odp(path, {'pages': [1]}) == ('--- Slide 2 ---\nEnd', None)
+
+
+def test_ods_sheets_with_repeats(tmp_path):
+    body = (
+        '<office:spreadsheet>'
+        + ods_table('First', [['a', 'b'], ['', ''], ['1', '', '3']])
+        + '<table:table table:name="Second"><table:table-row table:number-rows-repeated="2">'
+          '<table:table-cell table:number-columns-repeated="2"><text:p>x</text:p></table:table-cell>'
+          '<table:table-cell table:number-columns-repeated="1000"/></table:table-row></table:table>'
+        + '</office:spreadsheet>'
+    )
+    path = write(tmp_path, 'book.ods', build_odf(body, 'application/vnd.oasis.opendocument.spreadsheet'))
+    sheets, error = extract_ods_sheets(path, {'include_rows': True})
+    assert error is None
+    assert [sheet['name'] for sheet in sheets] == ['First', 'Second']
+    assert sheets[0]['rows'] == [['a', 'b'], ['1', '', '3']]
+    assert sheets[1]['rows'] == [['x', 'x'], ['x', 'x']]
+
+
+def test_ods_empty_repeats_cannot_widen_rows_without_bound(tmp_path):
+    body = (
+        '<office:spreadsheet><table:table table:name="Wide"><table:table-row>'
+        '<table:table-cell><text:p>a</text:p></table:table-cell>'
+        '<table:table-cell table:number-columns-repeated="1000000000"/>'
+        '<table:table-cell><text:p>far</text:p></table:table-cell>'
+        '</table:table-row><table:table-row>'
+        '<table:table-cell><text:p>a</text:p></table:table-cell>'
+        '<table:table-cell table:number-columns-repeated="16380"/>'
+        '<table:table-cell table:number-columns-repeated="5"><text:p>b</text:p></table:table-cell>'
+        '</table:table-row></table:table></office:spreadsheet>'
+    )
+    path = write(tmp_path, 'wide.ods', build_odf(body, 'application/vnd.oasis.opendocument.spreadsheet'))
+    sheets, error = extract_ods_sheets(path, {'include_rows': True})
+    assert error is None
+    first, second = sheets[0]['rows']
+    assert first == ['a']
+    assert len(second) == 16384
+    assert second[-3:] == ['b', 'b', 'b']
+
+
+def test_base64_pptx_upload(client):
+    payload = base64.b64encode(build_pptx([(['Hello deck'], ['Notes here'])])).decode('utf-8')
+    response = client.post('/extract-base64', json={'base64': payload, 'filename': 'talk.pptx'})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['file_type'] == '.pptx'
+    assert 'Notes here' in data['content']
@@ -0,0 +1,126 @@
+import base64
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app import app, CONFIG, limiter
+from result_store import ResultStore, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config["TESTING"] = True
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def auth_headers():
+    """Return auth headers when API key auth is enabled."""
+    api_key = CONFIG.get("FILE_EXTRACTOR_KEY", "")
+    if not api_key:
+        return {}
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("utf-8")
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("a" * 24, 100, 50)
+    assert decode_cursor(token) == ("a" * 24, 100, 50)
+    assert decode_cursor("not a cursor") is None
+    assert decode_cursor(encode_cursor("../../etc/passwd", 0, 10)) is None
+
+
+def test_result_store_slices_across_checkpoints(tmp_path):
+    store = ResultStore(str(tmp_path), ttl=60, checkpoint_interval=7)
+    content = "héllo wörld – ünïcode ✓ " * 20
+    result_id = store.put(content, {"file_type": ".txt"})
+
+    for offset, limit in [(0, 5), (6, 9), (13, 40), (len(content) - 3, 10)]:
+        page, total, metadata = store.get_slice(result_id, offset, limit)
+        assert page == content[offset:offset + limit]
+        assert total == len(content)
+        assert metadata == {"file_type": ".txt"}
+
+
+def test_result_store_expires(tmp_path):
+    store = ResultStore(str(tmp_path), ttl=0)
+    result_id = store.put("some content")
+    with patch("result_store.time.time", return_value=10 ** 12):
+        assert store.get_slice(result_id, 0, 5) is None
+
+
+def test_base64_pages_follow_cursor(client):
+    text = "".join(f"line {i}\n" for i in range(100))
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(),
+        json={"base64": encode(text), "filename": "doc.txt", "offset": 0, "limit": 200},
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["content"] == text[:200]
+    assert data["total_length"] == len(text)
+    assert data["has_more"] is True
+
+    collected = data["content"]
+    with patch("extraction.extract") as mock_extract:
+        while data["next_cursor"]:
+            response = client.post(
+                "/extract-base64",
+                headers=auth_headers(),
+                json={"cursor": data["next_cursor"]},
+            )
+            assert response.status_code == 200
+            data = json.loads(response.data)
+            assert data["file_type"] == ".txt"
+            collected += data["content"]
+        mock_extract.assert_not_called()
+
+    assert collected == text
+    assert data["has_more"] is False
+
+
+def test_extract_cursor_without_url(client):
+    text = "abcdefghij" * 30
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(),
+        json={"base64": encode(text), "filename": "doc.txt", "offset": 10, "limit": 100},
+    )
+    cursor = json.loads(response.data)["next_cursor"]
+
+    response = client.get(f"/extract?cursor={cursor}", headers=auth_headers())
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["offset"] == 110
+    assert data["content"] == text[110:210]
+
+
+def test_unknown_cursor_is_gone(client):
+    cursor = encode_cursor("b" * 24, 0, 10)
+    response = client.get(f"/extract?cursor={cursor}", headers=auth_headers())
+    assert response.status_code == 410
+    assert "expired" in json.loads(response.data)["error"]
+
+
+def test_invalid_pagination_parameters(client):
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(),
+        json={"base64": encode("text"), "limit": 0},
+    )
+    assert response.status_code == 400
+    assert "limit" in json.loads(response.data)["error"]
+
+    response = client.get("/extract?cursor=garbage", headers=auth_headers())
+    assert response.status_code == 400
+    assert "Invalid cursor" in json.loads(response.data)["error"]
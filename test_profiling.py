@@ -0,0 +1,104 @@
+import hashlib
+import json
+import marshal
+import pstats
+import time
+
+import pytest
+
+from api_keys import KeyRegistry
+from app import app, CONFIG, limiter
+from profiling import ProfileStore, RequestProfiler, StackSampler
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    path = tmp_path / 'keys.json'
+    path.write_text(json.dumps({'keys': [
+        {'key': 'web-secret', 'name': 'web'},
+        {'key': 'ops-secret', 'name': 'ops', 'admin': True},
+    ]}))
+    return str(path)
+
+
+@pytest.fixture
+def client(monkeypatch, keys_file, tmp_path):
+    """Create a test client that profiles every extraction."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    monkeypatch.setattr('app.key_registry', KeyRegistry(keys_file))
+    monkeypatch.setattr('app.request_profiler', RequestProfiler(ProfileStore(str(tmp_path / 'profiles')), 1.0))
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def slow_parse(seconds):
+    time.sleep(seconds)
+
+
+def test_store_keeps_the_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [store.save(f'profile {i}'.encode(), 'collapsed', {'file_type': '.txt'}) for i in range(3)]
+    assert [record['id'] for record in store.list()] == ids[:0:-1]
+    assert store.get(ids[0]) is None
+    record, data = store.get(ids[2])
+    assert (record['file_type'], data) == ('.txt', b'profile 2')
+    assert store.get('../../etc/passwd') is None
+
+
+def test_sampled_request_is_stored_as_pstats(tmp_path):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path)), sample_rate=1.0)
+    capture = profiler.begin()
+    sorted(range(1000))
+    profile_id = profiler.end(capture, {'file_type': '.pdf'})
+    record, data = profiler.store.get(profile_id)
+    assert (record['reason'], record['format'], record['file_type']) == ('sampled', 'pstats', '.pdf')
+    stats = pstats.Stats(str(tmp_path / f'{profile_id}.prof'))
+    assert any(name == '<built-in method builtins.sorted>' for _, _, name in stats.stats)
+    assert marshal.loads(data) == stats.stats
+
+
+def test_slow_request_stacks_are_sampled(tmp_path):
+    profiler = RequestProfiler(ProfileStore(str(tmp_path)), slow_threshold=0.05, interval=0.005)
+    # Fast requests are not stored
+    assert profiler.end(profiler.begin()) is None
+    assert profiler.store.list() == []
+
+    capture = profiler.begin()
+    slow_parse(0.2)
+    record, data = profiler.store.get(profiler.end(capture, {'file_type': '.docx'}))
+    assert (record['reason'], record['format']) == ('slow', 'collapsed')
+    assert record['duration'] >= 0.2
+    stack, count = data.decode().splitlines()[0].rsplit(' ', 1)
+    assert 'slow_parse (test_profiling.py' in stack
+    assert int(count) > 1
+
+
+def test_sampler_ignores_threads_below_the_threshold():
+    sampler = StackSampler(threshold=10, interval=0.001)
+    sampler.watch()
+    slow_parse(0.05)
+    assert not sampler.unwatch()
+
+
+def test_profiles_endpoint_records_input_and_requires_admin(client):
+    payload = b'hello profiler'
+    response = client.post('/extract-base64', headers={'Authorization': 'Bearer web-secret'},
+                           json={'base64': 'aGVsbG8gcHJvZmlsZXI=', 'filename': 'a.txt'})
+    assert response.status_code == 200
+    assert client.get('/profiles', headers={'Authorization': 'Bearer web-secret'}).status_code == 403
+
+    listing = json.loads(client.get('/profiles', headers={'Authorization': 'Bearer ops-secret'}).data)
+    [record] = listing['profiles']
+    assert record['input_sha256'] == hashlib.sha256(payload).hexdigest()
+    assert (record['file_type'], record['path'], record['status']) == ('.txt', '/extract-base64', 200)
+
+    download = client.get(f"/profiles/{record['id']}", headers={'Authorization': 'Bearer ops-secret'})
+    assert download.status_code == 200
+    assert download.headers['Content-Disposition'] == f'attachment; filename="{record["id"]}.prof"'
+    assert marshal.loads(download.data)
+    assert client.get('/profiles/unknown-profile-id00', headers={'Authorization': 'Bearer ops-secret'}).status_code == 404
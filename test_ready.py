@@ -0,0 +1,79 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from admission import AdmissionController
+from app import app, CONFIG
+from scheduler import FairScheduler, Tenant
+from shared_state import SharedLedger
+
+
+@pytest.fixture
+def controller(tmp_path, monkeypatch):
+    """An admission controller of two slots and 100 bytes, used by the app."""
+    controller = AdmissionController(
+        str(tmp_path / 'admission.json'), max_bytes=100, max_active=2, max_wait=0, scheduler=FairScheduler()
+    )
+    monkeypatch.setattr('app.admission', controller)
+    return controller
+
+
+@pytest.fixture
+def client():
+    """Create a test client; /ready is exempt from rate limits."""
+    app.config['TESTING'] = True
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def test_ready_reports_capacity(client, controller):
+    with controller.admit(30, tenant=Tenant('web')):
+        response = client.get('/ready')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['status'] == 'ready'
+    assert data['workers'] == {'busy': 1, 'idle': 1}
+    assert (data['queued'], data['bytes_in_flight'], data['max_bytes']) == (0, 30, 100)
+    assert set(data['cache_hit_rate']) == {'dns', 'negative'}
+
+    # The admission's service time now counts towards the p95
+    assert json.loads(client.get('/ready').data)['latency_ms_p95'] is not None
+
+
+def test_saturated_instance_is_not_ready(client, controller):
+    held = [controller.acquire(10), controller.acquire(10)]
+    try:
+        response = client.get('/ready')
+    finally:
+        for ticket in held:
+            controller.release(ticket)
+    assert response.status_code == 503
+    assert json.loads(response.data)['status'] == 'saturated'
+    assert int(response.headers['Retry-After']) >= 1
+    assert client.get('/ready').status_code == 200
+
+
+def test_byte_budget_and_queue_saturate(client, controller, monkeypatch):
+    with controller.admit(100):
+        assert client.get('/ready').status_code == 503
+
+    with controller.ledger.transaction() as state:
+        state['waiting'][SharedLedger.entry_key('w1')] = {'bytes': 1, 'since': 0}
+    assert client.get('/ready').status_code == 503
+    monkeypatch.setitem(CONFIG, 'READY_MAX_QUEUED', 1)
+    assert client.get('/ready').status_code == 200
+
+
+def test_probe_does_not_lock_or_rewrite_the_ledger(client, controller):
+    with controller.ledger.transaction() as state:
+        # A reservation of a worker that has exited
+        state['entries'][SharedLedger.entry_key(1, pid=2 ** 22 + 1)] = {'bytes': 100, 'since': 0}
+    with patch.object(SharedLedger, 'transaction', side_effect=AssertionError('ledger locked')):
+        response = client.get('/ready')
+    assert response.status_code == 200
+    assert json.loads(response.data)['workers'] == {'busy': 0, 'idle': 2}
+
+
+def test_ready_is_not_rate_limited(client, controller):
+    assert all(client.get('/ready').status_code == 200 for _ in range(15))
@@ -0,0 +1,108 @@
+import socket
+from unittest.mock import Mock, patch
+
+import pytest
+import urllib3.util.connection
+
+from app import validate_url, dns_resolver
+from resolver import (
+    BlockedAddressError,
+    CachingResolver,
+    install_connection_guard,
+    is_blocked_address,
+    pinned_connections,
+)
+
+
+def fake_getaddrinfo(mapping):
+    """Build a getaddrinfo replacement answering from a host -> [ip] mapping."""
+    def getaddrinfo(host, port, *args, **kwargs):
+        if host not in mapping:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (ip, 0)) for ip in mapping[host]]
+    return getaddrinfo
+
+
+@pytest.fixture(autouse=True)
+def clear_dns_cache():
+    dns_resolver.cache.clear()
+    yield
+    dns_resolver.cache.clear()
+
+
+@pytest.mark.parametrize("address, blocked", [
+    ("10.1.2.3", True),
+    ("172.16.0.1", True),
+    ("172.31.255.255", True),
+    ("172.32.0.1", False),
+    ("100.64.0.1", True),
+    ("169.254.169.254", True),
+    ("8.8.8.8", False),
+    ("::1", True),
+    ("fd00::1", True),
+    ("::ffff:192.168.1.1", True),
+    ("2002:a00:1::", True),
+    ("2606:4700::1111", False),
+])
+def test_is_blocked_address(address, blocked):
+    assert is_blocked_address(address) is blocked
+
+
+def test_validate_url_blocks_ip_literals():
+    assert validate_url("http://10.0.0.5/file.pdf")[0] is False
+    assert validate_url("http://[::ffff:10.0.0.5]/file.pdf")[0] is False
+    # Decimal notation for 127.0.0.1 is caught once resolved
+    assert validate_url("http://2130706433/file.pdf")[0] is False
+    assert validate_url("http://93.184.216.34/file.pdf") == (True, None)
+
+
+def test_validate_url_blocks_hostnames_resolving_to_private_addresses():
+    lookup = Mock(side_effect=fake_getaddrinfo({
+        "internal.example.com": ["93.184.216.34", "10.0.0.7"],
+        "public.example.com": ["93.184.216.34"],
+    }))
+    with patch("resolver.socket.getaddrinfo", lookup):
+        is_valid, error = validate_url("https://internal.example.com/doc.pdf")
+        assert is_valid is False
+        assert "Private or reserved" in error
+
+        assert validate_url("https://public.example.com/a.pdf") == (True, None)
+        assert validate_url("https://public.example.com/b.pdf") == (True, None)
+
+    # The second lookup of the public host was served from the cache
+    assert lookup.call_count == 2
+
+
+def test_resolver_caches_failures_briefly():
+    resolver = CachingResolver(negative_ttl=30)
+    lookup = Mock(side_effect=fake_getaddrinfo({}))
+    with patch("resolver.socket.getaddrinfo", lookup):
+        for _ in range(3):
+            with pytest.raises(socket.gaierror):
+                resolver.resolve("missing.example.com")
+    assert lookup.call_count == 1
+
+
+def test_guard_pins_connections_to_vetted_addresses():
+    resolver = CachingResolver()
+    install_connection_guard(resolver)
+    connect = Mock(return_value="socket")
+    lookup = fake_getaddrinfo({
+        "files.example.com": ["93.184.216.34"],
+        "rebind.example.com": ["127.0.0.1"],
+    })
+    try:
+        with patch("resolver.socket.getaddrinfo", side_effect=lookup), \
+                patch("resolver._original_create_connection", connect):
+            with pinned_connections():
+                assert urllib3.util.connection.create_connection(("files.example.com", 443)) == "socket"
+                with pytest.raises(BlockedAddressError):
+                    urllib3.util.connection.create_connection(("rebind.example.com", 80))
+
+            # Outside the pinned scope urllib3 resolves normally
+            urllib3.util.connection.create_connection(("other.example.com", 80))
+    finally:
+        install_connection_guard(dns_resolver)
+
+    assert connect.call_args_list[0].args[0] == ("93.184.216.34", 443)
+    assert connect.call_args_list[1].args[0] == ("other.example.com", 80)
@@ -0,0 +1,221 @@
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+
+from app import app, CONFIG, limiter, save_download
+from http_range import ResumableDownload, ResumeFailed
+from resolver import current_pins
+
+
+class FlakyOrigin:
+    """Fake origin whose connections drop after cut_after bytes."""
+
+    def __init__(self, data, cut_after=None, etag='"v1"', resume_status=206):
+        self.data = data
+        self.cut_after = cut_after
+        self.etag = etag
+        self.resume_status = resume_status
+        self.calls = []
+
+    def get(self, url, headers=None, **kwargs):
+        headers = headers or {}
+        self.calls.append(headers)
+        range_header = headers.get('Range')
+        response = Mock()
+        response.url = url
+        response.raise_for_status = Mock()
+        response.headers = {'Content-Type': 'text/plain', 'Accept-Ranges': 'bytes'}
+        if self.etag:
+            response.headers['ETag'] = self.etag
+        start, end = 0, len(self.data) - 1
+        if range_header:
+            response.status_code = self.resume_status
+            if self.resume_status != 206:
+                response.iter_content = Mock(return_value=iter([self.data]))
+                return response
+            first, last = range_header.split('=', 1)[1].split('-')
+            start, end = int(first), int(last) if last else end
+            response.headers['Content-Range'] = f'bytes {start}-{end}/{len(self.data)}'
+        else:
+            response.status_code = 200
+        response.headers['Content-Length'] = str(end + 1 - start)
+        response.iter_content = Mock(return_value=self.body(start, end + 1))
+        return response
+
+    def body(self, start, stop):
+        cut = stop if self.cut_after is None else min(stop, start + self.cut_after)
+        for offset in range(start, cut, 4):
+            yield self.data[offset:min(offset + 4, cut)]
+        if cut < stop:
+            raise requests.exceptions.ChunkedEncodingError('Connection broken: IncompleteRead')
+
+
+def open_flaky(origin, **kwargs):
+    with patch('http_range.requests.get', side_effect=origin.get):
+        download = ResumableDownload(origin.get('http://files.example/a.txt'), sleep=Mock(), **kwargs)
+        return download, b''.join(download.iter_content())
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def test_resumes_from_received_offset():
+    data = bytes(range(50))
+    origin = FlakyOrigin(data, cut_after=20)
+    download, body = open_flaky(origin)
+    assert body == data
+    assert [call.get('Range') for call in origin.calls] == [None, 'bytes=20-', 'bytes=40-']
+    assert all(call['If-Range'] == '"v1"' for call in origin.calls[1:])
+
+    info = download.transfer_info()
+    assert info['mode'] == 'resumed'
+    assert [(a['start'], a['bytes']) for a in info['attempts']] == [(0, 20), (20, 20), (40, 10)]
+    assert info['attempts'][0]['error'] is not None
+    assert info['attempts'][-1]['error'] is None
+
+
+def test_changed_file_is_not_stitched():
+    origin = FlakyOrigin(b'x' * 30, cut_after=10, resume_status=200)
+    with pytest.raises(ResumeFailed, match='file changed'):
+        open_flaky(origin)
+
+
+def test_no_validator_fails_without_retrying():
+    origin = FlakyOrigin(b'x' * 30, cut_after=10, etag=None)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        open_flaky(origin)
+    assert len(origin.calls) == 1
+
+
+def test_retry_budget_and_jittered_backoff():
+    origin = FlakyOrigin(b'x' * 30, cut_after=10, resume_status=503)
+    sleep = Mock()
+    with patch('http_range.requests.get', side_effect=origin.get):
+        download = ResumableDownload(origin.get('http://files.example/a.txt'), max_retries=3,
+                                     backoff=1, max_backoff=2, sleep=sleep)
+        with pytest.raises(ResumeFailed, match='gave up after 3 retries'):
+            b''.join(download.iter_content())
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert len(delays) == 3
+    assert all(0 <= delay <= limit for delay, limit in zip(delays, [1, 2, 2]))
+    assert [a['status'] for a in download.attempts[1:]] == [503, 503, 503]
+
+
+def test_resumes_keep_the_vetted_addresses():
+    origin = FlakyOrigin(bytes(range(50)), cut_after=20)
+    pins = {'files.example': ('203.0.113.7',)}
+    seen = []
+
+    def get(url, **kwargs):
+        seen.append(current_pins())
+        return origin.get(url, **kwargs)
+    with patch('http_range.requests.get', side_effect=get):
+        download = ResumableDownload(origin.get('http://files.example/a.txt'), sleep=Mock(), pins=pins)
+        assert b''.join(download.iter_content()) == bytes(range(50))
+    # Resumes run after open_download left its pinned scope
+    assert current_pins() is None
+    assert seen == [pins, pins]
+
+
+def test_encoded_body_is_not_measured_against_content_length():
+    response = Mock()
+    response.url = 'http://files.example/a.txt'
+    response.headers = {'Content-Length': '50038', 'Content-Encoding': 'gzip', 'ETag': '"v1"'}
+    response.iter_content = Mock(return_value=iter([b'x' * 50000]))
+    download = ResumableDownload(response, sleep=Mock())
+    assert len(b''.join(download.iter_content())) == 50000
+    assert not download.resumable
+
+
+def test_extract_endpoint_reports_resumed_transfer(client):
+    text = 'line of text\n' * 40
+    origin = FlakyOrigin(text.encode(), cut_after=200)
+    with patch('app.requests.get', side_effect=origin.get), patch('http_range.time.sleep'):
+        response = client.get('/extract?url=http://files.example/notes.txt')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['content'] == text
+    assert data['transfer']['mode'] == 'resumed'
+    assert data['transfer']['requests'] == 3
+
+
+def test_segments_written_at_their_offsets():
+    data = bytes(range(256)) * 4
+    origin = FlakyOrigin(data)
+    with patch('http_range.requests.get', side_effect=origin.get), tempfile.TemporaryFile() as file:
+        download = ResumableDownload(origin.get('http://files.example/a.bin'), sleep=Mock())
+        assert download.can_segment(min_size=1024)
+        assert not download.can_segment(min_size=1025)
+        assert download.write_segments(file.fileno(), 3, chunk_size=64) == len(data)
+        file.seek(0)
+        assert file.read() == data
+    # The first segment is read from the open response; it is never requested again
+    assert sorted(call.get('Range') or '' for call in origin.calls) == ['', 'bytes=342-683', 'bytes=684-1023']
+    assert download.transfer_info()['segments'] == 3
+    # The open response may deliver a little past the first segment before it is closed
+    assert len(data) <= download.transfer_info()['bytes_fetched'] < len(data) + 64
+
+
+def test_segment_resumes_within_its_range():
+    data = b'abcdefghij' * 10
+    origin = FlakyOrigin(data, cut_after=30)
+    with patch('http_range.requests.get', side_effect=origin.get), tempfile.TemporaryFile() as file:
+        download = ResumableDownload(origin.get('http://files.example/a.bin'), sleep=Mock())
+        download.write_segments(file.fileno(), 2, chunk_size=8)
+        file.seek(0)
+        assert file.read() == data
+    ranges = [call.get('Range') for call in origin.calls]
+    assert 'bytes=80-99' in ranges
+    assert all(a['start'] + a['bytes'] <= 100 for a in download.attempts)
+
+
+def test_segment_requests_use_the_vetted_addresses():
+    data = b'abcdefghij' * 10
+    origin = FlakyOrigin(data, cut_after=30)
+    pins = {'files.example': ('203.0.113.7',)}
+    seen = []
+
+    def get(url, **kwargs):
+        seen.append(current_pins())
+        return origin.get(url, **kwargs)
+    with patch('http_range.requests.get', side_effect=get), tempfile.TemporaryFile() as file:
+        download = ResumableDownload(origin.get('http://files.example/a.bin'), sleep=Mock(), pins=pins)
+        download.write_segments(file.fileno(), 3, chunk_size=8)
+    # Segment requests and their resumes run in pool threads
+    assert len(seen) > 2
+    assert all(entry == pins for entry in seen)
+
+
+@pytest.mark.parametrize('segments', [1, 4])
+def test_save_download_segments_large_files(monkeypatch, segments):
+    data = os.urandom(4096)
+    origin = FlakyOrigin(data)
+    monkeypatch.setitem(CONFIG, 'DOWNLOAD_SEGMENTS', segments)
+    monkeypatch.setitem(CONFIG, 'SEGMENTED_DOWNLOAD_MIN_SIZE', 1024)
+    with patch('http_range.requests.get', side_effect=origin.get):
+        download = ResumableDownload(origin.get('http://files.example/a.pdf'), sleep=Mock())
+        path, error = save_download(download, '.pdf')
+    try:
+        assert error is None
+        with open(path, 'rb') as file:
+            assert file.read() == data
+    finally:
+        os.unlink(path)
+    assert download.mode == ('segmented' if segments > 1 else 'download')
+    assert len(origin.calls) == segments
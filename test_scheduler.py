@@ -0,0 +1,150 @@
+import json
+import os
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected
+from api_keys import KeyRegistry, parse_keys
+from app import app, CONFIG, limiter
+from scheduler import FairScheduler, Tenant
+
+
+def new_state():
+    return {'entries': {}, 'waiting': {}}
+
+
+def enqueue(scheduler, state, tenant, count):
+    for i in range(count):
+        state['waiting'][f'{tenant.name}:{i}'] = scheduler.enqueue(state, tenant, 1)
+
+
+def drain(scheduler, state, max_active):
+    """Admit waiters one by one, as slots free up, and return the key order."""
+    order = []
+    while state['waiting']:
+        key = next(key for key in state['waiting'] if scheduler.is_next(state, key, max_active))
+        entry = state['waiting'].pop(key)
+        scheduler.on_admit(state, entry)
+        order.append(entry['tenant'])
+    return order
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    path = tmp_path / 'keys.json'
+    path.write_text(json.dumps({'keys': [
+        {'key': 'web-secret', 'name': 'web', 'max_concurrency': 2},
+        {'key': 'import-secret', 'name': 'import', 'priority': 'batch', 'weight': 2},
+        {'key': 'ops-secret', 'name': 'ops', 'admin': True},
+    ]}))
+    return str(path)
+
+
+@pytest.fixture
+def client(monkeypatch, keys_file, tmp_path):
+    """Create a test client authenticating against a keys file."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    monkeypatch.setattr('app.key_registry', KeyRegistry(keys_file))
+    monkeypatch.setattr('app.admission', AdmissionController(
+        str(tmp_path / 'admission.json'), max_bytes=10 ** 9, max_active=4, max_wait=0,
+        scheduler=FairScheduler()
+    ))
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def test_weights_share_admissions_fairly():
+    scheduler = FairScheduler()
+    state = new_state()
+    enqueue(scheduler, state, Tenant('heavy', weight=2), 6)
+    enqueue(scheduler, state, Tenant('light'), 6)
+    order = drain(scheduler, state, max_active=4)
+    # While both keys have work queued, heavy gets two turns for each of light's
+    assert order[:6].count('heavy') == 4
+    assert order[:6].count('light') == 2
+
+
+def test_interactive_goes_before_earlier_batch_work():
+    scheduler = FairScheduler()
+    state = new_state()
+    enqueue(scheduler, state, Tenant('import', priority='batch'), 3)
+    enqueue(scheduler, state, Tenant('web'), 2)
+    assert drain(scheduler, state, max_active=4) == ['web', 'web', 'import', 'import', 'import']
+
+
+def test_batch_share_leaves_room_for_interactive():
+    scheduler = FairScheduler(batch_share=0.5)
+    state = new_state()
+    for i in range(2):
+        state['entries'][f'active:{i}'] = {'tenant': 'import', 'priority': 'batch', 'bytes': 1}
+    enqueue(scheduler, state, Tenant('import', priority='batch'), 1)
+    assert not scheduler.is_next(state, 'import:0', max_active=4)
+    enqueue(scheduler, state, Tenant('web'), 1)
+    assert scheduler.is_next(state, 'web:0', max_active=4)
+
+
+def test_key_at_concurrency_limit_does_not_block_others(tmp_path):
+    controller = AdmissionController(
+        str(tmp_path / 'admission.json'), max_bytes=100, max_active=4, max_wait=0, scheduler=FairScheduler()
+    )
+    limited = Tenant('limited', max_concurrency=1)
+    held = controller.acquire(1, limited)
+    with pytest.raises(AdmissionRejected):
+        controller.acquire(1, limited)
+    with controller.admit(1, Tenant('other')):
+        metrics = controller.tenant_metrics()
+        assert metrics['other']['active'] == 1
+    controller.release(held)
+
+    metrics = controller.tenant_metrics()
+    assert metrics['limited']['admitted'] == 1
+    assert metrics['limited']['rejected'] == 1
+    assert metrics['limited']['queued'] == 0
+    assert metrics['limited']['wait_ms_p95'] is not None
+    assert metrics['other']['service_ms_p50'] is not None
+
+
+def test_keys_file_validation():
+    with pytest.raises(ValueError):
+        parse_keys({'keys': [{'key': 'a', 'name': 'x'}, {'key': 'b', 'name': 'x'}]})
+    with pytest.raises(ValueError):
+        parse_keys({'keys': [{'key': 'a', 'name': 'x', 'priority': 'urgent'}]})
+    keys = parse_keys({'keys': [{'key': 'a', 'name': 'x', 'priority': 'batch', 'max_concurrency': 3}]})
+    assert keys['a'].priority == 'batch'
+    assert keys['a'].max_concurrency == 3
+
+
+def test_keys_file_authentication_and_metrics(client):
+    response = client.post('/extract-base64', headers={'Authorization': 'Bearer web-secret'},
+                           json={'base64': 'aGVsbG8=', 'filename': 'a.txt'})
+    assert response.status_code == 200
+    assert client.get('/queues', headers={'Authorization': 'wrong'}).status_code == 401
+
+    own = json.loads(client.get('/queues', headers={'Authorization': 'Bearer web-secret'}).data)
+    assert list(own['keys']) == ['web']
+    assert own['keys']['web']['admitted'] == 1
+
+    client.post('/extract-base64', headers={'Authorization': 'Bearer import-secret'},
+                json={'base64': 'aGVsbG8=', 'filename': 'a.txt'})
+    everyone = json.loads(client.get('/queues', headers={'Authorization': 'Bearer ops-secret'}).data)
+    assert set(everyone['keys']) == {'web', 'import'}
+    assert everyone['keys']['import']['priority'] == 'batch'
+
+
+def test_deleted_keys_file_revokes_its_keys(client, keys_file):
+    headers = {'Authorization': 'Bearer web-secret'}
+    assert client.get('/queues', headers=headers).status_code == 200
+    contents = open(keys_file).read()
+    os.remove(keys_file)
+    # Revoked, and authentication does not switch off with no keys left
+    assert client.get('/queues', headers=headers).status_code == 401
+    assert client.get('/queues').status_code == 401
+
+    with open(keys_file, 'w') as file:
+        file.write(contents)
+    assert client.get('/queues', headers=headers).status_code == 200
@@ -0,0 +1,118 @@
+import base64
+import json
+
+import pytest
+
+from app import app, CONFIG, limiter
+from serialization import FastJSONProvider, metadata_headers, select_json_backend
+from test_xlsx import build_xlsx, sheet_xml
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config["TESTING"] = True
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def auth_headers(**extra):
+    """Return auth headers when API key auth is enabled."""
+    headers = dict(extra)
+    api_key = CONFIG.get("FILE_EXTRACTOR_KEY", "")
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+    return headers
+
+
+def post_text(client, text, headers, **fields):
+    payload = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+    return client.post(
+        "/extract-base64",
+        headers=headers,
+        json={"base64": payload, "filename": "doc.txt", **fields},
+    )
+
+
+def test_select_json_backend_falls_back_to_stdlib():
+    name, dumps = select_json_backend("stdlib")
+    assert name == "stdlib"
+    assert json.loads(dumps({"a": "ü"})) == {"a": "ü"}
+
+    name, _ = select_json_backend("does-not-exist")
+    assert name in ("orjson", "ujson", "stdlib")
+
+
+def test_fast_provider_round_trip():
+    provider = FastJSONProvider(app)
+    body = {"content": "line \"quoted\"\n✓", "content_length": 3, "ok": True}
+    assert json.loads(provider.dumps_bytes(body)) == body
+    assert json.loads(provider.dumps(body)) == body
+
+
+def test_metadata_headers():
+    headers = metadata_headers({
+        "content": "ignored",
+        "file_type": ".pdf",
+        "has_more": False,
+        "next_cursor": None,
+        "transfer": {"mode": "range"},
+    })
+    assert headers == {
+        "X-Extract-File-Type": ".pdf",
+        "X-Extract-Has-More": "false",
+        "X-Extract-Transfer": '{"mode":"range"}',
+    }
+
+
+def test_default_response_is_json(client):
+    response = post_text(client, "Plain JSON please", auth_headers())
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+    assert json.loads(response.data)["content"] == "Plain JSON please"
+
+
+def test_text_plain_response_returns_raw_content(client):
+    text = 'Raw "text" with\nnewlines and ünïcode'
+    response = post_text(client, text, auth_headers(Accept="text/plain"))
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert response.get_data(as_text=True) == text
+    assert response.headers["X-Extract-File-Type"] == ".txt"
+    assert response.headers["X-Extract-Content-Length"] == str(len(text))
+    assert response.headers["X-Extract-Success"] == "true"
+
+
+def test_text_plain_pagination_headers(client):
+    text = "0123456789" * 10
+    response = post_text(client, text, auth_headers(Accept="text/plain"), limit=30)
+    assert response.get_data(as_text=True) == text[:30]
+    assert response.headers["X-Extract-Total-Length"] == "100"
+    assert response.headers["X-Extract-Has-More"] == "true"
+    assert response.headers["X-Extract-Next-Cursor"]
+
+
+def test_text_plain_headers_with_non_latin1_sheet_names(client):
+    workbook = build_xlsx({"売上": sheet_xml([[("A1", "inlineStr", "total")]])})
+    response = client.post(
+        "/extract-base64",
+        headers=auth_headers(Accept="text/plain"),
+        json={"base64": base64.b64encode(workbook).decode(), "filename": "sales.xlsx"},
+    )
+    assert response.status_code == 200
+    assert "total" in response.get_data(as_text=True)
+    # WSGI servers send header values as Latin-1
+    header = response.headers["X-Extract-Sheets"]
+    assert header.isascii()
+    assert json.loads(header)[0]["name"] == "売上"
+
+
+def test_msgpack_response(client):
+    msgpack = pytest.importorskip("msgpack")
+    response = post_text(client, "binary envelope", auth_headers(Accept="application/msgpack"))
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data, raw=False)["content"] == "binary envelope"
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from app import app, CONFIG, limiter, FallbackTextDecoder, extract_csv, iter_decoded_text, iter_stream_extraction
+
+
+@pytest.fixture
+def client():
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    original_api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    CONFIG['FILE_EXTRACTOR_KEY'] = ''
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        CONFIG['FILE_EXTRACTOR_KEY'] = original_api_key
+        limiter.enabled = True
+
+
+def mock_download(chunks, content_type):
+    response = Mock()
+    response.iter_content = Mock(return_value=iter(chunks))
+    response.headers = {'Content-Type': content_type}
+    response.raise_for_status = Mock()
+    return response
+
+
+def split_every(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_decoder_handles_multibyte_and_crlf_across_chunks():
+    data = 'naïve café\r\nline two ✓\r\n'.encode('utf-8')
+    for size in range(1, 6):
+        assert ''.join(iter_decoded_text(split_every(data, size))) == 'naïve café\nline two ✓\n'
+
+
+def test_decoder_switches_to_latin1_on_invalid_utf8():
+    decoder = FallbackTextDecoder()
+    text = decoder.decode(b'plain ascii, ') + decoder.decode('façade'.encode('latin-1'), final=True)
+    assert text == 'plain ascii, façade'
+    assert decoder.encoding == 'latin-1'
+
+
+def test_streamed_csv_matches_file_extraction():
+    csv_text = 'Name,Notes\nA,"multi\nline, quoted"\n\nB,"say ""hi"""\r\nC,plain\n'
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8', newline='') as f:
+        f.write(csv_text)
+        path = f.name
+    try:
+        expected, error = extract_csv(path)
+    finally:
+        os.unlink(path)
+    assert error is None
+
+    data = csv_text.encode('utf-8')
+    for size in (1, 3, 7, len(data)):
+        assert ''.join(iter_stream_extraction(split_every(data, size), '.csv')) == expected
+
+
+@patch('app.requests.get')
+def test_text_download_skips_temp_file(mock_get, client):
+    mock_get.return_value = mock_download([b'first part, ', b'second part'], 'text/plain')
+    with patch('app.tempfile.NamedTemporaryFile', side_effect=AssertionError('temp file used')):
+        response = client.get('/extract?url=https://example.com/notes.txt')
+    assert response.status_code == 200
+    assert json.loads(response.data)['content'] == 'first part, second part'
+
+
+@patch('app.requests.get')
+def test_stream_mode_returns_raw_text(mock_get, client):
+    chunks = [b'Name,City\n', b'Ann,Oslo\nBo', b'b,Rome\n']
+    mock_get.return_value = mock_download(chunks, 'text/csv')
+    response = client.get(
+        '/extract?url=https://example.com/data.csv&stream=true',
+        headers={'Accept': 'text/plain'}
+    )
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['X-Extract-File-Type'] == '.csv'
+    assert response.get_data(as_text=True) == 'Name,City\nAnn,Oslo\nBob,Rome'
+
+
+@patch('app.requests.get')
+def test_stream_mode_json_envelope(mock_get, client):
+    mock_get.return_value = mock_download([b'He said "hi"\n', b'\tand left'], 'text/plain')
+    response = client.post('/extract', json={'url': 'https://example.com/a.txt', 'stream': True})
+    data = json.loads(response.data)
+    assert data == {
+        'file_type': '.txt',
+        'content': 'He said "hi"\n\tand left',
+        'content_length': 22,
+        'success': True,
+    }
+
+
+@patch('app.requests.get')
+def test_stream_mode_reports_size_limit_in_envelope(mock_get, client):
+    original_max_file_size = CONFIG['MAX_FILE_SIZE']
+    CONFIG['MAX_FILE_SIZE'] = 10
+    try:
+        mock_get.return_value = mock_download([b'12345678', b'90abcdef'], 'text/plain')
+        response = client.get('/extract?url=https://example.com/big.txt&stream=1')
+        data = json.loads(response.data)
+    finally:
+        CONFIG['MAX_FILE_SIZE'] = original_max_file_size
+    assert data['success'] is False
+    assert 'File too large' in data['error']
+    assert data['content'] == '12345678'
+
+
+def test_stream_mode_rejects_pagination(client):
+    response = client.get('/extract?url=https://example.com/a.txt&stream=true&limit=10')
+    assert response.status_code == 400
+    assert 'stream cannot be combined' in json.loads(response.data)['error']
+
+
+@pytest.mark.parametrize('stream', [False, True])
+@patch('app.requests.get')
+def test_csv_rejected_by_parser_falls_back_to_file_extraction(mock_get, client, stream):
+    # One quoted field over csv.field_size_limit()
+    data = b'"' + b'x' * 200000 + b'"\n'
+    mock_get.side_effect = lambda *args, **kwargs: mock_download(split_every(data, 65536), 'text/csv')
+    response = client.post('/extract', json={'url': 'https://example.com/huge.csv', 'stream': stream})
+    body = json.loads(response.data)
+    assert response.status_code == 200
+    assert body['success'] is True
+    assert 'x' * 1000 in body['content']
@@ -0,0 +1,140 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import structured_logging
+from app import app, CONFIG, limiter
+from structured_logging import (
+    ContextFilter, JSONFormatter, QueuedHandler, SamplingFilter, begin_request, end_request
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+@pytest.fixture
+def queued_logger():
+    """A logger whose records stay on a queue, unformatted"""
+    handler = QueuedHandler(queue.Queue(2))
+    handler.addFilter(ContextFilter())
+    logger = logging.getLogger('test_structured_logging')
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger, handler
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = True
+    end_request()
+
+
+@pytest.fixture
+def root_logging():
+    """Put back the app's root handler after a test installs its own.
+
+    Reinstalling it with configure_logging() would bind it to whatever
+    sys.stderr is at the time, e.g. capsys's stream, closed after the test.
+    """
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    handler, listener = structured_logging._handler, structured_logging._listener
+    yield
+    structured_logging.stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    structured_logging._handler = handler
+    if listener is not None:
+        # configure_logging() stopped it; restart it on the same queue
+        structured_logging._listener = listener
+        listener.start()
+
+
+class Counted:
+    """Argument that counts how often it is formatted"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return 'counted'
+
+
+def test_json_records_carry_fields_and_request_id(queued_logger):
+    logger, handler = queued_logger
+    begin_request('abc-123')
+    logger.info("Downloaded file: %d bytes", 42, extra={'event': 'downloaded', 'bytes': 42})
+    try:
+        raise ValueError('broken')
+    except ValueError:
+        logger.error("Extraction failed", exc_info=True)
+    downloaded, failed = (json.loads(JSONFormatter().format(handler.queue.get(timeout=1))) for _ in range(2))
+    assert downloaded['message'] == 'Downloaded file: 42 bytes'
+    assert downloaded['request_id'] == 'abc-123'
+    assert (downloaded['event'], downloaded['bytes']) == ('downloaded', 42)
+    assert 'ValueError: broken' in failed['exception']
+
+
+def test_formatting_happens_off_the_request_thread(queued_logger):
+    logger, handler = queued_logger
+    argument = Counted()
+    logger.info("Value %s", argument)
+    assert argument.calls == 0
+    assert handler.queue.get(timeout=1).getMessage() == 'Value counted'
+    assert argument.calls == 1
+
+
+def test_full_queue_drops_instead_of_blocking(queued_logger):
+    logger, handler = queued_logger
+    for number in range(5):
+        logger.warning("Record %d", number)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_info_events_are_sampled_per_request(queued_logger):
+    logger, handler = queued_logger
+    sampling = SamplingFilter(rate=0.5)
+    handler.addFilter(sampling)
+    argument = Counted()
+    begin_request(sample_rate=0)
+    logger.info("Extracted %s", argument, extra={'event': 'extracted'})
+    logger.info("Not an event")
+    logger.warning("Slow origin", extra={'event': 'slow'})
+    records = [handler.queue.get(timeout=1) for _ in range(2)]
+    assert [record.getMessage() for record in records] == ['Not an event', 'Slow origin']
+    assert argument.calls == 0
+    assert sampling.dropped == 1
+    begin_request(sample_rate=1)
+    logger.info("Extracted", extra={'event': 'extracted'})
+    assert handler.queue.qsize() == 1
+
+
+def test_configured_handler_writes_json_from_a_thread(root_logging, capsys):
+    structured_logging.configure_logging({**CONFIG, 'LOG_FORMAT': 'json', 'LOG_ASYNC': True})
+    logging.getLogger('test_async_logging').warning("Queued %s", 'record')
+    structured_logging.stop_logging()
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith('{')]
+    assert {'level': 'WARNING', 'message': 'Queued record'}.items() <= lines[-1].items()
+
+
+def test_request_id_header(client):
+    given = client.get('/health', headers={'X-Request-ID': 'client-42'})
+    assert given.headers['X-Request-ID'] == 'client-42'
+    # Malformed ids are replaced, not echoed
+    replaced = client.get('/health', headers={'X-Request-ID': 'bad id'})
+    assert replaced.headers['X-Request-ID'] not in ('', 'bad id')
+    assert len(client.get('/health').headers['X-Request-ID']) == 32
@@ -0,0 +1,125 @@
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+
+import tracing
+from app import app, CONFIG, limiter
+from tracing import FileExporter, NOOP_SPAN, parse_traceparent
+
+TRACEPARENT = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a test client with authentication disabled."""
+    app.config['TESTING'] = True
+    monkeypatch.setitem(CONFIG, 'FILE_EXTRACTOR_KEY', '')
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Export traces to a file for the duration of the test."""
+    path = tmp_path / 'traces.jsonl'
+    tracing.configure(FileExporter(str(path), 'test-service'))
+    try:
+        yield path
+    finally:
+        tracing.configure(None)
+
+
+def exported_spans(path):
+    """Spans of every exported trace, in export order."""
+    spans = []
+    for line in path.read_text().splitlines():
+        for resource in json.loads(line)['resourceSpans']:
+            assert resource['resource']['attributes'][0]['value'] == {'stringValue': 'test-service'}
+            for scope in resource['scopeSpans']:
+                spans.extend(scope['spans'])
+    return spans
+
+
+def attributes(span):
+    return {item['key']: next(iter(item['value'].values())) for item in span['attributes']}
+
+
+def test_parse_traceparent():
+    assert parse_traceparent(TRACEPARENT) == ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True)
+    assert parse_traceparent(TRACEPARENT[:-2] + '00')[2] is False
+    for header in (None, '', 'garbage', '00-' + '0' * 32 + '-00f067aa0ba902b7-01', TRACEPARENT[:-1]):
+        assert parse_traceparent(header) is None
+
+
+def test_disabled_tracing_is_a_pass_through():
+    assert not tracing.enabled()
+    assert tracing.start_trace('GET /health') is None
+    assert tracing.span('serialize') is NOOP_SPAN
+
+    @tracing.traced()
+    def add(a, b):
+        return a + b
+
+    assert add(2, 3) == 5
+
+
+@patch('app.requests.get')
+def test_extract_spans_join_the_callers_trace(mock_get, client, trace_file):
+    # A text file behind a .pdf URL: the PDF extractor fails, a fallback succeeds
+    response = Mock()
+    response.iter_content = Mock(return_value=iter([b'plain text behind a pdf name']))
+    response.headers = {'Content-Type': 'application/pdf'}
+    response.raise_for_status = Mock()
+    mock_get.return_value = response
+
+    reply = client.get('/extract?url=https://example.com/report.pdf', headers={'traceparent': TRACEPARENT})
+    assert reply.status_code == 200
+
+    spans = exported_spans(trace_file)
+    assert {span['traceId'] for span in spans} == {'4bf92f3577b34da6a3ce929d0e0e4736'}
+    by_name = {}
+    for span in spans:
+        by_name.setdefault(span['name'], []).append(span)
+    root = by_name['GET /extract'][0]
+    assert root['parentSpanId'] == '00f067aa0ba902b7'
+    assert attributes(root)['http.response.status_code'] == '200'
+    assert attributes(root)['request.id'] == reply.headers['X-Request-ID']
+    for name in ('validate_url', 'open_download', 'save_download', 'extract_path', 'serialize'):
+        assert by_name[name][0]['parentSpanId'] == root['spanId'], name
+
+    attempts = by_name['extract_attempt']
+    assert attributes(attempts[0])['file.type'] == '.pdf'
+    assert attempts[0]['status']['code'] == tracing.STATUS_ERROR
+    assert attempts[-1]['status'] == {'code': tracing.STATUS_OK}
+    extract_path_id = by_name['extract_path'][0]['spanId']
+    assert all(attempt['parentSpanId'] == extract_path_id for attempt in attempts)
+
+
+def test_unsampled_caller_is_not_traced(client, trace_file):
+    client.post('/extract-base64', json={'base64': 'aGVsbG8=', 'filename': 'a.txt'},
+                headers={'traceparent': TRACEPARENT[:-2] + '00'})
+    assert not trace_file.exists()
+
+    client.post('/extract-base64', json={'base64': 'aGVsbG8=', 'filename': 'a.txt'})
+    root = [span for span in exported_spans(trace_file) if span['name'] == 'POST /extract-base64']
+    assert len(root) == 1 and 'parentSpanId' not in root[0]
+
+
+def test_exceptions_mark_the_span_as_failed(trace_file):
+    root = tracing.start_trace('job')
+    try:
+        with pytest.raises(ValueError):
+            with tracing.span('parse', {'file.type': '.docx'}):
+                raise ValueError('corrupt')
+    finally:
+        tracing.finish_trace(root)
+        tracing.detach()
+    parse, job = exported_spans(trace_file)
+    assert parse['status'] == {'code': tracing.STATUS_ERROR, 'message': 'corrupt'}
+    assert attributes(parse) == {'file.type': '.docx', 'exception.type': 'ValueError'}
+    assert (parse['parentSpanId'], job['status']) == (job['spanId'], {'code': tracing.STATUS_OK})
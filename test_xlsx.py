@@ -0,0 +1,147 @@
+import base64
+import io
+import json
+import zipfile
+
+import pytest
+
+from app import app, CONFIG, limiter, extract_xlsx, extract_xlsx_sheets, parse_sheet_selection
+from office_xml import XLSXReader, column_index
+
+SHEET_NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+REL_NS = 'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def sheet_xml(rows):
+    """Worksheet XML; rows are lists of (reference, type, value) tuples."""
+    body = []
+    for number, cells in enumerate(rows, start=1):
+        parts = []
+        for reference, cell_type, value in cells:
+            if cell_type == 'inlineStr':
+                parts.append(f'<c r="{reference}" t="inlineStr"><is><t>{value}</t></is></c>')
+            elif cell_type:
+                parts.append(f'<c r="{reference}" t="{cell_type}"><v>{value}</v></c>')
+            else:
+                parts.append(f'<c r="{reference}"><v>{value}</v></c>')
+        body.append(f'<row r="{number}">{"".join(parts)}</row>')
+    return f'<worksheet {SHEET_NS}><sheetData>{"".join(body)}</sheetData></worksheet>'
+
+
+def build_xlsx(sheets, shared_strings=()):
+    """Build a minimal workbook from {sheet name: worksheet xml}."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        entries = ''.join(
+            f'<sheet name="{name}" sheetId="{i}" r:id="rId{i}"/>'
+            for i, name in enumerate(sheets, start=1)
+        )
+        archive.writestr('xl/workbook.xml', f'<workbook {SHEET_NS} {REL_NS}><sheets>{entries}</sheets></workbook>')
+        relationships = ''.join(
+            f'<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" Type="worksheet"/>'
+            for i in range(1, len(sheets) + 1)
+        )
+        archive.writestr(
+            'xl/_rels/workbook.xml.rels',
+            f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{relationships}</Relationships>'
+        )
+        for i, xml in enumerate(sheets.values(), start=1):
+            archive.writestr(f'xl/worksheets/sheet{i}.xml', xml)
+        items = ''.join(f'<si><t>{text}</t></si>' for text in shared_strings)
+        archive.writestr('xl/sharedStrings.xml', f'<sst {SHEET_NS}>{items}</sst>')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    data = build_xlsx(
+        {
+            'Summary': sheet_xml([
+                [('A1', 's', 0), ('B1', 's', 1)],
+                [('A2', 'inlineStr', 'Total'), ('C2', None, 42)],
+                [('A3', 'b', 1)],
+            ]),
+            'Data': sheet_xml([[('A1', None, i), ('B1', 's', 2)] for i in range(10)]),
+        },
+        shared_strings=['Name', 'Value', 'row'],
+    )
+    path = tmp_path / 'book.xlsx'
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the Flask app."""
+    app.config['TESTING'] = True
+    limiter.enabled = False
+    try:
+        with app.test_client() as test_client:
+            yield test_client
+    finally:
+        limiter.enabled = True
+
+
+def auth_headers():
+    """Return auth headers when API key auth is enabled."""
+    api_key = CONFIG.get('FILE_EXTRACTOR_KEY', '')
+    if not api_key:
+        return {}
+    return {'Authorization': f'Bearer {api_key}'}
+
+
+def test_column_index():
+    assert column_index('A1') == 0
+    assert column_index('Z9') == 25
+    assert column_index('AB12') == 27
+
+
+def test_parse_sheet_selection():
+    assert parse_sheet_selection('Summary, 2') == (['Summary', '2'], None)
+    assert parse_sheet_selection([1, 'Data']) == ([1, 'Data'], None)
+    assert parse_sheet_selection(None) == (None, None)
+    assert parse_sheet_selection({'a': 1})[0] is None
+
+
+def test_reader_streams_rows_with_gaps(workbook):
+    with XLSXReader(workbook) as reader:
+        assert [name for name, _ in reader.sheets] == ['Summary', 'Data']
+        rows = list(reader.iter_rows(reader.sheets[0][1]))
+    assert rows == [['Name', 'Value'], ['Total', '', '42'], ['TRUE']]
+
+
+def test_extract_xlsx_text(workbook):
+    content, error = extract_xlsx(workbook)
+    assert error is None
+    assert content.startswith('--- Summary ---\nName,Value\nTotal,,42\nTRUE\n\n--- Data ---\n0,row\n')
+
+
+def test_sheet_selection_and_row_limit(workbook):
+    sheets, error = extract_xlsx_sheets(workbook, {'sheets': [2], 'max_rows': 3, 'include_rows': True})
+    assert error is None
+    assert len(sheets) == 1
+    sheet = sheets[0]
+    assert sheet['name'] == 'Data'
+    assert sheet['row_count'] == 3
+    assert sheet['truncated'] is True
+    assert sheet['rows'] == [['0', 'row'], ['1', 'row'], ['2', 'row']]
+
+    sheets, error = extract_xlsx_sheets(workbook, {'sheets': ['Missing']})
+    assert sheets is None
+    assert 'Sheet not found' in error
+
+
+def test_base64_xlsx_response(client, workbook):
+    with open(workbook, 'rb') as f:
+        payload = base64.b64encode(f.read()).decode('utf-8')
+    response = client.post(
+        '/extract-base64',
+        headers=auth_headers(),
+        json={'base64': payload, 'filename': 'book.xlsx', 'sheets': 'Summary', 'rows': True},
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['file_type'] == '.xlsx'
+    [sheet] = data['sheets']
+    assert sheet['rows'][1] == ['Total', '', '42']
+    assert data['content'][sheet['content_offset']:].startswith('Name,Value')
@@ -0,0 +1,283 @@
+"""
+Lightweight request tracing with OpenTelemetry-compatible export
+
+A request's root span is started from its W3C ``traceparent`` header, so
+its spans join the caller's trace; nested spans mark the stages of the
+request (URL validation, download, each extractor attempt, serialization).
+Finished traces are appended to a file as one OTLP/JSON
+``{"resourceSpans": [...]}`` object per line, the format written by the
+OpenTelemetry Collector's file exporter, which the collector's OTLP JSON
+file receiver and most trace viewers read.
+
+Outside a sampled request, span() returns a shared no-op span and traced
+functions are called directly, so disabled tracing costs one context
+variable lookup per instrumented call.
+
+    with tracing.span('extract.attempt', {'file.type': '.pdf'}) as span:
+        ...
+        span.set_error(message)
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_PATTERN = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Innermost open span of the request being handled
+current_span = contextvars.ContextVar('current_span', default=None)
+
+_exporter = None
+
+
+def parse_traceparent(header):
+    """
+    Parse a W3C traceparent header
+
+    Returns:
+        tuple | None: (trace_id, parent_span_id, sampled), or None when
+        the header is missing or malformed
+    """
+    match = TRACEPARENT_PATTERN.match((header or '').strip().lower())
+    if not match:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == '0' * 32 or span_id == '0' * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class NoopSpan:
+    """Stands in for a span when nothing is traced"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, message):
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Span:
+    """A timed operation in a trace; used as a context manager"""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'attributes',
+                 'start', 'end', 'error', '_token')
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+        self._token = None
+
+    @property
+    def trace_id(self):
+        return self.trace.trace_id
+
+    def __enter__(self):
+        self._token = current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.attributes['exception.type'] = exc_type.__name__
+            self.set_error(str(exc))
+        self.finish()
+        current_span.reset(self._token)
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_error(self, message):
+        self.error = message or 'error'
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.time_ns()
+            self.trace.spans.append(self)
+
+    def traceparent(self):
+        """The traceparent header naming this span as the parent"""
+        return f'00-{self.trace_id}-{self.span_id}-01'
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [otlp_attribute(key, value) for key, value in self.attributes.items()
+                           if value is not None],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error else {'code': STATUS_OK},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+class Trace:
+    """The spans of one request in this process, exported together"""
+
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+
+
+def otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class FileExporter:
+    """
+    Appends finished traces to a file, one OTLP/JSON object per line
+
+    The file is opened in append mode for every trace, so workers of an
+    instance may share it and it may be rotated underneath the server.
+    """
+
+    def __init__(self, path, service_name='file-extractor'):
+        self.path = path
+        self.resource = {'attributes': [otlp_attribute('service.name', service_name)]}
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.failed = 0
+
+    def export(self, spans):
+        line = json.dumps({'resourceSpans': [{
+            'resource': self.resource,
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }]}, separators=(',', ':')) + '\n'
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+        except OSError as e:
+            self.failed += 1
+            logger.warning(f"Failed to export trace: {str(e)}")
+            return
+        self.exported += 1
+
+
+def configure(exporter):
+    """Export traces with exporter, or disable tracing with None"""
+    global _exporter
+    _exporter = exporter
+
+
+def enabled():
+    return _exporter is not None
+
+
+def start_trace(name, traceparent=None, sample_rate=1.0, attributes=None):
+    """
+    Open the root span of a request and make it current
+
+    The caller's sampling decision in traceparent is honoured; requests
+    without one are sampled at sample_rate.
+
+    Returns:
+        Span | None: The root span, or None when the request is not traced
+    """
+    if _exporter is None:
+        return None
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id = os.urandom(16).hex(), None
+        sampled = sample_rate >= 1 or random.random() < sample_rate
+    if not sampled:
+        return None
+    root = Span(Trace(trace_id), name, parent_id, SPAN_KIND_SERVER, attributes)
+    current_span.set(root)
+    return root
+
+
+def detach():
+    """Stop recording spans in this context; sync workers reuse their thread"""
+    current_span.set(None)
+
+
+def finish_trace(root):
+    """End the root span and export the request's spans"""
+    if root is None or _exporter is None:
+        return
+    root.finish()
+    _exporter.export(root.trace.spans)
+
+
+def span(name, attributes=None):
+    """
+    A child of the current span, or the no-op span outside a traced request
+
+    Returns:
+        Span | NoopSpan: Context manager yielding the span
+    """
+    parent = current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, attributes=attributes)
+
+
+def traced(name=None):
+    """Decorator running each call of a function in a span named after it"""
+    def decorator(f):
+        span_name = name or f.__name__
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            parent = current_span.get()
+            if parent is None:
+                return f(*args, **kwargs)
+            with Span(parent.trace, span_name, parent.span_id):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def tracing_stats():
+    """Traces exported and failed by this worker, or None when disabled"""
+    if _exporter is None:
+        return None
+    return {'exported': getattr(_exporter, 'exported', 0), 'failed': getattr(_exporter, 'failed', 0)}